@@ -1,5 +1,7 @@
+import asyncio
 import logging
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI, HTTPException
@@ -16,10 +18,21 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 STATIC_DIR = BASE_DIR / "frontend" / "static"
 INDEX_FILE = BASE_DIR / "frontend" / "index.html"
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load and warm the services in the background; /api/ready flips once they are warm"""
+    startup = asyncio.create_task(api.startup())
+    yield
+    startup.cancel()
+    await api.shutdown()
+
+
 app = FastAPI(
     title="MPP SOP & Appendix I Chat",
     description="DoD Mentor-Protégé Program expert assistant powered by Grok 4 and Gemini verification",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -1,17 +1,38 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 
 class ChatMessage(BaseModel):
     """Chat message request"""
     message: str
     use_rag: bool = True
+    # None uses the server default (VERIFICATION_MODE)
+    verification_mode: Optional[Literal["fast", "single", "dual", "adaptive", "parallel"]] = None
 
 
 class ChatResponse(BaseModel):
     """Chat response with sources"""
     response: str
     sources: Optional[List[dict]] = None
+    cached: bool = False
+    # Shared the pipeline of an identical request already in flight
+    coalesced: bool = False
+    # Retrieval latency in milliseconds (vector_ms, lexical_ms, rerank_ms, total_ms) and rerank counts
+    retrieval: Optional[dict] = None
+
+
+class ChatBatchResult(BaseModel):
+    """One NDJSON line of /chat/batch: the answer, or error, for messages[index]"""
+    index: int
+    response: Optional[str] = None
+    sources: Optional[List[dict]] = None
+    cached: bool = False
+    retrieval: Optional[dict] = None
+    error: Optional[str] = None
+    # Seconds to wait before retrying, when the error was a full queue or a rate limit
+    retry_after: Optional[int] = None
+    # Pipeline time for this message, including its wait for a batch slot
+    ms: float = 0.0
 
 
 class HealthResponse(BaseModel):
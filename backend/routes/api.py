@@ -1,41 +1,430 @@
-from fastapi import APIRouter, HTTPException
-from backend.models.schemas import ChatMessage, ChatResponse, HealthResponse
-from backend.services.chat_service import ChatService
-from backend.services.rag_service import RAGService
+import os
+import asyncio
+import json
+import time
+from fastapi import APIRouter, Depends, HTTPException, Response
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from backend.models.schemas import ChatBatchResult, ChatMessage, ChatResponse, HealthResponse
+from backend.services import metrics
+from backend.services.admission import AdmissionQueue, Overloaded
+from backend.services.single_flight import Flight, SingleFlight
 import logging
 
+if TYPE_CHECKING:
+    from backend.services.answer_cache import SemanticAnswerCache
+    from backend.services.chat_service import ChatService, EventEmitter
+    from backend.services.rag_service import RAGService
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Initialize services
-chat_service = ChatService()
-rag_service = RAGService()
+# Service singletons, created once per process by startup() from the app
+# lifespan. Importing this module stays cheap: torch, chromadb and the
+# provider SDKs are only imported there.
+chat_service: Optional["ChatService"] = None
+rag_service: Optional["RAGService"] = None
+answer_cache: Optional["SemanticAnswerCache"] = None
+admission: Optional[AdmissionQueue] = None
+coalescer: Optional[SingleFlight] = None
+# /chat/batch: questions per request, and pipelines one batch runs at once
+batch_limits = {"max_messages": 500, "concurrency": 8}
+readiness = {"status": "starting", "startup_ms": None, "warmup_ms": None, "error": None}
+
+WARMUP_QUERY = "¿Cuáles son los requisitos de elegibilidad del Programa Mentor-Protégé?"
+
+
+def _create_services() -> Tuple["ChatService", "RAGService", "SemanticAnswerCache"]:
+    from backend.services.answer_cache import SemanticAnswerCache
+    from backend.services.chat_service import ChatService
+    from backend.services.rag_service import RAGService
+
+    return ChatService(), RAGService(), SemanticAnswerCache()
+
 
+async def startup():
+    """Create the services, then run one retrieval end to end before reporting ready
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat(message: ChatMessage):
-    """Handle chat requests with optional RAG context"""
+    Model loading runs in a worker thread so /api/live keeps answering
+    meanwhile. Failures are recorded in `readiness` rather than raised.
+    """
+    global chat_service, rag_service, answer_cache, admission, coalescer
+    start = time.perf_counter()
     try:
-        sources = None
+        readiness["status"] = "loading"
+        admission = AdmissionQueue.from_env()
+        coalescer = SingleFlight.from_env()
+        batch_limits.update(
+            max_messages=int(os.getenv("CHAT_BATCH_MAX_MESSAGES", "500")),
+            concurrency=int(os.getenv("CHAT_BATCH_CONCURRENCY", "8")),
+        )
+        chat_service, rag_service, answer_cache = await asyncio.to_thread(_create_services)
+        readiness["startup_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+        # The first encode and Chroma query pay for lazy initialisation; pay it here
+        readiness["status"] = "warming"
+        warm_start = time.perf_counter()
+        embedding = await rag_service.aembed_query(WARMUP_QUERY)
+        await rag_service.aretrieve(WARMUP_QUERY, embedding, n_results=5)
+        readiness["warmup_ms"] = round((time.perf_counter() - warm_start) * 1000, 1)
+
+        count = await asyncio.to_thread(rag_service.get_document_count)
+        if count == 0:
+            logger.warning("No documents loaded in the knowledge base; run: python init_documents.py")
+        readiness["status"] = "ready"
+        logger.info(
+            f"Ready in {(time.perf_counter() - start) * 1000:.0f}ms "
+            f"(load {readiness['startup_ms']:.0f}ms, warm-up {readiness['warmup_ms']:.0f}ms, {count} chunks)"
+        )
+    except Exception as e:
+        readiness.update(status="failed", error=str(e))
+        logger.error(f"Startup failed: {str(e)}")
+
+
+async def shutdown():
+    """Save unsaved cached answers, close upstream connections and release the retrieval thread pool"""
+    if chat_service is not None:
+        await chat_service.aclose()
+    if answer_cache is not None:
+        await asyncio.to_thread(answer_cache.flush)
+    if rag_service is not None:
+        rag_service.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def require_ready():
+    """Reject requests until startup() has finished warming up"""
+    if readiness["status"] != "ready":
+        raise HTTPException(status_code=503, detail=f"Service {readiness['status']}", headers={"Retry-After": "5"})
+
+
+async def _retrieve(message: ChatMessage) -> Tuple[Optional[List[float]], Optional[List[Dict]], Optional[Dict]]:
+    """Embed the question once; the embedding serves both retrieval and the answer cache
+
+    Returns (embedding, sources, retrieval timings).
+    """
+    if not (message.use_rag or answer_cache.enabled):
+        return None, None, None
+
+    with metrics.span("embed"):
+        embedding = await rag_service.aembed_query(message.message)
+    sources = timings = None
+    if message.use_rag:
+        sources, timings = await rag_service.aretrieve(message.message, embedding, n_results=5)
+        logger.info(f"Retrieved {len(sources)} relevant sources")
+    return embedding, sources, timings
+
+
+async def _answer(
+    message: ChatMessage,
+    embedding: Optional[List[float]],
+    sources: Optional[List[Dict]],
+    emit: Optional["EventEmitter"] = None,
+) -> Tuple[str, bool]:
+    """Return (response, cached), consulting the semantic answer cache first"""
+    version = rag_service.collection_version
+    # Answers verified less thoroughly must not be served to stricter requests
+    mode = chat_service.resolve_verification_mode(message.verification_mode)
+    if embedding is not None:
+        cached = answer_cache.lookup(embedding, sources, version, scope=mode)
+        if cached is not None:
+            return cached, True
+
+    response = await chat_service.generate_response(
+        message.message, context=sources, emit=emit, verification_mode=mode
+    )
 
-        # Get RAG context if enabled
-        if message.use_rag:
-            sources = rag_service.query(message.message, n_results=5)
-            logger.info(f"Retrieved {len(sources)} relevant sources")
+    # Only verified answers are worth replaying
+    if embedding is not None and not response.startswith("Error"):
+        await asyncio.to_thread(answer_cache.put, embedding, sources, response, version, mode)
+    return response, False
 
-        # Generate response with Grok 4
-        response = chat_service.generate_response(message.message, context=sources)
 
-        return ChatResponse(response=response, sources=sources)
+def _overloaded(exc: Overloaded) -> HTTPException:
+    """503 (no pipeline slot) or 429 (provider rate limit), with Retry-After"""
+    return HTTPException(status_code=exc.status, detail=str(exc), headers=exc.headers)
 
+
+def _outcome(response: str, cached: bool) -> str:
+    if response.startswith("Error"):
+        return "error"
+    return "cached" if cached else "ok"
+
+
+def _flight_key(message: ChatMessage) -> Tuple:
+    """Requests that would run the same pipeline: same normalized text, RAG flag, mode and index"""
+    mode = chat_service.resolve_verification_mode(message.verification_mode)
+    text = " ".join(message.message.split()).casefold()
+    return text, message.use_rag, mode, rag_service.collection_version
+
+
+async def _lead(message: ChatMessage, flight: Flight, stream: bool) -> Tuple:
+    """Run one pipeline for every request attached to the flight
+
+    Events go to the flight, which broadcasts them to streaming callers;
+    provider output is only streamed when the leading request streams.
+    Returns (response, cached, sources, retrieval timings).
+    """
+    embedding, sources, timings = await _retrieve(message)
+    await flight.emit("sources", sources or [])
+    if timings:
+        await flight.emit("retrieval", timings)
+    response, cached = await _answer(message, embedding, sources, emit=flight.emit if stream else None)
+    return response, cached, sources, timings
+
+
+async def _join_or_lead(message: ChatMessage, stream: bool) -> Tuple[Flight, bool]:
+    """Attach to an identical in-flight pipeline, or take an admission slot and start one
+
+    Returns (flight, leader). Only leaders queue for a slot, so a burst of
+    the same question costs one slot and one set of upstream calls.
+    """
+    key = _flight_key(message)
+    flight = coalescer.get(key)
+    if flight is not None:
+        return flight, False
+
+    metrics.observe("queue", await admission.acquire())
+    # An identical request may have started a pipeline while this one queued
+    flight = coalescer.get(key)
+    if flight is not None:
+        admission.release()
+        return flight, False
+
+    flight = coalescer.start(key, lambda flight: _lead(message, flight, stream))
+    started = time.monotonic()
+    # A callback, not a finally in _lead: a task cancelled before its first step never runs it
+    flight.task.add_done_callback(lambda _task: admission.release(time.monotonic() - started))
+    return flight, True
+
+
+async def _result(flight: Flight, leader: bool) -> Tuple:
+    """The flight's result; followers record their wait as a "coalesced" stage"""
+    start = time.perf_counter()
+    result = await coalescer.wait(flight)
+    if not leader:
+        metrics.observe("coalesced", time.perf_counter() - start)
+    return result
+
+
+def _outcome_for(response: str, cached: bool, leader: bool) -> str:
+    outcome = _outcome(response, cached)
+    return "coalesced" if outcome == "ok" and not leader else outcome
+
+
+@router.post("/chat", response_model=ChatResponse, dependencies=[Depends(require_ready)])
+async def chat(message: ChatMessage, http_response: Response):
+    """Handle chat requests with optional RAG context
+
+    Requests wait in the admission queue for a pipeline slot; when it is
+    full, or a provider is over its rate limit, they get 503/429 with
+    Retry-After. A request identical to one already in flight shares its
+    pipeline and result (coalesced=true). Per-stage timings (including the
+    queue wait) and provider token counts are returned in the Server-Timing
+    header.
+    """
+    trace = metrics.start_request("chat")
+    try:
+        flight, leader = await _join_or_lead(message, stream=False)
+        response, cached, sources, timings = await _result(flight, leader)
+
+        http_response.headers["Server-Timing"] = trace.server_timing()
+        trace.finish(_outcome_for(response, cached, leader))
+        return ChatResponse(
+            response=response, sources=sources, cached=cached, coalesced=not leader, retrieval=timings
+        )
+
+    except Overloaded as e:
+        trace.finish("rejected")
+        raise _overloaded(e)
     except Exception as e:
+        trace.finish("error")
         logger.error(f"Error in chat endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/health", response_model=HealthResponse)
+def _sse_event(event: str, data) -> str:
+    """Format one Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/chat/stream", dependencies=[Depends(require_ready)])
+async def chat_stream(message: ChatMessage):
+    """Stream a chat response as Server-Sent Events
+
+    Events, in order: "sources" (retrieved chunks), "retrieval" (retrieval
+    and reranking latency), "context" (per model: prompt context tokens
+    before and after packing, de-duplicated and dropped over budget),
+    "status" (one per verification pass), "token"
+    (final pass text as it is generated), "timings" (per-stage spans, as in
+    the /chat Server-Timing header) and "done" (full post-processed
+    response). "error" replaces "done" on failure; it carries retry_after
+    when a provider was over its rate limit. A full admission queue is
+    answered with 503 before the stream starts.
+
+    A request identical to one already in flight is replayed that
+    pipeline's events so far, then follows it live ("done" has
+    coalesced=true); it sees no "token" events if the leader was /chat.
+    """
+    trace = metrics.start_request("chat_stream")
+    try:
+        flight, leader = await _join_or_lead(message, stream=True)
+    except Overloaded as e:
+        trace.finish("rejected")
+        raise _overloaded(e)
+    events = flight.subscribe()
+
+    async def follow():
+        outcome = "cancelled"
+        try:
+            response, cached, _sources, _timings = await _result(flight, leader)
+            outcome = _outcome_for(response, cached, leader)
+            return response, cached
+        except Overloaded:
+            outcome = "rejected"
+            raise
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            trace.finish(outcome)
+
+    # Attached here rather than in event_stream so the pipeline still finishes
+    # (and frees its slot) if the client disconnects before the body is iterated
+    result = asyncio.create_task(follow())
+
+    async def event_stream():
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield _sse_event(*event)
+            try:
+                response, cached = await result
+            except Overloaded as e:
+                yield _sse_event("error", {"detail": str(e), "retry_after": int(e.headers["Retry-After"])})
+            except Exception as e:
+                logger.error(f"Error in chat stream: {str(e)}")
+                yield _sse_event("error", {"detail": str(e)})
+            else:
+                yield _sse_event("timings", trace.timings())
+                yield _sse_event("done", {"response": response, "cached": cached, "coalesced": not leader})
+        finally:
+            # Client went away: detach; the pipeline stops if nobody else is waiting for it
+            result.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _retrieve_batch(messages: List[ChatMessage]) -> List[Tuple]:
+    """_retrieve() for a whole batch: one encode for all questions, one vector store query for the RAG ones"""
+    results = [(None, None, None)] * len(messages)
+    embedded = [index for index, message in enumerate(messages) if message.use_rag or answer_cache.enabled]
+    if not embedded:
+        return results
+
+    with metrics.span("embed"):
+        embeddings = await rag_service.aembed_queries([messages[index].message for index in embedded])
+    by_index = dict(zip(embedded, embeddings))
+    rag = [index for index in embedded if messages[index].use_rag]
+    retrieved = dict(zip(rag, await rag_service.aretrieve_many(
+        [messages[index].message for index in rag], [by_index[index] for index in rag], n_results=5
+    )))
+    return [(by_index.get(index), *retrieved.get(index, (None, None))) for index in range(len(messages))]
+
+
+@router.post("/chat/batch", dependencies=[Depends(require_ready)])
+async def chat_batch(messages: List[ChatMessage]):
+    """Answer a list of questions, streaming one NDJSON line per question as it completes
+
+    Retrieval for the whole batch runs up front as one encode and one vector
+    store query. Then at most CHAT_BATCH_CONCURRENCY pipelines run at once,
+    each holding an admission slot. Lines arrive in completion order; each
+    is a ChatBatchResult tagged with the question's index in the request.
+    A question turned away by the queue or a rate limit gets an error line
+    with retry_after; the rest of the batch carries on. More than
+    CHAT_BATCH_MAX_MESSAGES questions are refused with 413.
+    """
+    if len(messages) > batch_limits["max_messages"]:
+        raise HTTPException(
+            status_code=413, detail=f"At most {batch_limits['max_messages']} messages per batch"
+        )
+    trace = metrics.start_request("chat_batch")
+    try:
+        retrieved = await _retrieve_batch(messages)
+    except Exception as e:
+        trace.finish("error")
+        logger.error(f"Error in batch retrieval: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    slots = asyncio.Semaphore(max(batch_limits["concurrency"], 1))
+
+    async def answer(index: int, message: ChatMessage, embedding, sources, timings) -> ChatBatchResult:
+        start = time.perf_counter()
+        result = ChatBatchResult(index=index)
+        try:
+            async with slots, admission.admit() as waited:
+                metrics.observe("queue", waited)
+                response, cached = await _answer(message, embedding, sources)
+            result = ChatBatchResult(index=index, response=response, sources=sources, cached=cached, retrieval=timings)
+        except Overloaded as e:
+            result.error, result.retry_after = str(e), int(e.headers["Retry-After"])
+        except Exception as e:
+            logger.error(f"Error in chat batch item {index}: {str(e)}")
+            result.error = str(e)
+        result.ms = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    async def ndjson():
+        # Started here, so nothing runs for a client that never reads the body
+        tasks = [
+            asyncio.create_task(answer(index, message, *item))
+            for index, (message, item) in enumerate(zip(messages, retrieved))
+        ]
+        outcome = "cancelled"
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                yield result.model_dump_json(exclude_none=True) + "\n"
+            outcome = "ok"
+        finally:
+            # Client went away: stop the questions still queued or running
+            for task in tasks:
+                task.cancel()
+            trace.finish(outcome)
+
+    return StreamingResponse(
+        ndjson(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/live")
+async def live():
+    """Liveness: the process is serving requests (fails only if startup failed)"""
+    if readiness["status"] == "failed":
+        return JSONResponse(status_code=503, content={"status": "failed", "error": readiness["error"]})
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def ready():
+    """Readiness: services are loaded and warmed up"""
+    return JSONResponse(status_code=200 if readiness["status"] == "ready" else 503, content=readiness)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics: request and per-stage latency histograms, provider token counters"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/health", response_model=HealthResponse, dependencies=[Depends(require_ready)])
 async def health():
     """Health check endpoint"""
     try:
@@ -53,7 +442,44 @@ async def health():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/documents/count")
+@router.get("/providers", dependencies=[Depends(require_ready)])
+async def get_provider_stats():
+    """Grok provider pool health: circuit state, failures, hedging"""
+    if not chat_service.grok_pool:
+        return {"hedging": False, "hedges_sent": 0, "providers": []}
+    return chat_service.grok_pool.stats()
+
+
+@router.get("/upstream", dependencies=[Depends(require_ready)])
+async def get_upstream_stats():
+    """Provider retries (by reason), rate limiters, HTTP connection pool use and timeouts"""
+    return chat_service.upstream_stats()
+
+
+@router.get("/admission", dependencies=[Depends(require_ready)])
+async def get_admission_stats():
+    """Pipelines running and queued, admissions and rejections"""
+    return admission.stats()
+
+
+@router.get("/usage", dependencies=[Depends(require_ready)])
+async def get_usage():
+    """Token usage per provider, including prompt tokens served from provider caches"""
+    return chat_service.usage_totals
+
+
+@router.get("/cache/stats", dependencies=[Depends(require_ready)])
+async def get_cache_stats():
+    """Answer and retrieval cache counters, query micro-batch sizes and request coalescing"""
+    return {
+        "answers": answer_cache.stats(),
+        "coalescing": coalescer.stats(),
+        "retrieval": rag_service.retrieval_cache.stats(),
+        "batching": rag_service.batching_stats(),
+    }
+
+
+@router.get("/documents/count", dependencies=[Depends(require_ready)])
 async def get_document_count():
     """Get the number of document chunks"""
     try:
@@ -0,0 +1,288 @@
+"""
+Backpressure for the chat pipeline: a bounded admission queue in front of
+the routes and a requests/min + tokens/min limiter per upstream provider.
+
+Both turn work away early with an Overloaded error that the routes answer
+with 503/429 and a Retry-After header, instead of letting a burst fan out
+into provider rate-limit failures.
+"""
+import os
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Iterable, Optional
+import logging
+
+from backend.services import metrics
+from backend.services.tokens import TokenCounter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Prompt sizes only need to be close: providers meter their own tokenizer
+_token_counter = TokenCounter(os.getenv("CONTEXT_TOKEN_ENCODING", "cl100k_base"))
+
+
+class Overloaded(Exception):
+    """Request turned away for lack of capacity; answered with `status` and Retry-After"""
+
+    status = 503
+
+    def __init__(self, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.retry_after = retry_after
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class RateLimited(Overloaded):
+    """A provider's request or token budget is used up for longer than we may wait"""
+
+    status = 429
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute, holding at most `burst_seconds` worth
+
+    take() always succeeds and may overdraw the bucket; the caller then
+    waits the returned time, which keeps waiters first come, first served.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = 10.0):
+        self.rate = per_minute / 60
+        self.capacity = max(self.rate * burst_seconds, 1.0)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        return max(amount - self.level, 0.0) / self.rate
+
+    def take(self, amount: float):
+        self.level -= amount
+
+    def give_back(self, amount: float):
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """Requests/min and tokens/min budget for one upstream (RATE_LIMIT_<NAME>_RPM / _TPM)
+
+    A call is charged its estimated prompt tokens plus
+    RATE_LIMIT_COMPLETION_TOKENS. It waits for budget up to
+    RATE_LIMIT_MAX_WAIT_SECONDS (or its deadline) and is refused with
+    RateLimited beyond that. A Retry-After from the provider holds every
+    caller, not just the one that received it. 0 disables a limit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rpm: float = 0,
+        tpm: float = 0,
+        burst_seconds: float = 10.0,
+        max_wait: float = 10.0,
+        completion_tokens: int = 1000,
+    ):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = TokenBucket(rpm, burst_seconds) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm, burst_seconds) if tpm > 0 else None
+        self.max_wait = max_wait
+        self.completion_tokens = completion_tokens
+        self.held_until = 0.0
+        self.admitted = 0
+        self.waited = 0
+        self.refused = 0
+        self.wait_seconds = 0.0
+
+    @classmethod
+    def from_env(cls, name: str) -> "RateLimiter":
+        prefix = f"RATE_LIMIT_{name.upper()}"
+        return cls(
+            name,
+            rpm=float(os.getenv(f"{prefix}_RPM", "0")),
+            tpm=float(os.getenv(f"{prefix}_TPM", "0")),
+            burst_seconds=float(os.getenv("RATE_LIMIT_BURST_SECONDS", "10")),
+            max_wait=float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "10")),
+            completion_tokens=int(os.getenv("RATE_LIMIT_COMPLETION_TOKENS", "1000")),
+        )
+
+    def cost(self, texts: Iterable[str]) -> int:
+        """Tokens to charge for a call with these prompt parts (0 without a TPM limit)"""
+        if self.tokens is None:
+            return 0
+        return sum(_token_counter.count(text or "") for text in texts) + self.completion_tokens
+
+    def hold(self, seconds: float):
+        """Pause all calls for `seconds` (the provider sent a Retry-After)"""
+        self.held_until = max(self.held_until, time.monotonic() + seconds)
+
+    async def acquire(self, cost: int = 0, deadline: Optional[float] = None):
+        """Wait for budget for one call, or raise RateLimited; deadline is a time.monotonic() value"""
+        now = time.monotonic()
+        wait = max(self.held_until - now, 0.0)
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None and cost:
+            wait = max(wait, self.tokens.wait_time(cost, now))
+
+        allowed = self.max_wait if deadline is None else min(self.max_wait, deadline - now)
+        if wait > allowed:
+            self.refused += 1
+            metrics.RATE_LIMITED.inc(upstream=self.name)
+            raise RateLimited(f"{self.name} rate limit: next slot in {wait:.1f}s", wait)
+
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(cost)
+        self.admitted += 1
+        if wait <= 0:
+            return
+        self.waited += 1
+        self.wait_seconds += wait
+        metrics.RATE_LIMIT_WAIT_SECONDS.observe(wait, upstream=self.name)
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            if self.requests is not None:
+                self.requests.give_back(1)
+            if self.tokens is not None:
+                self.tokens.give_back(cost)
+            raise
+
+    def stats(self) -> Dict:
+        return {
+            "rpm": self.rpm or None,
+            "tpm": self.tpm or None,
+            "admitted": self.admitted,
+            "waited": self.waited,
+            "refused": self.refused,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "held_seconds": round(max(self.held_until - time.monotonic(), 0.0), 3),
+        }
+
+
+class AdmissionQueue:
+    """At most `max_active` pipelines at once, with a bounded FIFO queue behind them
+
+    A request that finds the queue full (ADMISSION_MAX_QUEUE), or waits
+    longer than ADMISSION_MAX_WAIT_SECONDS, is refused with Overloaded. Its
+    Retry-After is estimated from the recent pipeline duration and the
+    queue length. ADMISSION_MAX_ACTIVE=0 admits everything.
+    """
+
+    def __init__(self, max_active: int = 32, max_queue: int = 128, max_wait: float = 30.0):
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Exponentially weighted pipeline duration, for Retry-After estimates
+        self.service_seconds = 5.0
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "timeout": 0}
+
+    @classmethod
+    def from_env(cls) -> "AdmissionQueue":
+        return cls(
+            max_active=int(os.getenv("ADMISSION_MAX_ACTIVE", "32")),
+            max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "128")),
+            max_wait=float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "30")),
+        )
+
+    @property
+    def depth(self) -> int:
+        return len(self._waiters)
+
+    def _report(self):
+        metrics.ADMISSION_ACTIVE.set(self.active)
+        metrics.ADMISSION_QUEUE_DEPTH.set(self.depth)
+
+    def retry_after(self) -> float:
+        """Seconds until a request arriving now would likely get a slot"""
+        return self.service_seconds * (self.depth + 1) / max(self.max_active, 1)
+
+    def _reject(self, reason: str):
+        self.rejected[reason] += 1
+        metrics.ADMISSION_REJECTED.inc(reason=reason)
+        detail = "Server busy: queue full" if reason == "queue_full" else "Server busy: queued too long"
+        raise Overloaded(detail, self.retry_after())
+
+    async def acquire(self) -> float:
+        """Take a pipeline slot, waiting in line if needed; returns the seconds waited"""
+        start = time.monotonic()
+        if self.max_active <= 0 or (self.active < self.max_active and not self._waiters):
+            self.active += 1
+        else:
+            if self.depth >= self.max_queue:
+                self._reject("queue_full")
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            self._report()
+            try:
+                # release() hands the slot over by resolving the future
+                await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+            except asyncio.TimeoutError:
+                if not waiter.done():
+                    waiter.cancel()
+                    self._waiters.remove(waiter)
+                    self._report()
+                    self._reject("timeout")
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self.release()
+                else:
+                    waiter.cancel()
+                    self._waiters.remove(waiter)
+                    self._report()
+                raise
+        self.admitted += 1
+        self._report()
+        waited = time.monotonic() - start
+        metrics.ADMISSION_WAIT_SECONDS.observe(waited)
+        return waited
+
+    def release(self, duration: Optional[float] = None):
+        """Free a slot, handing it to the longest waiter; duration feeds the Retry-After estimate"""
+        if duration is not None:
+            self.service_seconds = 0.8 * self.service_seconds + 0.2 * duration
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._report()
+                return
+        self.active -= 1
+        self._report()
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[float]:
+        """Hold a pipeline slot for the enclosed block; yields the seconds waited"""
+        waited = await self.acquire()
+        start = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self.release(time.monotonic() - start)
+
+    def stats(self) -> Dict:
+        return {
+            "active": self.active,
+            "queued": self.depth,
+            "max_active": self.max_active,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "retry_after_seconds": round(self.retry_after(), 2),
+        }
@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import logging
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """Cache of verified answers keyed by question meaning
+
+    A question hits when its embedding is within ANSWER_CACHE_THRESHOLD
+    cosine similarity of a cached question that retrieved the same chunk set
+    and used the same pipeline settings. Entries are evicted LRU-first once
+    ANSWER_CACHE_MAX_ENTRIES is reached, or when older than
+    ANSWER_CACHE_TTL_SECONDS. The whole cache is dropped when the RAG
+    collection version changes (documents re-ingested, here or by
+    init_documents.py in another process). New answers reach the disk at
+    most every ANSWER_CACHE_SAVE_SECONDS, written outside the lock that
+    lookups take.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+        self.threshold = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+        self.max_entries = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "500"))
+        self.ttl_seconds = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+        self.path = os.getenv("ANSWER_CACHE_PATH", "./cache/answer_cache.json")
+        self.save_seconds = float(os.getenv("ANSWER_CACHE_SAVE_SECONDS", "5"))
+
+        self.collection_version: Optional[str] = None
+        self.entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._next_id = 0
+        self._lock = threading.Lock()
+        # Held while writing the file, so snapshots reach the disk in order
+        self._save_lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+        self._dirty = False
+
+        if self.enabled:
+            self._load()
+
+    @staticmethod
+    def chunk_key(sources: Optional[List[Dict]], scope: str = "") -> str:
+        """Identify the retrieved chunk set (order-insensitive) plus pipeline scope"""
+        ids = sorted(str(item.get("id", f"{item.get('source')}#{item.get('chunk')}")) for item in sources or [])
+        return scope + "|" + ",".join(ids)
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self, collection_version: str):
+        if self.collection_version != collection_version:
+            if self.entries:
+                logger.info("Collection changed; dropping %s cached answers", len(self.entries))
+            self.entries.clear()
+            self.collection_version = collection_version
+
+    def _expire(self):
+        if self.ttl_seconds <= 0:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        expired = [key for key, entry in self.entries.items() if entry["created"] < cutoff]
+        for key in expired:
+            del self.entries[key]
+        self.evictions += len(expired)
+
+    def lookup(
+        self,
+        embedding: List[float],
+        sources: Optional[List[Dict]],
+        collection_version: str,
+        scope: str = "",
+    ) -> Optional[str]:
+        """Return a cached answer for a semantically equivalent question, if any"""
+        if not self.enabled:
+            return None
+
+        chunk_key = self.chunk_key(sources, scope)
+        query = self._normalize(embedding)
+
+        with self._lock:
+            self._check_version(collection_version)
+            self._expire()
+
+            candidates = [key for key, entry in self.entries.items() if entry["chunk_key"] == chunk_key]
+            if candidates:
+                matrix = np.stack([self.entries[key]["vector"] for key in candidates])
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    key = candidates[best]
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    logger.info("Answer cache hit (similarity %.3f)", scores[best])
+                    return self.entries[key]["answer"]
+
+            self.misses += 1
+            return None
+
+    def put(
+        self,
+        embedding: List[float],
+        sources: Optional[List[Dict]],
+        answer: str,
+        collection_version: str,
+        scope: str = "",
+    ):
+        """Store a verified answer; it is saved to disk with the next batch"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._check_version(collection_version)
+            self._next_id += 1
+            self.entries[str(self._next_id)] = {
+                "chunk_key": self.chunk_key(sources, scope),
+                "vector": self._normalize(embedding),
+                "answer": answer,
+                "created": time.time(),
+            }
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+            if self.save_seconds > 0:
+                if self._save_timer is None:
+                    self._save_timer = threading.Timer(self.save_seconds, self.flush)
+                    self._save_timer.daemon = True
+                    self._save_timer.start()
+                return
+        self.flush()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def flush(self):
+        """Write unsaved answers to disk now"""
+        with self._save_lock:
+            with self._lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                if not self._dirty:
+                    return
+                # Entries are replaced, never changed in place, so a shallow copy is a snapshot
+                version, entries = self.collection_version, list(self.entries.values())
+                self._dirty = False
+            self._save(version, entries)
+
+    def _save(self, collection_version: Optional[str], entries: List[Dict]):
+        """Write the cache atomically so a crash never leaves a torn file"""
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            payload = {
+                "collection_version": collection_version,
+                "entries": [
+                    {
+                        "chunk_key": entry["chunk_key"],
+                        "vector": entry["vector"].tolist(),
+                        "answer": entry["answer"],
+                        "created": entry["created"],
+                    }
+                    for entry in entries
+                ],
+            }
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Error saving answer cache: {str(e)}")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                payload = json.load(f)
+            self.collection_version = payload.get("collection_version")
+            for entry in payload.get("entries", []):
+                self._next_id += 1
+                entry["vector"] = np.asarray(entry["vector"], dtype=np.float32)
+                self.entries[str(self._next_id)] = entry
+            self._expire()
+            logger.info(f"Loaded {len(self.entries)} cached answers from {self.path}")
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Error loading answer cache: {str(e)}")
+            self.entries.clear()
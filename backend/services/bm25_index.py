@@ -0,0 +1,136 @@
+import os
+import re
+import json
+import math
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Words, acronyms and dotted/hyphenated clause numbers ("232.7003", "3.2.1", "i-112.2")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, accent-folded tokens; clause numbers stay whole"""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return TOKEN_PATTERN.findall(folded)
+
+
+class BM25Index:
+    """Okapi BM25 inverted index over the collection's chunks
+
+    Built alongside the Chroma collection at ingest time and saved to
+    BM25_INDEX_PATH. Only per-chunk term frequencies are persisted; the
+    postings lists are rebuilt in memory on load.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("BM25_INDEX_PATH", "./chroma_db/bm25_index.json")
+        self.k1 = float(os.getenv("BM25_K1", "1.5"))
+        self.b = float(os.getenv("BM25_B", "0.75"))
+
+        # chunk id -> {"source", "length", "tf": {term: count}}
+        self.docs: Dict[str, Dict] = {}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.total_length = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _index(self, chunk_id: str, doc: Dict):
+        self.docs[chunk_id] = doc
+        self.total_length += doc["length"]
+        for term, count in doc["tf"].items():
+            self.postings[term][chunk_id] = count
+
+    def _unindex(self, chunk_id: str):
+        doc = self.docs.pop(chunk_id)
+        self.total_length -= doc["length"]
+        for term in doc["tf"]:
+            self.postings[term].pop(chunk_id, None)
+            if not self.postings[term]:
+                del self.postings[term]
+
+    def add(self, ids: List[str], texts: List[str], sources: List[str]):
+        """Index (or re-index) chunks"""
+        with self._lock:
+            for chunk_id, text, source in zip(ids, texts, sources):
+                if chunk_id in self.docs:
+                    self._unindex(chunk_id)
+                terms = tokenize(text)
+                self._index(chunk_id, {"source": source, "length": len(terms), "tf": dict(Counter(terms))})
+
+    def remove_source(self, source: str) -> int:
+        """Drop every chunk of one document"""
+        with self._lock:
+            ids = [chunk_id for chunk_id, doc in self.docs.items() if doc["source"] == source]
+            for chunk_id in ids:
+                self._unindex(chunk_id)
+            return len(ids)
+
+    def clear(self):
+        with self._lock:
+            self.docs.clear()
+            self.postings.clear()
+            self.total_length = 0
+
+    def search(self, query: str, n_results: int = 5, where: Optional[Dict] = None) -> List[Tuple[str, float]]:
+        """Top (chunk id, score) pairs; `where` supports Chroma-style {"source": name} filters"""
+        with self._lock:
+            if not self.docs:
+                return []
+            source = (where or {}).get("source")
+            doc_count = len(self.docs)
+            avg_length = self.total_length / doc_count
+            scores: Dict[str, float] = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, count in postings.items():
+                    doc = self.docs[chunk_id]
+                    if source and doc["source"] != source:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * doc["length"] / avg_length)
+                    scores[chunk_id] += idf * count * (self.k1 + 1) / (count + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]
+
+    def reload(self):
+        """Re-read the saved index (another process wrote it); searches meanwhile use the old one"""
+        fresh = BM25Index(self.path)
+        with self._lock:
+            self.docs, self.postings, self.total_length = fresh.docs, fresh.postings, fresh.total_length
+
+    def save(self):
+        """Write the index atomically so a crash never leaves a torn file"""
+        with self._lock:
+            payload = {"docs": self.docs}
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                payload = json.load(f)
+            for chunk_id, doc in payload.get("docs", {}).items():
+                self._index(chunk_id, doc)
+            logger.info(f"Loaded BM25 index with {len(self.docs)} chunks from {self.path}")
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Error loading BM25 index, it will be rebuilt: {str(e)}")
+            self.docs.clear()
+            self.postings.clear()
+            self.total_length = 0
@@ -1,13 +1,61 @@
 import os
-from openai import OpenAI
-import google.generativeai as genai
-from typing import List, Dict, Optional
+import asyncio
+import time
+from openai import AsyncOpenAI
+from backend.services import metrics, prompts
+from backend.services.admission import Overloaded, RateLimiter
+from backend.services.context_packer import ContextPacker, format_context_item
+from backend.services.provider_pool import ProviderPool
+from backend.services.upstream import Retrier, make_http_client, pool_stats, read_timeout
+from typing import Awaitable, Callable, List, Dict, Optional
 import logging
 import re
+from difflib import SequenceMatcher
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Async callback used to report pipeline progress: emit(event_name, data)
+EventEmitter = Callable[[str, Dict], Awaitable[None]]
+
+# fast: Grok only | single: Grok + one Gemini check | dual: Grok -> Gemini -> Grok -> Gemini
+# adaptive: dual, but stop after the first Gemini check if it made no corrections
+# parallel: Grok and Gemini draft concurrently, then one Gemini call reconciles them
+VERIFICATION_MODES = ("fast", "single", "dual", "adaptive", "parallel")
+
+VERDICT_PATTERN = re.compile(r"^\W*VEREDICTO:\s*(CONFIRMADO|CORREGIDO)\W*$", re.IGNORECASE | re.MULTILINE)
+
+
+def _field(obj, name: str):
+    """Read a usage field from an SDK object or a plain dict"""
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def _openai_usage(usage) -> Optional[Dict[str, int]]:
+    """Normalize an OpenAI-compatible usage block, including cached prompt tokens"""
+    if usage is None:
+        return None
+    return {
+        "prompt_tokens": _field(usage, "prompt_tokens") or 0,
+        "cached_tokens": _field(_field(usage, "prompt_tokens_details"), "cached_tokens") or 0,
+        "completion_tokens": _field(usage, "completion_tokens") or 0,
+    }
+
+
+def _gemini_usage(usage) -> Optional[Dict[str, int]]:
+    """Normalize Gemini usage_metadata"""
+    if usage is None:
+        return None
+    return {
+        "prompt_tokens": _field(usage, "prompt_token_count") or 0,
+        "cached_tokens": _field(usage, "cached_content_token_count") or 0,
+        "completion_tokens": _field(usage, "candidates_token_count") or 0,
+    }
+
 
 class ChatService:
     """Service for handling AI chat with Dual AI Verification
@@ -15,25 +63,34 @@ class ChatService:
     Flow:
     1. Grok 4 (xAI) generates response (Spanish -> English)
     2. Gemini verifies and synthesizes final answer (Spanish -> English)
+
+    How many passes run is set by the verification mode (VERIFICATION_MODES).
     """
 
     def __init__(self):
-        # xAI Grok API client
+        # Retries live in one place (upstream.Retrier) so they are bounded by the
+        # per-pass deadline and counted; the SDKs' built-in retries are turned off
+        self.upstream = Retrier.from_env()
+        self.provider_timeout = float(os.getenv("PROVIDER_TIMEOUT_SECONDS", "120"))
+
+        # Grok 4 providers: xAI first, OpenRouter as hedge/failover when both are set
         grok_key = os.getenv("GROK_API_KEY")
         openrouter_key = os.getenv("OPENROUTER_API_KEY")
-        self.grok_client = None
-        self.grok_model = None
-        self.grok_provider = None
+        grok_providers = []
 
         if grok_key:
-            self.grok_client = OpenAI(
-                api_key=grok_key,
-                base_url=os.getenv("GROK_API_BASE", "https://api.x.ai/v1")
-            )
-            self.grok_model = os.getenv("GROK_MODEL", "grok-4-0709")
-            self.grok_provider = "xai"
+            grok_providers.append((
+                "xai",
+                AsyncOpenAI(
+                    api_key=grok_key,
+                    base_url=os.getenv("GROK_API_BASE", "https://api.x.ai/v1"),
+                    max_retries=0,
+                    http_client=make_http_client(),
+                ),
+                os.getenv("GROK_MODEL", "grok-4-0709"),
+            ))
             logger.info("Grok 4 configured via xAI endpoint")
-        elif openrouter_key:
+        if openrouter_key:
             openrouter_base = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
             default_headers = {}
             site_url = os.getenv("OPENROUTER_SITE_URL")
@@ -43,15 +100,21 @@ class ChatService:
             if app_name:
                 default_headers["X-Title"] = app_name
 
-            self.grok_client = OpenAI(
-                api_key=openrouter_key,
-                base_url=openrouter_base,
-                default_headers=default_headers or None,
-            )
-            self.grok_model = os.getenv("OPENROUTER_MODEL", "x-ai/grok-beta")
-            self.grok_provider = "openrouter"
+            grok_providers.append((
+                "openrouter",
+                AsyncOpenAI(
+                    api_key=openrouter_key,
+                    base_url=openrouter_base,
+                    default_headers=default_headers or None,
+                    max_retries=0,
+                    http_client=make_http_client(),
+                ),
+                os.getenv("OPENROUTER_MODEL", "x-ai/grok-beta"),
+            ))
             logger.info("Grok 4 configured via OpenRouter")
-        else:
+
+        self.grok_pool = ProviderPool.from_env(grok_providers, self.upstream) if grok_providers else None
+        if not self.grok_pool:
             logger.warning("GROK_API_KEY or OPENROUTER_API_KEY not set; Grok 4 disabled")
 
         # Google Gemini API client
@@ -59,237 +122,332 @@ class ChatService:
         self.gemini_model = None
         self.gemini_model_name = None
         if gemini_key:
+            # Imported only when configured: the SDK is slow to load
+            import google.generativeai as genai
+
             genai.configure(api_key=gemini_key)
             self.gemini_model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-pro")
             self.gemini_model = genai.GenerativeModel(self.gemini_model_name)
             logger.info("Gemini configured (model: %s)", self.gemini_model_name)
         else:
             logger.warning("GEMINI_API_KEY not set")
+        self.gemini_limiter = RateLimiter.from_env("gemini")
+
+        self.context_packer = ContextPacker()
+
+        # Prompt prefixes are fixed for the life of the process (see prompts.py)
+        gemini_label = self.gemini_model_name or "2.5 Pro"
+        self.verifier_prefix = prompts.VERIFIER_PREFIX.format(model_name=gemini_label)
+        self.reconcile_prefix = prompts.RECONCILE_PREFIX.format(model_name=gemini_label)
+        self.usage_totals = {
+            provider: {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+            for provider in ("grok", "gemini")
+        }
 
         self.max_tokens = int(os.getenv("MAX_COMPLETION_TOKENS", "2500"))
         self.temperature = float(os.getenv("COMPLETION_TEMPERATURE", "0.2"))
 
+        self.verification_mode = os.getenv("VERIFICATION_MODE", "dual").lower()
+        if self.verification_mode not in VERIFICATION_MODES:
+            logger.warning("Unknown VERIFICATION_MODE %r; using dual", self.verification_mode)
+            self.verification_mode = "dual"
+        # Adaptive mode: without an explicit verdict, treat Gemini pass 1 as a
+        # confirmation when it is at least this similar to Grok pass 1
+        self.adaptive_similarity = float(os.getenv("ADAPTIVE_SIMILARITY_THRESHOLD", "0.9"))
+
+    def resolve_verification_mode(self, requested: Optional[str] = None) -> str:
+        """Pick the mode for a request; everything collapses to fast without Gemini"""
+        mode = (requested or self.verification_mode).lower()
+        if mode not in VERIFICATION_MODES:
+            raise ValueError(f"Unknown verification mode: {requested}")
+        if not self.gemini_model:
+            return "fast"
+        return mode
+
+    @staticmethod
+    def parse_verdict(text: str):
+        """Split a VEREDICTO line off a Gemini answer; returns (verdict or None, text)"""
+        match = VERDICT_PATTERN.search(text)
+        if not match:
+            return None, text
+        remaining = (text[:match.start()] + text[match.end():]).strip()
+        return match.group(1).upper(), remaining
+
+    def is_confirmed(self, verdict: Optional[str], draft: str, verified: str) -> bool:
+        """Decide whether Gemini pass 1 left the Grok draft essentially unchanged"""
+        if verdict:
+            return verdict == "CONFIRMADO"
+        similarity = SequenceMatcher(None, draft, verified).ratio()
+        logger.info("Adaptive verification: pass 1 similarity %.3f", similarity)
+        return similarity >= self.adaptive_similarity
+
     def capitalize_mentor_protege(self, text: str) -> str:
         """Ensure Mentor and Protégé are always capitalized"""
-        text = re.sub(r'\bmentor\b', 'Mentor', text, flags=re.IGNORECASE)
-        text = re.sub(r'\bmentors\b', 'Mentors', text, flags=re.IGNORECASE)
-        text = re.sub(r'\bprotege\b', 'Protégé', text, flags=re.IGNORECASE)
-        text = re.sub(r'\bproteges\b', 'Protégés', text, flags=re.IGNORECASE)
-        text = re.sub(r'\bprotégé\b', 'Protégé', text, flags=re.IGNORECASE)
-        text = re.sub(r'\bprotégés\b', 'Protégés', text, flags=re.IGNORECASE)
+        with metrics.span("postprocess"):
+            text = re.sub(r'\bmentor\b', 'Mentor', text, flags=re.IGNORECASE)
+            text = re.sub(r'\bmentors\b', 'Mentors', text, flags=re.IGNORECASE)
+            text = re.sub(r'\bprotege\b', 'Protégé', text, flags=re.IGNORECASE)
+            text = re.sub(r'\bproteges\b', 'Protégés', text, flags=re.IGNORECASE)
+            text = re.sub(r'\bprotégé\b', 'Protégé', text, flags=re.IGNORECASE)
+            text = re.sub(r'\bprotégés\b', 'Protégés', text, flags=re.IGNORECASE)
         return text
 
-    def get_bilingual_system_prompt(self, context: Optional[List[Dict]] = None, verification_pass: int = 1) -> str:
-        """Generate system prompt for bilingual Spanish/English responses
+    def get_bilingual_system_prompt(self, context: Optional[List[Dict]] = None) -> str:
+        """System prompt for bilingual Spanish/English responses
 
-        Args:
-            context: Retrieved document chunks
-            verification_pass: 1 for initial analysis, 2 for second verification pass
+        The static instructions are a constant so this prefix is byte-identical
+        across requests and passes; only the retrieved context is appended.
         """
+        context_section = self._build_context_section(context)
+        if not context_section:
+            return prompts.BILINGUAL_SYSTEM_PROMPT
+        return f"{prompts.BILINGUAL_SYSTEM_PROMPT}\n\n{context_section}"
 
-        pass_description = "análisis inicial" if verification_pass == 1 else "segunda verificación"
-
-        system_message = f"""Eres un asistente experto del Programa de Mentor-Protégé del DoD (MPP).
-**PASE DE VERIFICACIÓN: {verification_pass} de 2 ({pass_description})**
-
-**REGLAS CRÍTICAS:**
-1. SIEMPRE proporciona tu respuesta PRIMERO en ESPAÑOL, luego en INGLÉS
-2. SIEMPRE capitaliza "Mentor" y "Protégé" (M y P mayúsculas)
-3. SIEMPRE incluye CITAS TEXTUALES EXACTAS de la documentación
-4. Proporciona PÁGINA Y SECCIÓN: Página [X], Sección [X.X.X], Párrafo [X]
-5. SOLO usa información de MPP SOP, DFARS Appendix I y eLearning SOP
-
-**CAPACIDADES:**
-- Responder preguntas sobre MPP SOP, DFARS Appendix I y eLearning SOP
-- Analizar texto compartido por el usuario para verificar precisión
-- Sugerir correcciones SOLO si hay desinformación grave Y confianza >=95%
-
-**SI EL USUARIO COMPARTE TEXTO PARA ANALIZAR:**
-1. Analiza el texto palabra por palabra contra la documentación
-2. Identifica cualquier inexactitud o error
-3. VERIFICA LA PERSPECTIVA: Todo el contenido debe estar escrito desde la perspectiva de los Program Managers (Gerentes de Programa). Los Mentores y Protégés deben ser referenciados solo desde el punto de vista de cómo los Program Managers trabajan con ellos.
-4. SIEMPRE proporciona análisis completo, sin importar el nivel de confianza
-5. Si la confianza es <100%, DEBES proporcionar:
-   - Texto actual del usuario
-   - Cambios exactos necesarios (estilo seguimiento de cambios) - MANTÉN LA PERSPECTIVA DE PROGRAM MANAGER
-   - Versión 100% precisa reescrita con todas las correcciones aplicadas - ESCRITA DESDE LA PERSPECTIVA DE PROGRAM MANAGER
-
-**FORMATO DE RESPUESTA:**
-
-**ESPAÑOL:**
-**Respuesta:**
-[Tu respuesta detallada en español]
-
-**Citas Textuales de la Documentación:**
-> "[Cita exacta del documento]"
-- Fuente: [Nombre del Documento], Página [X], Sección [X.X.X] "[Título]", Párrafo [X]
-
-**Si se compartió texto para analizar:**
-**Análisis de Precisión:**
-- Estado: [Correcto / Necesita corrección]
-- Confianza: [Porcentaje]%
-- Problemas encontrados: [Lista detallada de todos los problemas]
-
-IMPORTANTE: Si el Estado es "Necesita corrección", DEBES incluir las siguientes tres secciones OBLIGATORIAS:
-
-**Declaración Actual:**
-"[Texto exacto compartido por el usuario - cópialo palabra por palabra]"
-
-**Cambios Exactos Necesarios:**
-- Cambiar "[texto incorrecto]" → "[texto correcto]"
-- Añadir: "[información faltante]"
-- Eliminar: "[información incorrecta]"
-[Lista TODOS los cambios específicos en formato seguimiento de cambios]
-
-**Versión 100% Precisa:**
-[Mantén TODO el texto original EXACTAMENTE IGUAL. Solo cambia las palabras/frases específicas que son incorrectas. Conserva la estructura, el estilo y todas las partes correctas del texto original. CRÍTICO: Asegúrate de que el texto esté escrito desde la perspectiva de Program Managers - los Mentores y Protégés deben ser referenciados solo desde el punto de vista de cómo los Program Managers trabajan con ellos. Este debe ser el texto con correcciones MÍNIMAS que el usuario puede usar directamente.]
-
-*Fuente: [Citas completas de la documentación]*
-
----
-
-**ENGLISH:**
-**Response:**
-[Your detailed response in English]
-
-**Exact Quotes from Documentation:**
-> "[Exact quote from document]"
-- Source: [Document Name], Page [X], Section [X.X.X] "[Title]", Paragraph [X]
-
-**If text was shared for analysis:**
-**Accuracy Analysis:**
-- Status: [Correct / Needs correction]
-- Confidence: [Percentage]%
-- Issues found: [Detailed list of all issues]
-
-IMPORTANT: If Status is "Needs correction", you MUST include the following three MANDATORY sections:
-
-**Current Statement:**
-"[Exact text shared by user - copy it word for word]"
-
-**Exact Changes Needed:**
-- Change "[incorrect text]" → "[correct text]"
-- Add: "[missing information]"
-- Remove: "[incorrect information]"
-[List ALL specific changes in track-changes format]
-
-**100% Accurate Version:**
-[Keep ALL original text EXACTLY THE SAME. Only change the specific words/phrases that are incorrect. Preserve the structure, style, and all correct parts of the original text. This should be the text with MINIMAL corrections that the user can use directly.]
-
-*Source: [Complete documentation citations]*
-
-**NUNCA ALUCINES - Solo usa la documentación proporcionada. Incluye CITAS TEXTUALES EXACTAS para respaldar cada afirmación.**"""
-
-        if context and len(context) > 0:
-            context_text = "\n\n".join([
-                f"[{item['source']}]\n{item['text']}"
-                for item in context
-            ])
-            system_message += f"\n\n**Contexto de Documentación:**\n{context_text}"
-
-        return system_message
-
-
-    def call_grok(
+    def build_grok_messages(
+        self,
+        user_message: str,
+        context: Optional[List[Dict]] = None,
+        verification_pass: int = 1,
+        previous_response: Optional[str] = None,
+    ) -> List[Dict]:
+        """Chat messages for a Grok pass; pass 2 extends pass 1's messages unchanged"""
+        messages = [
+            {"role": "system", "content": self.get_bilingual_system_prompt(context)},
+            {"role": "user", "content": f"{user_message}\n\n{prompts.PASS_NOTES[1]}"},
+        ]
+        if verification_pass == 2 and previous_response:
+            messages.append({"role": "assistant", "content": previous_response})
+            messages.append({"role": "user", "content": prompts.SECOND_PASS_REQUEST})
+        return messages
+
+    async def call_grok(
         self,
         user_message: str,
         context: Optional[List[Dict]] = None,
         verification_pass: int = 1,
         previous_response: Optional[str] = None,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None,
     ) -> str:
-        """Call Grok 4 to generate or refine a response."""
-        if not self.grok_client or not self.grok_model:
+        """Call Grok 4 to generate or refine a response.
+
+        When on_token is given the completion is streamed and each text delta
+        is passed to it as it arrives.
+        """
+        if not self.grok_pool:
             raise RuntimeError("Grok 4 client is not configured.")
 
-        try:
-            pass_label = "inicial" if verification_pass == 1 else "segunda"
-            provider = self.grok_provider or "unknown"
-            logger.info(
-                "Calling Grok 4 via %s (pass %s - %s)",
-                provider,
-                verification_pass,
-                pass_label,
-            )
+        with metrics.span(f"grok_pass_{verification_pass}"):
+            try:
+                pass_label = "inicial" if verification_pass == 1 else "segunda"
+                provider = self.grok_pool.describe()
+                logger.info(
+                    "Calling Grok 4 via %s (pass %s - %s)",
+                    provider,
+                    verification_pass,
+                    pass_label,
+                )
 
-            messages = [
-                {
-                    "role": "system",
-                    "content": self.get_bilingual_system_prompt(context, verification_pass),
-                },
-                {"role": "user", "content": user_message},
-            ]
-
-            if verification_pass == 2 and previous_response:
-                messages.append(
-                    {
-                        "role": "assistant",
-                        "content": (
-                            "**PASE 1 COMPLETADO (referencia interna):**\n"
-                            f"{previous_response}\n\n"
-                            "**Realiza el Pase 2 con verificación adicional.**"
-                        ),
-                    }
+                messages = self.build_grok_messages(
+                    user_message, context, verification_pass, previous_response
                 )
 
-            response = self.grok_client.chat.completions.create(
-                model=self.grok_model,
+                if on_token:
+                    content_text, usage = await self._stream_grok(messages, on_token)
+                else:
+                    response = await self.grok_pool.complete(
+                        messages=messages,
+                        max_tokens=self.max_tokens,
+                        temperature=self.temperature,
+                    )
+                    usage = response.usage
+                    content_text = response.choices[0].message.content
+                if not content_text:
+                    raise RuntimeError("Grok 4 returned an empty response.")
+
+                self._record_usage("grok", f"Grok 4 pass {verification_pass}", _openai_usage(usage))
+                logger.info("Grok 4 pass %s response received", verification_pass)
+                return content_text
+            except Overloaded:
+                raise
+            except asyncio.TimeoutError as exc:
+                raise RuntimeError(f"Grok 4 pass {verification_pass} timed out after {self.provider_timeout:g}s") from exc
+            except Exception as exc:
+                raise RuntimeError(f"Grok 4 pass {verification_pass} error: {exc}") from exc
+
+    async def _stream_grok(self, messages: List[Dict], on_token: Callable[[str], Awaitable[None]]):
+        """Stream one Grok completion through on_token; returns (text, usage)
+
+        One PROVIDER_TIMEOUT_SECONDS deadline covers opening the stream and
+        reading it. The provider's circuit breaker is told how the stream
+        ended, so failures and stalls after it opened count against it.
+        """
+        deadline = time.monotonic() + self.provider_timeout
+        stream, provider = await asyncio.wait_for(
+            self.grok_pool.open_stream(
                 messages=messages,
                 max_tokens=self.max_tokens,
                 temperature=self.temperature,
+                extra_body={"stream_options": {"include_usage": True}},
+            ),
+            timeout=self.provider_timeout,
+        )
+        ok = None
+        try:
+            result = await asyncio.wait_for(
+                self._read_grok_stream(stream, on_token), timeout=max(deadline - time.monotonic(), 0)
             )
-            content_text = response.choices[0].message.content
-            if not content_text:
-                raise RuntimeError("Grok 4 returned an empty response.")
-
-            logger.info("Grok 4 pass %s response received", verification_pass)
-            return content_text
-        except Exception as exc:
-            raise RuntimeError(f"Grok 4 pass {verification_pass} error: {exc}") from exc
-
-
-    def call_gemini_verifier(
+            ok = True
+            return result
+        except Exception:
+            ok = False
+            raise
+        finally:
+            # Left as None when the caller cancelled us: not the provider's fault
+            provider.end_stream(ok)
+
+    @staticmethod
+    async def _read_grok_stream(stream, on_token: Callable[[str], Awaitable[None]]):
+        parts = []
+        usage = None
+        async for chunk in stream:
+            # With include_usage the last chunk carries usage and no choices
+            usage = getattr(chunk, "usage", None) or usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                await on_token(delta)
+        return "".join(parts), usage
+
+    async def call_gemini_verifier(
         self,
         user_message: str,
         grok_response: str,
         context: Optional[List[Dict]] = None,
         verification_pass: int = 1,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None,
+        request_verdict: bool = False,
     ) -> str:
-        """Use Gemini to validate and refine the Grok response."""
+        """Use Gemini to validate and refine the Grok response.
+
+        When on_token is given the verified answer is streamed and each text
+        chunk is passed to it as it arrives. With request_verdict, Gemini is
+        asked to open with a VEREDICTO line (see parse_verdict).
+        """
         if not self.gemini_model:
             raise RuntimeError("Gemini verification model is not configured.")
 
-        context_block = self._build_context_section(context)
-        if context_block:
-            context_block = "\n" + context_block
+        verification_prompt = self._gemini_prompt(
+            self.verifier_prefix,
+            context,
+            user_message,
+            f"Respuesta de Grok 4 (pase {verification_pass}):\n{grok_response}",
+            prompts.VERDICT_REQUEST if request_verdict else "",
+        )
+
+        text_output = await self._call_gemini(
+            verification_prompt, f"Gemini pass {verification_pass}", on_token
+        )
+        logger.info("Gemini pass %s verification complete", verification_pass)
+        return text_output
 
-        verification_prompt = f"""Eres Gemini {self.gemini_model_name or '2.5 Pro'}. Revisa la respuesta producida por Grok 4 durante el pase {verification_pass}.
+    def _gemini_prompt(self, prefix: str, context: Optional[List[Dict]], user_message: str, *tail: str) -> str:
+        """Static prefix, then context, then the question, then per-call parts"""
+        sections = [prefix, self._build_context_section(context), f"Pregunta del usuario:\n{user_message}"]
+        sections.extend(tail)
+        return "\n\n".join(section for section in sections if section) + "\n"
 
-Pregunta del usuario:
-{user_message}
+    async def _gemini_request(self, prompt: str, stream: bool):
+        """generate_content_async() under the per-pass deadline, retried until a response starts
 
-Respuesta de Grok 4:
-{grok_response}
+        The gRPC deadline (PROVIDER_TIMEOUT_SECONDS) bounds each try,
+        including reading a stream; the SDK's own 600s retry loop is disabled.
+        """
+        request_options = {"timeout": self.provider_timeout, "retry": None}
+        return await asyncio.wait_for(
+            self.upstream.call(
+                "gemini",
+                lambda: self.gemini_model.generate_content_async(prompt, stream=stream, request_options=request_options),
+                time.monotonic() + self.provider_timeout,
+                limiter=self.gemini_limiter,
+                cost=self.gemini_limiter.cost([prompt]),
+            ),
+            timeout=self.provider_timeout,
+        )
+
+    async def _call_gemini(
+        self,
+        prompt: str,
+        label: str,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> str:
+        """Send one prompt to Gemini, streaming it through on_token when given"""
+        with metrics.span(label.lower().replace(" ", "_")):
+            try:
+                if on_token:
+                    response = await self._gemini_request(prompt, stream=True)
+                    parts = []
+                    usage = None
+                    async for chunk in response:
+                        usage = getattr(chunk, "usage_metadata", None) or usage
+                        delta = getattr(chunk, "text", "")
+                        if delta:
+                            parts.append(delta)
+                            await on_token(delta)
+                    text_output = "".join(parts)
+                else:
+                    response = await self._gemini_request(prompt, stream=False)
+                    usage = getattr(response, "usage_metadata", None)
+                    text_output = getattr(response, "text", "")
+            except Overloaded:
+                raise
+            except Exception as exc:
+                raise RuntimeError(f"{label} error: {exc}") from exc
+
+            if not text_output:
+                raise RuntimeError(f"{label} returned an empty response.")
+            self._record_usage("gemini", label, _gemini_usage(usage))
+        return text_output
 
-Instrucciones:
-1. Confirma citas, páginas y secciones. Corrige cualquier inconsistencia.
-2. Mantén el formato bilingüe (español primero, inglés después) con citas textuales exactas.
-3. Si se analizó texto del usuario, indica estado, confianza y sugiere correcciones solo con evidencia >=95%.
-4. Asegúrate de que "Mentor" y "Protégé" estén capitalizados.
-5. Si falta evidencia documental, decláralo explícitamente.
-{context_block}
-Devuelve la respuesta final verificada en ambos idiomas siguiendo el formato solicitado (español primero, inglés después).
-"""
+    async def call_gemini_draft(
+        self,
+        user_message: str,
+        context: Optional[List[Dict]] = None,
+    ) -> str:
+        """Have Gemini answer independently from the same prompt Grok gets."""
+        if not self.gemini_model:
+            raise RuntimeError("Gemini verification model is not configured.")
 
-        try:
-            response = self.gemini_model.generate_content(verification_prompt)
-            text_output = getattr(response, "text", "")
-        except Exception as exc:
-            raise RuntimeError(f"Gemini pass {verification_pass} error: {exc}") from exc
+        logger.info("Calling Gemini for an independent draft")
+        draft_prompt = "\n\n".join(
+            message["content"] for message in self.build_grok_messages(user_message, context)
+        )
+        text_output = await self._call_gemini(draft_prompt, "Gemini draft")
+        logger.info("Gemini draft received")
+        return text_output
 
-        if not text_output:
-            raise RuntimeError("Gemini returned an empty response.")
+    async def call_reconciler(
+        self,
+        user_message: str,
+        grok_draft: str,
+        gemini_draft: str,
+        context: Optional[List[Dict]] = None,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> str:
+        """Use Gemini to merge two independent drafts and flag disagreements."""
+        if not self.gemini_model:
+            raise RuntimeError("Gemini verification model is not configured.")
 
-        logger.info("Gemini pass %s verification complete", verification_pass)
+        reconcile_prompt = self._gemini_prompt(
+            self.reconcile_prefix,
+            context,
+            user_message,
+            f"Borrador A (Grok 4):\n{grok_draft}",
+            f"Borrador B (Gemini):\n{gemini_draft}",
+        )
+        text_output = await self._call_gemini(reconcile_prompt, "Gemini reconcile", on_token)
+        logger.info("Gemini reconcile pass complete")
         return text_output
 
     def _build_context_section(self, context: Optional[List[Dict]] = None) -> str:
@@ -297,52 +455,145 @@ Devuelve la respuesta final verificada en ambos idiomas siguiendo el formato sol
         if not context or len(context) == 0:
             return ""
 
-        context_text = "\n\n".join([
-            f"[{item['source']}]\n{item['text']}"
-            for item in context
-        ])
+        context_text = "\n\n".join(format_context_item(item) for item in context)
         return f"**Contexto de Documentación:**\n{context_text}"
 
-    def generate_response(self, user_message: str, context: Optional[List[Dict]] = None) -> str:
-        """Generate a response using Grok 4 and optional Gemini verification."""
-        if not self.grok_client:
+    async def aclose(self):
+        """Close the pooled upstream HTTP clients"""
+        if self.grok_pool:
+            await self.grok_pool.aclose()
+
+    def upstream_stats(self) -> Dict:
+        """Retry counters per upstream, connection pool use per Grok provider, rate limiters and timeouts"""
+        grok_providers = self.grok_pool.providers if self.grok_pool else []
+        return {
+            "retries": self.upstream.stats(),
+            "rate_limits": {
+                **{provider.name: provider.limiter.stats() for provider in grok_providers},
+                "gemini": self.gemini_limiter.stats(),
+            },
+            "http_pools": {
+                provider.name: pool_stats(getattr(provider.client, "_client", None))
+                for provider in grok_providers
+            },
+            "timeouts": {"read_seconds": read_timeout(), "pass_seconds": self.provider_timeout},
+            "max_retries": self.upstream.max_retries,
+        }
+
+    def _record_usage(self, provider: str, label: str, usage: Optional[Dict[str, int]]):
+        """Log one call's token usage and add it to the running totals"""
+        totals = self.usage_totals[provider]
+        totals["calls"] += 1
+        metrics.record_tokens(provider, usage)
+        if not usage:
+            return
+        for key, value in usage.items():
+            totals[key] += value
+        logger.info(
+            "%s usage: prompt=%s (cached=%s) completion=%s",
+            label,
+            usage["prompt_tokens"],
+            usage["cached_tokens"],
+            usage["completion_tokens"],
+        )
+
+    async def generate_response(
+        self,
+        user_message: str,
+        context: Optional[List[Dict]] = None,
+        emit: Optional[EventEmitter] = None,
+        verification_mode: Optional[str] = None,
+    ) -> str:
+        """Generate a response using Grok 4 and optional Gemini verification.
+
+        If emit is given, a "status" event is sent before each pass and the
+        final pass is streamed as "token" events.
+        """
+        if not self.grok_pool:
             return (
                 "Error: No generative model configured. Set GROK_API_KEY (xAI) or "
                 "OPENROUTER_API_KEY in the .env file."
             )
 
+        async def status(stage: str, verification_pass: int):
+            if emit:
+                await emit("status", {"stage": stage, "pass": verification_pass})
+
+        async def on_token(delta: str):
+            await emit("token", {"text": delta})
+
+        final_stream = on_token if emit else None
+
         try:
+            mode = self.resolve_verification_mode(verification_mode)
+
             logger.info("=" * 80)
             logger.info("MPP Dual-Pass Pipeline")
-            logger.info("Provider: Grok 4 via %s", self.grok_provider or "unconfigured")
+            logger.info("Provider: Grok 4 via %s", self.grok_pool.describe())
             if self.gemini_model:
-                logger.info("Verifier: Gemini %s (dual pass)", self.gemini_model_name or "2.5 Pro")
+                logger.info("Verifier: Gemini %s (%s)", self.gemini_model_name or "2.5 Pro", mode)
             else:
                 logger.info("Verifier: Gemini (disabled)")
             logger.info("=" * 80)
 
-            grok_pass1 = self.call_grok(user_message, context, verification_pass=1)
+            grok_context, gemini_context = await self._pack_context(context, emit)
+
+            if mode == "parallel":
+                return await self._generate_parallel(
+                    user_message, grok_context, gemini_context, emit, final_stream
+                )
+
+            await status("grok", 1)
+            grok_pass1 = await self.call_grok(
+                user_message,
+                grok_context,
+                verification_pass=1,
+                on_token=final_stream if mode == "fast" else None,
+            )
 
-            if not self.gemini_model:
-                logger.info("Returning Grok-only response (Gemini not configured).")
+            if mode == "fast":
+                if not self.gemini_model:
+                    logger.info("Returning Grok-only response (Gemini not configured).")
                 return self.capitalize_mentor_protege(grok_pass1)
 
-            gemini_pass1 = self.call_gemini_verifier(
-                user_message, grok_pass1, context, verification_pass=1
+            await status("gemini", 1)
+            gemini_pass1 = await self.call_gemini_verifier(
+                user_message,
+                grok_pass1,
+                gemini_context,
+                verification_pass=1,
+                on_token=final_stream if mode == "single" else None,
+                request_verdict=mode == "adaptive",
             )
-            grok_pass2 = self.call_grok(
+
+            if mode == "single":
+                logger.info("Single-pass verification complete.")
+                return self.capitalize_mentor_protege(gemini_pass1)
+
+            if mode == "adaptive":
+                verdict, gemini_pass1 = self.parse_verdict(gemini_pass1)
+                if self.is_confirmed(verdict, grok_pass1, gemini_pass1):
+                    logger.info("Adaptive verification: pass 1 confirmed, skipping pass 2.")
+                    return self.capitalize_mentor_protege(gemini_pass1)
+
+            await status("grok", 2)
+            grok_pass2 = await self.call_grok(
                 user_message,
-                context,
+                grok_context,
                 verification_pass=2,
                 previous_response=gemini_pass1,
             )
-            final_response = self.call_gemini_verifier(
-                user_message, grok_pass2, context, verification_pass=2
+            await status("gemini", 2)
+            final_response = await self.call_gemini_verifier(
+                user_message, grok_pass2, gemini_context, verification_pass=2, on_token=final_stream
             )
 
             logger.info("Dual-pass verification complete.")
             return self.capitalize_mentor_protege(final_response)
 
+        except Overloaded:
+            # The route answers these with 429/503 and Retry-After
+            raise
         except RuntimeError as exc:
             logger.error("Verification pipeline failed: %s", exc)
             return f"Error generating response: {exc}"
@@ -350,3 +601,64 @@ Devuelve la respuesta final verificada en ambos idiomas siguiendo el formato sol
             logger.exception("Unexpected error in verification pipeline")
             return f"Error generating response: {exc}"
 
+    async def _pack_context(self, context: Optional[List[Dict]], emit: Optional[EventEmitter]):
+        """De-duplicate retrieved chunks and fit them to each model's token budget"""
+        if not context:
+            return context, context
+
+        with metrics.span("pack_context"):
+            grok_pack = self.context_packer.pack(context, "grok")
+            if self.context_packer.budgets["gemini"] == self.context_packer.budgets["grok"]:
+                gemini_pack = grok_pack
+            else:
+                gemini_pack = self.context_packer.pack(context, "gemini")
+
+        logger.info(
+            "Context packed: %s -> %s tokens for Grok, %s -> %s for Gemini "
+            "(%s de-duplicated; %s + %s dropped over budget)",
+            grok_pack["tokens_before"],
+            grok_pack["tokens_after"],
+            gemini_pack["tokens_before"],
+            gemini_pack["tokens_after"],
+            grok_pack["deduped_tokens"],
+            grok_pack["dropped_tokens"],
+            gemini_pack["dropped_tokens"],
+        )
+        if emit:
+            await emit("context", {
+                model: {key: value for key, value in pack.items() if key != "context"}
+                for model, pack in (("grok", grok_pack), ("gemini", gemini_pack))
+            })
+        return grok_pack["context"], gemini_pack["context"]
+
+    async def _generate_parallel(
+        self,
+        user_message: str,
+        grok_context: Optional[List[Dict]],
+        gemini_context: Optional[List[Dict]],
+        emit: Optional[EventEmitter],
+        final_stream: Optional[Callable[[str], Awaitable[None]]],
+    ) -> str:
+        """Draft with Grok and Gemini concurrently, then reconcile: two calls on the critical path"""
+        if emit:
+            await emit("status", {"stage": "grok", "pass": 1})
+            await emit("status", {"stage": "gemini", "pass": 1})
+
+        grok_task = asyncio.create_task(self.call_grok(user_message, grok_context, verification_pass=1))
+        gemini_task = asyncio.create_task(self.call_gemini_draft(user_message, gemini_context))
+        try:
+            grok_draft, gemini_draft = await asyncio.gather(grok_task, gemini_task)
+        except BaseException:
+            # Don't leave the surviving draft running (and billing) in the background
+            grok_task.cancel()
+            gemini_task.cancel()
+            raise
+
+        if emit:
+            await emit("status", {"stage": "reconcile", "pass": 2})
+        final_response = await self.call_reconciler(
+            user_message, grok_draft, gemini_draft, gemini_context, on_token=final_stream
+        )
+
+        logger.info("Parallel draft + reconcile complete.")
+        return self.capitalize_mentor_protege(final_response)
@@ -0,0 +1,253 @@
+import os
+import re
+from typing import Dict, List, Optional
+import logging
+
+from backend.services.tokens import TokenCounter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Chunk metadata describing where the text sits in its document
+LOCATION_KEYS = ("page", "section", "section_title", "paragraph", "start_char", "end_char")
+
+# Inserted by DocumentProcessor.extract_pdf before each page's text
+PAGE_MARKER = re.compile(r"\n\[Page (\d+)\]\n")
+# Optional outline marker ("1.", "a.", "iv.") then a dotted section number ("3.2.1.")
+# or a DFARS-style appendix number ("I-110.1")
+SECTION_PATTERN = re.compile(
+    r"^\s*(?:(?:\d{1,3}|[a-z]|[ivx]{1,5})\.\s+)?(?P<number>\d+(?:\.\d+)+|[A-Z]-\d+(?:\.\d+)*)\.?\s+(?P<rest>\S.*)$"
+)
+# Chapter headings, also found in running page headers
+CHAPTER_PATTERN = re.compile(r"\bCHAPTER\s+(?P<number>\d+)\s*[–-]\s*(?P<title>\S.*?)\s*$")
+# "(a)", "(1)", "a.", "iv.", "12." at the start of a line
+LIST_MARKER = re.compile(r"^\s*(?:\([a-z0-9]{1,4}\)|(?:\d{1,3}|[a-z]|[ivx]{1,5})\.)\s")
+# Table of contents entries
+DOT_LEADER = re.compile(r"\.{4,}")
+SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+
+
+def _clean(text: str) -> str:
+    return " ".join(text.split()).rstrip(".:")
+
+
+class StructuredChunker:
+    """Split extracted document text into structure-aware, token-bounded chunks
+
+    Text is first cut into paragraphs (PDF lines are re-joined into
+    paragraphs at list markers, section numbers and sentence ends; DOCX
+    text already has one paragraph per line). Paragraphs are then packed
+    into chunks of at most CHUNK_TOKENS tokens. A chunk never spans two
+    pages and a new one is started at each heading once the current chunk
+    has CHUNK_MIN_TOKENS. Every chunk records its page, section number,
+    section title, first paragraph index and character offsets.
+    """
+
+    VERSION = "structured-v1"
+
+    def __init__(self, tokens: Optional[TokenCounter] = None):
+        self.max_tokens = int(os.getenv("CHUNK_TOKENS", "250"))
+        self.min_tokens = int(os.getenv("CHUNK_MIN_TOKENS", "50"))
+        self.tokens = tokens or TokenCounter(os.getenv("CONTEXT_TOKEN_ENCODING", "cl100k_base"))
+
+    @property
+    def settings(self) -> Dict:
+        return {"chunker": self.VERSION, "chunk_tokens": self.max_tokens, "chunk_min_tokens": self.min_tokens}
+
+    def chunk(self, text: str) -> List[Dict]:
+        """Return chunks as dicts with "text" plus the LOCATION_KEYS metadata"""
+        paragraphs = self.paragraphs(text)
+        chunks: List[Dict] = []
+        current: List[Dict] = []
+        used = 0
+
+        for paragraph in paragraphs:
+            for piece in self._fit(text, paragraph):
+                starts_new = current and (
+                    piece["page"] != current[0]["page"]
+                    or (piece["heading"] and used >= self.min_tokens)
+                    or used + piece["tokens"] > self.max_tokens
+                )
+                if starts_new:
+                    chunks.append(self._build(text, current))
+                    current, used = [], 0
+                current.append(piece)
+                used += piece["tokens"]
+        if current:
+            chunks.append(self._build(text, current))
+        return chunks
+
+    def paragraphs(self, text: str) -> List[Dict]:
+        """Paragraph spans with the page and section in force where each starts"""
+        state = {"section": "", "section_title": "", "chapter": None, "titles": {}}
+        markers = list(PAGE_MARKER.finditer(text))
+        if not markers:
+            return self._page_paragraphs(text, 0, len(text), None, state, one_per_line=True)
+
+        paragraphs = []
+        for i, marker in enumerate(markers):
+            end = markers[i + 1].start() if i + 1 < len(markers) else len(text)
+            paragraphs.extend(
+                self._page_paragraphs(text, marker.end(), end, int(marker.group(1)), state, one_per_line=False)
+            )
+        return paragraphs
+
+    def _classify(self, line: str, next_line: str, state: Dict, one_per_line: bool) -> Optional[str]:
+        """Update the section state for a structural line
+
+        Returns "heading", "numbered", "running_header" or None.
+        """
+        if DOT_LEADER.search(line):
+            return None
+
+        chapter = CHAPTER_PATTERN.search(line)
+        if chapter:
+            number = chapter.group("number")
+            # Running headers repeat the chapter on every page; only a new one resets the section
+            if number == state["chapter"]:
+                return "running_header"
+            state["titles"][number] = _clean(chapter.group("title"))
+            state.update(chapter=number, section=number, section_title=state["titles"][number])
+            return "heading"
+
+        match = SECTION_PATTERN.match(line)
+        if match:
+            number, rest = match.group("number"), match.group("rest").strip()
+            words = len(rest.split())
+            state["section"] = number
+            # Headings are short, shallow and stand alone; anything else opens a numbered paragraph
+            if (
+                number.count(".") <= 2
+                and len(rest) <= 60
+                and words <= 8
+                and (not rest.endswith(".") or words <= 6)
+                and not rest.endswith(",")
+                and not self._continues(next_line)
+            ):
+                state["titles"][number] = _clean(rest)
+                state["section_title"] = state["titles"][number]
+                return "heading"
+            # Title of the closest enclosing heading ("3.2" for "3.2.6.1")
+            parent = number
+            while parent not in state["titles"] and "." in parent:
+                parent = parent.rsplit(".", 1)[0]
+            state["section_title"] = state["titles"].get(parent, "")
+            return "numbered"
+
+        stripped = line.strip()
+        if (
+            one_per_line
+            and len(stripped.split()) <= 8
+            and stripped[:1].isupper()
+            and stripped[-1:] not in ".:;,?!"
+            and not stripped.isupper()
+            and not LIST_MARKER.match(line)
+        ):
+            state.update(section="", section_title=_clean(stripped))
+            return "heading"
+        return None
+
+    @staticmethod
+    def _continues(line: str) -> bool:
+        """Whether a line reads as the wrapped tail of the previous one"""
+        return line.lstrip()[:1].islower() and not LIST_MARKER.match(line)
+
+    def _page_paragraphs(
+        self, text: str, start: int, end: int, page: Optional[int], state: Dict, one_per_line: bool
+    ) -> List[Dict]:
+        paragraphs = []
+        current = None
+        previous_line = ""
+
+        lines = text[start:end].split("\n")
+        position = start
+        for index, line in enumerate(lines):
+            line_start, line_end = position, position + len(line)
+            position = line_end + 1
+            if not line.strip():
+                current, previous_line = None, ""
+                continue
+
+            next_line = lines[index + 1] if index + 1 < len(lines) else ""
+            kind = self._classify(line, next_line, state, one_per_line)
+            starts_paragraph = (
+                current is None
+                or one_per_line
+                or kind is not None
+                or LIST_MARKER.match(line)
+                or (previous_line.rstrip()[-1:] in ".;:!?" and line.lstrip()[:1].isupper())
+            )
+            if starts_paragraph:
+                current = {
+                    "start": line_start,
+                    "end": line_end,
+                    "page": page,
+                    "paragraph": len(paragraphs) + 1,
+                    "section": state["section"],
+                    "section_title": state["section_title"],
+                    "heading": kind == "heading",
+                    "running_header": kind == "running_header",
+                }
+                paragraphs.append(current)
+            else:
+                current["end"] = line_end
+            previous_line = line
+        return paragraphs
+
+    def _fit(self, text: str, paragraph: Dict) -> List[Dict]:
+        """Split a paragraph that exceeds the chunk size at sentence, then word, boundaries"""
+        body = text[paragraph["start"]:paragraph["end"]]
+        tokens = self.tokens.count(body)
+        if tokens <= self.max_tokens:
+            return [{**paragraph, "tokens": tokens}]
+
+        units = []
+        offset = 0
+        for sentence in SENTENCE_END.split(body):
+            position = body.index(sentence, offset)
+            offset = position + len(sentence)
+            if self.tokens.count(sentence) <= self.max_tokens:
+                units.append((position, offset))
+            else:
+                units.extend(
+                    (position + word.start(), position + word.end())
+                    for word in re.finditer(r"\S+", sentence)
+                )
+
+        pieces = []
+        piece_start, piece_end, used = None, None, 0
+        for unit_start, unit_end in units:
+            unit_tokens = self.tokens.count(body[unit_start:unit_end]) + 1
+            if piece_start is not None and used + unit_tokens > self.max_tokens:
+                pieces.append((piece_start, piece_end, used))
+                piece_start, used = None, 0
+            if piece_start is None:
+                piece_start = unit_start
+            piece_end = unit_end
+            used += unit_tokens
+        pieces.append((piece_start, piece_end, used))
+
+        base = paragraph["start"]
+        return [
+            {**paragraph, "start": base + s, "end": base + e, "tokens": used, "heading": paragraph["heading"] and i == 0}
+            for i, (s, e, used) in enumerate(pieces)
+        ]
+
+    def _build(self, text: str, pieces: List[Dict]) -> Dict:
+        first = pieces[0]
+        raw = text[first["start"]:pieces[-1]["end"]]
+        # Cite the first real paragraph, not a repeated page header
+        located = next((piece for piece in pieces if not piece["running_header"]), first)
+        start = first["start"] + len(raw) - len(raw.lstrip())
+        end = first["start"] + len(raw.rstrip())
+        chunk = {
+            "text": text[start:end],
+            "section": located["section"],
+            "section_title": located["section_title"],
+            "paragraph": located["paragraph"],
+            "start_char": start,
+            "end_char": end,
+        }
+        if first["page"] is not None:
+            chunk["page"] = first["page"]
+        return chunk
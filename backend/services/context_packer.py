@@ -0,0 +1,165 @@
+import os
+from typing import Dict, List, Optional
+import logging
+
+from backend.services.chunker import LOCATION_KEYS
+from backend.services.tokens import TokenCounter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Shortest shared run of characters treated as a real chunk overlap
+MIN_OVERLAP_CHARS = 32
+# Don't bother squeezing in a truncated span shorter than this
+MIN_SPAN_TOKENS = 64
+
+
+def format_context_item(item: Dict) -> str:
+    """Render one context entry as the prompts show it: a location header, then the text"""
+    label = [item["source"]]
+    if item.get("page"):
+        label.append(f"p. {item['page']}")
+    section = " ".join(part for part in (item.get("section"), item.get("section_title")) if part)
+    if section:
+        label.append(f"§ {section}")
+    if item.get("paragraph"):
+        label.append(f"¶ {item['paragraph']}")
+    return f"[{' | '.join(label)}]\n{item['text']}"
+
+
+class ContextPacker:
+    """Fit retrieved chunks into a per-model prompt token budget
+
+    Chunks from the same source that overlap (collections built with the
+    old sliding-window chunker) are stitched into one span, spans whose text is already contained
+    in another span are dropped, and the rest are added in relevance order
+    until the model's budget is used up.
+    """
+
+    def __init__(self):
+        self.encoding_name = os.getenv("CONTEXT_TOKEN_ENCODING", "cl100k_base")
+        self.default_budget = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+        self.budgets = {
+            "grok": int(os.getenv("CONTEXT_TOKEN_BUDGET_GROK", self.default_budget)),
+            "gemini": int(os.getenv("CONTEXT_TOKEN_BUDGET_GEMINI", self.default_budget)),
+        }
+        self.tokens = TokenCounter(self.encoding_name)
+
+    def count_tokens(self, text: str) -> int:
+        return self.tokens.count(text)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        return self.tokens.truncate(text, max_tokens)
+
+    @staticmethod
+    def _format(item: Dict) -> str:
+        return format_context_item(item)
+
+    @staticmethod
+    def overlap_length(left: str, right: str) -> int:
+        """Length of the longest suffix of left that is a prefix of right"""
+        if len(left) < MIN_OVERLAP_CHARS or len(right) < MIN_OVERLAP_CHARS:
+            return 0
+        probe = right[:MIN_OVERLAP_CHARS]
+        start = max(0, len(left) - len(right))
+        position = left.find(probe, start)
+        while position != -1:
+            if right.startswith(left[position:]):
+                return len(left) - position
+            position = left.find(probe, position + 1)
+        return 0
+
+    def merge_spans(self, sources: List[Dict]) -> List[Dict]:
+        """Stitch overlapping chunks of the same source and drop contained spans"""
+        by_source: Dict[str, List] = {}
+        for rank, item in enumerate(sources):
+            by_source.setdefault(item.get("source", "unknown"), []).append((rank, item))
+
+        spans = []
+        for source, ranked in by_source.items():
+            ranked.sort(key=lambda pair: (pair[1].get("chunk", 0), pair[0]))
+            current = None
+            for rank, item in ranked:
+                text = item.get("text", "")
+                if current is not None:
+                    overlap = self.overlap_length(current["text"], text)
+                    if overlap:
+                        current["text"] += text[overlap:]
+                        current["rank"] = min(current["rank"], rank)
+                        current["chunks"].append(item.get("chunk", 0))
+                        continue
+                    if text in current["text"]:
+                        current["rank"] = min(current["rank"], rank)
+                        continue
+                current = {
+                    **{key: item[key] for key in LOCATION_KEYS if key in item},
+                    "source": source,
+                    "chunk": item.get("chunk", 0),
+                    "chunks": [item.get("chunk", 0)],
+                    "text": text,
+                    "rank": rank,
+                }
+                spans.append(current)
+
+        # Longest first, so a span is only compared against ones that could contain it
+        spans.sort(key=lambda span: len(span["text"]), reverse=True)
+        kept = []
+        for span in spans:
+            container = next((other for other in kept if span["text"] in other["text"]), None)
+            if container:
+                container["rank"] = min(container["rank"], span["rank"])
+            else:
+                kept.append(span)
+
+        kept.sort(key=lambda span: span["rank"])
+        return kept
+
+    def fit(self, span: Dict, max_tokens: int) -> Optional[Dict]:
+        """The span with its text cut so the formatted span is at most max_tokens, or None
+
+        Decoding a cut token list can re-tokenize differently at the seam,
+        so the result is counted again and trimmed until it fits.
+        """
+        limit = max_tokens - self.count_tokens(self._format({**span, "text": ""}))
+        while limit > 0:
+            fitted = {**span, "text": self.truncate(span["text"], limit)}
+            tokens = self.count_tokens(self._format(fitted))
+            if tokens <= max_tokens:
+                return fitted
+            limit -= tokens - max_tokens
+        return None
+
+    def pack(self, sources: Optional[List[Dict]], model: str = "grok") -> Dict:
+        """Return {"context", "tokens_before", "tokens_after", "deduped_tokens", "dropped_tokens"} for one model
+
+        deduped_tokens were removed by stitching overlaps and dropping
+        contained spans; dropped_tokens were left out to fit the budget.
+        """
+        if not sources:
+            return {"context": sources, "tokens_before": 0, "tokens_after": 0, "deduped_tokens": 0, "dropped_tokens": 0}
+
+        budget = self.budgets.get(model, self.default_budget)
+        tokens_before = sum(self.count_tokens(self._format(item)) for item in sources)
+
+        packed = []
+        used = 0
+        merged_tokens = 0
+        for span in self.merge_spans(sources):
+            tokens = self.count_tokens(self._format(span))
+            merged_tokens += tokens
+            remaining = budget - used
+            if tokens > remaining:
+                span = self.fit(span, remaining) if remaining >= MIN_SPAN_TOKENS else None
+                if span is None:
+                    continue
+                tokens = self.count_tokens(self._format(span))
+            packed.append(span)
+            used += tokens
+
+        return {
+            "context": packed,
+            "tokens_before": tokens_before,
+            "tokens_after": used,
+            "deduped_tokens": max(tokens_before - merged_tokens, 0),
+            "dropped_tokens": merged_tokens - used,
+        }
@@ -1,30 +1,47 @@
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 import pypdf
 from docx import Document
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional, Tuple
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx')
+
 
 class DocumentProcessor:
     """Process PDFs and DOCX files for the MPP knowledge base"""
 
+    @staticmethod
+    def iter_pdf_pages(file_path: str, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        """Yield (page_number, text) for pages [start, stop), one page at a time"""
+        with open(file_path, 'rb') as file:
+            pdf_reader = pypdf.PdfReader(file)
+            page_count = len(pdf_reader.pages)
+            for index in range(start, page_count if stop is None else min(stop, page_count)):
+                yield index + 1, pdf_reader.pages[index].extract_text() or ""
+
+    @staticmethod
+    def format_page(page_num: int, page_text: str) -> str:
+        return f"\n[Page {page_num}]\n{page_text}"
+
     @staticmethod
     def extract_pdf(file_path: str) -> str:
         """Extract text from PDF with page tracking"""
-        text = ""
+        pages = []
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = pypdf.PdfReader(file)
-                for page_num, page in enumerate(pdf_reader.pages, start=1):
-                    page_text = page.extract_text()
-                    text += f"\n[Page {page_num}]\n{page_text}"
-            logger.info(f"Extracted {len(pdf_reader.pages)} pages from PDF: {os.path.basename(file_path)}")
+            pages = [
+                DocumentProcessor.format_page(page_num, page_text)
+                for page_num, page_text in DocumentProcessor.iter_pdf_pages(file_path)
+            ]
+            logger.info(f"Extracted {len(pages)} pages from PDF: {os.path.basename(file_path)}")
         except Exception as e:
             logger.error(f"Error extracting PDF {file_path}: {str(e)}")
-        return text
+        return "".join(pages)
 
     @staticmethod
     def extract_docx(file_path: str) -> str:
@@ -40,37 +57,106 @@ class DocumentProcessor:
         return text
 
     @staticmethod
-    def process_all_documents(documents_dir: str) -> List[Dict]:
-        """Process all documents in the directory"""
-        processed = []
+    def is_supported(filename: str) -> bool:
+        return filename.endswith(SUPPORTED_EXTENSIONS)
+
+    @staticmethod
+    def extract(file_path: str) -> str:
+        """Extract text from one PDF or DOCX file; empty string on failure"""
+        try:
+            if file_path.endswith('.pdf'):
+                return DocumentProcessor.extract_pdf(file_path)
+            if file_path.endswith('.docx'):
+                return DocumentProcessor.extract_docx(file_path)
+        except Exception as e:
+            logger.error(f"✗ Error processing {os.path.basename(file_path)}: {str(e)}")
+        return ""
+
+    @staticmethod
+    def _iter_tasks(file_paths: List[str], pages_per_task: int) -> Iterator[Tuple[str, int, Optional[int], bool]]:
+        """Split files into (path, start_page, stop_page, is_last_task_of_file) work items"""
+        for file_path in file_paths:
+            page_count = None
+            if file_path.endswith('.pdf'):
+                try:
+                    with open(file_path, 'rb') as file:
+                        page_count = len(pypdf.PdfReader(file).pages)
+                except Exception as e:
+                    # Let the worker hit (and report) the same error
+                    logger.error(f"Error reading PDF {file_path}: {str(e)}")
+            if not page_count:
+                yield file_path, 0, None, True
+                continue
+            for start in range(0, page_count, pages_per_task):
+                stop = min(start + pages_per_task, page_count)
+                yield file_path, start, stop, stop == page_count
+
+    @staticmethod
+    def iter_documents(file_paths: List[str], workers: Optional[int] = None) -> Iterator[Dict]:
+        """Yield {"filename", "text"} per file, in order, as soon as each is extracted
+
+        With more than one worker, PDFs are split into page ranges that are
+        extracted across a process pool. At most two tasks per worker are in
+        flight, so memory stays bounded however many files are queued, and
+        the caller can embed one file while the next ones are being parsed.
+        A file whose extraction fails is yielded with empty text.
+        """
+        if workers is None:
+            workers = int(os.getenv("EXTRACT_WORKERS") or os.cpu_count() or 1)
+        if workers <= 1:
+            for file_path in file_paths:
+                yield {"filename": os.path.basename(file_path), "text": DocumentProcessor.extract(file_path)}
+            return
+
+        pages_per_task = int(os.getenv("EXTRACT_PAGES_PER_TASK", "16"))
+        tasks = DocumentProcessor._iter_tasks(file_paths, pages_per_task)
+        pending = deque()
+        parts, failed = [], False
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for task in islice(tasks, workers * 2):
+                pending.append((task, pool.submit(_extract_task, *task[:3])))
+
+            while pending:
+                (file_path, _, _, is_last), future = pending.popleft()
+                next_task = next(tasks, None)
+                if next_task:
+                    pending.append((next_task, pool.submit(_extract_task, *next_task[:3])))
+
+                try:
+                    parts.extend(future.result())
+                except Exception as e:
+                    failed = True
+                    logger.error(f"✗ Error processing {os.path.basename(file_path)}: {str(e)}")
 
+                if is_last:
+                    text = "" if failed else "".join(parts)
+                    logger.info(f"✓ Processed {os.path.basename(file_path)} ({len(text)} chars)")
+                    yield {"filename": os.path.basename(file_path), "text": text}
+                    parts, failed = [], False
+
+    @staticmethod
+    def process_all_documents(documents_dir: str, workers: Optional[int] = None) -> List[Dict]:
+        """Process all documents in the directory"""
         if not os.path.exists(documents_dir):
             logger.error(f"Documents directory not found: {documents_dir}")
-            return processed
+            return []
 
         files = os.listdir(documents_dir)
         logger.info(f"Found {len(files)} files in {documents_dir}")
 
-        for filename in files:
-            file_path = os.path.join(documents_dir, filename)
-
-            if not os.path.isfile(file_path):
-                continue
-
-            try:
-                if filename.endswith('.pdf'):
-                    text = DocumentProcessor.extract_pdf(file_path)
-                    if text:
-                        processed.append({"filename": filename, "text": text})
-                        logger.info(f"✓ Processed PDF: {filename} ({len(text)} chars)")
-
-                elif filename.endswith('.docx'):
-                    text = DocumentProcessor.extract_docx(file_path)
-                    if text:
-                        processed.append({"filename": filename, "text": text})
-                        logger.info(f"✓ Processed DOCX: {filename} ({len(text)} chars)")
+        file_paths = [
+            os.path.join(documents_dir, filename)
+            for filename in files
+            if os.path.isfile(os.path.join(documents_dir, filename)) and DocumentProcessor.is_supported(filename)
+        ]
+        return [doc for doc in DocumentProcessor.iter_documents(file_paths, workers) if doc["text"]]
 
-            except Exception as e:
-                logger.error(f"✗ Error processing {filename}: {str(e)}")
 
-        return processed
+def _extract_task(file_path: str, start: int, stop: Optional[int]) -> List[str]:
+    """Process-pool worker: formatted page texts for one page range (or a whole DOCX)"""
+    if file_path.endswith('.pdf'):
+        return [
+            DocumentProcessor.format_page(page_num, page_text)
+            for page_num, page_text in DocumentProcessor.iter_pdf_pages(file_path, start, stop)
+        ]
+    return [DocumentProcessor.extract_docx(file_path)]
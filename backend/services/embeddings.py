@@ -0,0 +1,187 @@
+import os
+import json
+from typing import Dict, List, Optional, Union
+import numpy as np
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ("torch", "onnx")
+ONNX_CONFIG_FILE = "embedding_config.json"
+ONNX_INPUTS = ("input_ids", "attention_mask", "token_type_ids")
+
+# Used by the parity check when there are no stored chunks to compare against
+SAMPLE_TEXTS = [
+    "What are the eligibility requirements for a protégé firm?",
+    "¿Cuáles son los requisitos de elegibilidad para una empresa protegida?",
+    "The mentor must submit a semiannual report to the Office of Small Business Programs.",
+    "DFARS 232.7003 describes the procedures for invoice submission.",
+    "Developmental assistance agreement",
+    "El mentor debe presentar un informe semestral.",
+]
+
+
+def default_onnx_dir(model_name: str) -> str:
+    """./models/<model>-onnx, e.g. ./models/all-MiniLM-L6-v2-onnx"""
+    return os.path.join("models", f"{model_name.rstrip('/').split('/')[-1]}-onnx")
+
+
+def load_embedding_model(model_name: str, backend: Optional[str] = None):
+    """Load the embedding model on the EMBEDDING_BACKEND runtime
+
+    "torch" is sentence-transformers; "onnx" runs the same model, exported
+    with export_onnx.py, on ONNX Runtime without importing torch at all.
+    """
+    backend = (backend or os.getenv("EMBEDDING_BACKEND", "torch")).lower()
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"EMBEDDING_BACKEND must be one of {', '.join(EMBEDDING_BACKENDS)}, got {backend!r}")
+
+    if backend == "onnx":
+        model_dir = os.getenv("ONNX_MODEL_DIR") or default_onnx_dir(model_name)
+        quantized = os.getenv("ONNX_QUANTIZED", "false").lower() == "true"
+        logger.info(f"Loading ONNX embedding model from {model_dir} ({'int8' if quantized else 'fp32'})")
+        return OnnxEmbeddingModel(model_dir, quantized=quantized, threads=int(os.getenv("ONNX_THREADS", "0")))
+
+    from sentence_transformers import SentenceTransformer
+
+    logger.info(f"Loading embedding model: {model_name}")
+    return SentenceTransformer(model_name)
+
+
+class OnnxEmbeddingModel:
+    """Mean-pooled sentence embeddings on ONNX Runtime
+
+    Implements the subset of SentenceTransformer.encode that RAGService
+    uses. Reads a directory written by export_onnx(): model.onnx,
+    model.int8.onnx, tokenizer.json and embedding_config.json.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = False, threads: int = 0):
+        try:
+            import onnxruntime as ort
+        except ImportError as exc:
+            raise RuntimeError("EMBEDDING_BACKEND=onnx needs onnxruntime; run 'pip install -r requirements-onnx.txt'") from exc
+        from tokenizers import Tokenizer
+
+        config_path = os.path.join(model_dir, ONNX_CONFIG_FILE)
+        if not os.path.exists(config_path):
+            raise RuntimeError(f"No exported ONNX model in {model_dir}; run 'python export_onnx.py' first")
+        with open(config_path, encoding="utf-8") as f:
+            self.config: Dict = json.load(f)
+
+        self.normalize = self.config["normalize"]
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_id"], pad_token=self.config["pad_token"])
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        model_file = "model.int8.onnx" if quantized else "model.onnx"
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [item.name for item in self.session.get_inputs()]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dimension"]
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        show_progress_bar: Optional[bool] = None,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+    ) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.config["dimension"]), dtype=np.float32)
+
+        # Batch similar lengths together to minimise padding, as sentence-transformers does
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        vectors = np.empty((len(texts), self.config["dimension"]), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            batch = order[start:start + batch_size]
+            vectors[batch] = self._embed([texts[i] for i in batch])
+
+        if self.normalize or normalize_embeddings:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors[0] if single else vectors
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        hidden = self.session.run(None, {name: feeds[name] for name in self.input_names})[0]
+        mask = feeds["attention_mask"][..., None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+def export_onnx(model_name: str, output_dir: str, quantize: bool = True) -> Dict:
+    """Export a sentence-transformers model to ONNX (fp32, plus int8 when `quantize`)
+
+    Needs torch and the `onnx` package (requirements-onnx.txt); serving the export only needs
+    onnxruntime and tokenizers.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer, pooling = model[0], model[1]
+    if not pooling.get_config_dict().get("pooling_mode_mean_tokens"):
+        raise RuntimeError(f"{model_name} does not use mean pooling; only mean-pooled models can be exported")
+    if not model.tokenizer.is_fast:
+        raise RuntimeError(f"{model_name} has no fast tokenizer (tokenizer.json); it cannot be exported")
+
+    os.makedirs(output_dir, exist_ok=True)
+    sample = model.tokenizer(SAMPLE_TEXTS[:2], padding=True, return_tensors="pt")
+    inputs = [name for name in ONNX_INPUTS if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in inputs + ["last_hidden_state"]}
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer.auto_model.eval(),
+            tuple(sample[name] for name in inputs),
+            os.path.join(output_dir, "model.onnx"),
+            input_names=inputs,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            dynamo=False,
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(
+            os.path.join(output_dir, "model.onnx"),
+            os.path.join(output_dir, "model.int8.onnx"),
+            weight_type=QuantType.QInt8,
+        )
+
+    model.tokenizer.save_pretrained(output_dir)
+    config = {
+        "source_model": model_name,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "max_seq_length": model.max_seq_length,
+        "normalize": any(type(module).__name__ == "Normalize" for module in model),
+        "pad_id": model.tokenizer.pad_token_id,
+        "pad_token": model.tokenizer.pad_token,
+    }
+    with open(os.path.join(output_dir, ONNX_CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    logger.info(f"Exported {model_name} to {output_dir}")
+    return config
+
+
+def min_cosine(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """Lowest row-wise cosine similarity between two embedding matrices"""
+    reference = np.asarray(reference, dtype=np.float64)
+    candidate = np.asarray(candidate, dtype=np.float64)
+    dots = (reference * candidate).sum(axis=1)
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    return float((dots / np.clip(norms, 1e-12, None)).min())
@@ -0,0 +1,87 @@
+import os
+import json
+import hashlib
+import time
+from typing import Dict, List, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class IngestManifest:
+    """Record of which document versions are embedded in the collection
+
+    Maps each filename to the sha256 of its contents, the number of chunks
+    stored for it and the ingestion settings (chunking, embedding model) it
+    was embedded with. Comparing the documents folder against the manifest
+    tells a sync which files are new, changed or removed; a file embedded
+    with other settings counts as changed. Settings are kept per file, so a
+    sync interrupted halfway through a settings change still re-embeds the
+    files it had not reached.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("INGEST_MANIFEST_PATH", "./chroma_db/ingest_manifest.json")
+        self.files: Dict[str, Dict] = {}
+        self._load()
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        """sha256 of a file's bytes, read in blocks"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def diff(self, current: Dict[str, str], settings: Dict) -> Dict[str, List[str]]:
+        """Compare {filename: hash} on disk with the manifest
+
+        Returns {"new", "changed", "unchanged", "removed"} filename lists.
+        """
+        stale = [filename for filename, entry in self.files.items() if entry.get("settings") != settings]
+        if stale:
+            logger.info(f"Ingestion settings changed; {len(stale)} document(s) embedded with other settings will be re-embedded")
+
+        result = {"new": [], "changed": [], "unchanged": [], "removed": []}
+        for filename, file_hash in sorted(current.items()):
+            entry = self.files.get(filename)
+            if entry is None:
+                result["new"].append(filename)
+            elif entry.get("settings") != settings or entry["sha256"] != file_hash:
+                result["changed"].append(filename)
+            else:
+                result["unchanged"].append(filename)
+        result["removed"] = sorted(set(self.files) - set(current))
+        return result
+
+    def record(self, filename: str, file_hash: str, chunks: int, settings: Dict):
+        """Note a file as embedded, with the settings it was embedded with"""
+        self.files[filename] = {"sha256": file_hash, "chunks": chunks, "settings": settings, "ingested_at": time.time()}
+
+    def forget(self, filename: str):
+        self.files.pop(filename, None)
+
+    def save(self):
+        """Write the manifest atomically so a crash never leaves a torn file"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.files}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                payload = json.load(f)
+            files = payload.get("files", {})
+            if not all({"sha256", "settings"} <= set(entry) for entry in files.values()):
+                logger.warning("Unrecognised ingest manifest; every document will be re-ingested")
+                files = {}
+            self.files = files
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.error(f"Error loading ingest manifest, starting fresh: {str(e)}")
+            self.files = {}
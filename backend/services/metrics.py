@@ -0,0 +1,246 @@
+"""
+Per-stage latency spans and provider token counts.
+
+Spans are aggregated into process-wide histograms and counters rendered in
+the Prometheus text format (/api/metrics), and collected per request so the
+route can echo them in a Server-Timing header.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Seconds; wide enough for four slow provider passes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKEN_KINDS = ("prompt", "cached", "completion")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Labels:
+        return tuple((name, str(labels[name])) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return super().render() + [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        # labels -> [per-bucket counts..., sum, count]
+        self._values: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels) -> int:
+        return self._values.get(self._key(labels), [0])[-1]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, list(series)) for key, series in self._values.items())
+        lines = super().render()
+        for key, series in values:
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', _format_value(bound)),))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "mpp_request_duration_seconds", "End-to-end latency of chat requests.", ("route",)
+))
+REQUESTS = REGISTRY.register(Counter(
+    "mpp_requests_total", "Chat requests by outcome.", ("route", "outcome")
+))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "mpp_stage_duration_seconds", "Latency of each pipeline stage (retrieval, provider passes, post-processing).", ("stage",)
+))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    "mpp_stage_errors_total", "Pipeline stages that raised.", ("stage",)
+))
+PROVIDER_TOKENS = REGISTRY.register(Counter(
+    "mpp_provider_tokens_total", "Provider tokens by kind; cached is the part of prompt served from the provider cache.",
+    ("provider", "kind"),
+))
+UPSTREAM_RETRIES = REGISTRY.register(Counter(
+    "mpp_upstream_retries_total", "Provider calls retried, by upstream and reason (status code or connect).", ("upstream", "reason")
+))
+UPSTREAM_FAILURES = REGISTRY.register(Counter(
+    "mpp_upstream_gave_up_total", "Retryable provider failures that exhausted their retries or deadline.", ("upstream", "reason")
+))
+ADMISSION_ACTIVE = REGISTRY.register(Gauge(
+    "mpp_admission_active", "Chat pipelines running."
+))
+ADMISSION_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "mpp_admission_queue_depth", "Chat requests waiting for a pipeline slot."
+))
+ADMISSION_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "mpp_admission_wait_seconds", "Time admitted chat requests spent queued."
+))
+ADMISSION_REJECTED = REGISTRY.register(Counter(
+    "mpp_admission_rejected_total", "Chat requests turned away, by reason (queue_full or timeout).", ("reason",)
+))
+RATE_LIMIT_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "mpp_rate_limit_wait_seconds", "Time provider calls waited for their rate limiter.", ("upstream",)
+))
+RATE_LIMITED = REGISTRY.register(Counter(
+    "mpp_rate_limited_total", "Provider calls refused by their rate limiter.", ("upstream",)
+))
+
+
+class RequestTrace:
+    """Spans recorded while serving one request"""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.start = time.perf_counter()
+        self.spans: List[Dict] = []
+
+    def timings(self) -> List[Dict]:
+        """[{stage, ms[, prompt_tokens, cached_tokens, completion_tokens]}] in completion order"""
+        return [{"stage": span["stage"], "ms": round(span["seconds"] * 1000, 1), **span["tokens"]} for span in self.spans]
+
+    def server_timing(self) -> str:
+        """Server-Timing header value; token counts go in the description"""
+        entries = []
+        for span in self.timings():
+            entry = f"{span['stage']};dur={span['ms']}"
+            tokens = " ".join(f"{kind}={span[f'{kind}_tokens']}" for kind in TOKEN_KINDS if f"{kind}_tokens" in span)
+            if tokens:
+                entry += f';desc="{tokens}"'
+            entries.append(entry)
+        entries.append(f"total;dur={round((time.perf_counter() - self.start) * 1000, 1)}")
+        return ", ".join(entries)
+
+    def finish(self, outcome: str = "ok"):
+        REQUEST_SECONDS.observe(time.perf_counter() - self.start, route=self.route)
+        REQUESTS.inc(route=self.route, outcome=outcome)
+
+
+_trace: ContextVar[Optional[RequestTrace]] = ContextVar("mpp_request_trace", default=None)
+_span: ContextVar[Optional[Dict]] = ContextVar("mpp_span", default=None)
+
+
+def start_request(route: str) -> RequestTrace:
+    """Collect spans from this task (and tasks it creates) into a new trace"""
+    trace = RequestTrace(route)
+    _trace.set(trace)
+    return trace
+
+
+def observe(stage: str, seconds: float, tokens: Optional[Dict[str, int]] = None):
+    """Record a stage that was timed elsewhere"""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    trace = _trace.get()
+    if trace is not None:
+        trace.spans.append({"stage": stage, "seconds": seconds, "tokens": tokens or {}})
+
+
+@contextmanager
+def span(stage: str) -> Iterator[Dict]:
+    """Time the enclosed block as one stage; record_tokens() inside it attaches usage"""
+    record = {"tokens": {}}
+    reset = _span.set(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        _span.reset(reset)
+        observe(stage, time.perf_counter() - start, record["tokens"])
+
+
+def record_tokens(provider: str, usage: Optional[Dict[str, int]]):
+    """Count a provider call's usage and attach it to the enclosing span"""
+    if not usage:
+        return
+    for kind in TOKEN_KINDS:
+        PROVIDER_TOKENS.inc(usage.get(f"{kind}_tokens", 0), provider=provider, kind=kind)
+    record = _span.get()
+    if record is not None:
+        record["tokens"] = dict(usage)
+
+
+def render() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,84 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-item calls into one batched call
+
+    The first item to arrive opens a batch; items submitted within
+    `window_ms` join it, and it is dispatched early once `max_batch` items
+    are waiting. `batch_fn(items)` runs on `executor` and must return one
+    result per item, in order. Items with different keys never share a batch.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch: int = 32,
+        window_ms: float = 5.0,
+        executor: Optional[Executor] = None,
+        name: str = "batch",
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch = max(1, max_batch)
+        self.window = max(0.0, window_ms) / 1000
+        self.executor = executor
+        self.name = name
+
+        # key -> (items, futures, window timer) of the batch currently collecting
+        self._pending: Dict[Hashable, Tuple[List[Any], List[asyncio.Future], asyncio.TimerHandle]] = {}
+        self._running: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    async def submit(self, item: Any, key: Hashable = None) -> Any:
+        """Queue one item and wait for its share of the batch result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if key not in self._pending:
+            self._pending[key] = ([], [], loop.call_later(self.window, self._dispatch, key))
+        items, futures, _ = self._pending[key]
+        items.append(item)
+        futures.append(future)
+        if len(items) >= self.max_batch:
+            self._dispatch(key)
+        return await future
+
+    def _dispatch(self, key: Hashable):
+        items, futures, timer = self._pending.pop(key)
+        # A batch that filled up early must not have its timer flush the next one
+        timer.cancel()
+        task = asyncio.ensure_future(self._run(items, futures))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, items: List[Any], futures: List[asyncio.Future]):
+        loop = asyncio.get_running_loop()
+        self.batches += 1
+        self.items += len(items)
+        self.largest_batch = max(self.largest_batch, len(items))
+        try:
+            results = await loop.run_in_executor(self.executor, self.batch_fn, items)
+        except Exception as e:
+            logger.error(f"{self.name} batch of {len(items)} failed: {str(e)}")
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+        }
@@ -0,0 +1,320 @@
+import os
+import asyncio
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from backend.services.admission import RateLimited, RateLimiter
+from backend.services.upstream import Retrier
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class GrokProvider:
+    """One OpenAI-compatible Grok endpoint plus its health bookkeeping
+
+    The circuit opens after `failure_threshold` consecutive failures or
+    timeouts. Once `reset_seconds` have passed the provider is tried again
+    (half-open) with a single probe request; other requests keep away until
+    it ends. A success closes the circuit, a failure re-opens it. Being
+    refused by our own rate limiter is not a failure.
+
+    Latency samples drive the hedge delay. An attempt abandoned because a
+    hedge won is recorded too, as a lower bound: dropping it would let the
+    percentile drift down and hedge ever earlier.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        client,
+        model: str,
+        failure_threshold: int = 3,
+        reset_seconds: float = 30.0,
+        limiter: Optional[RateLimiter] = None,
+    ):
+        self.name = name
+        self.client = client
+        self.model = model
+        self.limiter = limiter or RateLimiter(name)
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+
+        self.latencies = deque(maxlen=200)
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.successes = 0
+        self.failures = 0
+        self.hedges_won = 0
+        self.censored_samples = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def available(self) -> bool:
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self.probing)
+
+    def acquire(self) -> bool:
+        """Claim a request slot; while half-open only the single probe gets one"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open" or self.probing:
+            return False
+        self.probing = True
+        logger.info("Grok provider %s half-open; sending a probe request", self.name)
+        return True
+
+    def release(self):
+        """End the request claimed with acquire()"""
+        self.probing = False
+
+    def record_success(self, latency: Optional[float] = None):
+        if latency is not None:
+            self.latencies.append(latency)
+        self.successes += 1
+        self.consecutive_failures = 0
+        if self.opened_at is not None:
+            logger.info("Grok provider %s recovered; circuit closed", self.name)
+        self.opened_at = None
+
+    def record_censored(self, elapsed: float):
+        """An attempt abandoned after `elapsed` seconds: its latency was at least that"""
+        self.latencies.append(elapsed)
+        self.censored_samples += 1
+
+    def end_stream(self, ok: Optional[bool]):
+        """Record how a stream from ProviderPool.open_stream() ended (None: the caller gave up)"""
+        if ok:
+            self.record_success()
+        elif ok is not None:
+            self.record_failure()
+        self.release()
+
+    def record_failure(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(
+                    "Grok provider %s failed %s times in a row; circuit opened",
+                    self.name,
+                    self.consecutive_failures,
+                )
+            self.opened_at = time.monotonic()
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """Observed latency percentile, or None until enough samples exist"""
+        if len(self.latencies) < 5:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(percentile * (len(ordered) - 1))]
+
+    def stats(self) -> Dict:
+        return {
+            "name": self.name,
+            "model": self.model,
+            "state": self.state,
+            "successes": self.successes,
+            "failures": self.failures,
+            "hedges_won": self.hedges_won,
+            "censored_samples": self.censored_samples,
+            "p95_latency": self.latency_percentile(0.95),
+            "rate_limit": self.limiter.stats(),
+        }
+
+
+class ProviderPool:
+    """Ordered set of Grok providers with hedged requests and failover
+
+    A request goes to the first available provider. If it has not answered
+    after the hedge delay (its observed p95 latency, or HEDGE_DELAY_SECONDS
+    until enough samples exist) a duplicate is sent to the next provider and
+    the first successful response wins. A failed attempt fails over to the
+    next provider immediately; only the last provider left retries
+    retryable failures (429, 5xx, connection resets), within
+    PROVIDER_TIMEOUT_SECONDS.
+    """
+
+    def __init__(self, providers: List[GrokProvider], retrier: Optional[Retrier] = None):
+        self.providers = providers
+        self.retrier = retrier or Retrier.from_env()
+        self.hedging = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+        self.default_hedge_delay = float(os.getenv("HEDGE_DELAY_SECONDS", "10"))
+        self.min_hedge_delay = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "0.5"))
+        self.hedge_percentile = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+        self.attempt_timeout = float(os.getenv("PROVIDER_TIMEOUT_SECONDS", "120"))
+        self.hedges_sent = 0
+
+    @classmethod
+    def from_env(cls, configs: List[Tuple[str, Any, str]], retrier: Optional[Retrier] = None) -> "ProviderPool":
+        """Build a pool from (name, client, model) tuples using the circuit breaker env settings"""
+        failure_threshold = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+        reset_seconds = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+        return cls([
+            GrokProvider(name, client, model, failure_threshold, reset_seconds, RateLimiter.from_env(name))
+            for name, client, model in configs
+        ], retrier)
+
+    def describe(self) -> str:
+        return " + ".join(provider.name for provider in self.providers)
+
+    def _candidates(self) -> List[GrokProvider]:
+        candidates = [provider for provider in self.providers if provider.available()]
+        if not candidates:
+            raise RuntimeError("All Grok providers are unavailable (circuit open)")
+        return candidates
+
+    def hedge_delay(self, provider: GrokProvider) -> float:
+        observed = provider.latency_percentile(self.hedge_percentile)
+        if observed is None:
+            return self.default_hedge_delay
+        return max(observed, self.min_hedge_delay)
+
+    async def _create(self, provider: GrokProvider, request: Dict, retry: bool):
+        """chat.completions.create(), bounded by PROVIDER_TIMEOUT_SECONDS including any retries and rate-limit waits"""
+        deadline = time.monotonic() + self.attempt_timeout
+        return await asyncio.wait_for(
+            self.retrier.call(
+                provider.name,
+                lambda: provider.client.chat.completions.create(model=provider.model, **request),
+                deadline,
+                max_retries=None if retry else 0,
+                limiter=provider.limiter,
+                cost=provider.limiter.cost(message["content"] for message in request.get("messages", [])),
+            ),
+            timeout=self.attempt_timeout,
+        )
+
+    async def _attempt(self, provider: GrokProvider, request: Dict, retry: bool):
+        if not provider.acquire():
+            raise RuntimeError("circuit half-open, probe in flight")
+        start = time.monotonic()
+        try:
+            response = await self._create(provider, request, retry)
+        except (asyncio.CancelledError, RateLimited):
+            # Lost a hedge race, or our own limiter said no; not the provider's fault
+            raise
+        except Exception:
+            provider.record_failure()
+            raise
+        finally:
+            provider.release()
+        provider.record_success(time.monotonic() - start)
+        return response
+
+    async def complete(self, **request):
+        """chat.completions.create() with hedging and failover across providers"""
+        candidates = self._candidates()
+        primary = candidates[0]
+        backups = deque(candidates[1:])
+        primary_task = asyncio.create_task(self._attempt(primary, request, retry=not backups))
+        primary_started = time.monotonic()
+        pending: Dict[asyncio.Task, GrokProvider] = {primary_task: primary}
+        hedge_delay = self.hedge_delay(primary)
+        errors = []
+        limited: List[RateLimited] = []
+
+        try:
+            while pending:
+                timeout = hedge_delay if (self.hedging and backups) else None
+                done, _ = await asyncio.wait(
+                    pending.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    backup = backups.popleft()
+                    self.hedges_sent += 1
+                    logger.info(
+                        "Grok provider %s slower than %.2fs; hedging to %s",
+                        primary.name,
+                        hedge_delay,
+                        backup.name,
+                    )
+                    pending[asyncio.create_task(self._attempt(backup, request, retry=not backups))] = backup
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        if provider is not primary:
+                            provider.hedges_won += 1
+                            if primary_task in pending:
+                                primary.record_censored(time.monotonic() - primary_started)
+                        return task.result()
+                    errors.append(f"{provider.name}: {task.exception()}")
+                    if isinstance(task.exception(), RateLimited):
+                        limited.append(task.exception())
+                    logger.warning("Grok provider %s failed: %s", provider.name, task.exception())
+
+                if backups and not pending:
+                    backup = backups.popleft()
+                    pending[asyncio.create_task(self._attempt(backup, request, retry=not backups))] = backup
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise self._failure(errors, limited)
+
+    @staticmethod
+    def _failure(errors: List[str], limited: List[RateLimited]) -> Exception:
+        """RateLimited when every provider was over its rate limit, else RuntimeError"""
+        if limited and len(limited) == len(errors):
+            return RateLimited("; ".join(errors), min(exc.retry_after for exc in limited))
+        return RuntimeError("; ".join(errors))
+
+    async def open_stream(self, **request) -> Tuple[Any, GrokProvider]:
+        """Start a streamed completion, failing over until a provider accepts it
+
+        Returns (stream, provider). The stream can still fail or stall after
+        it opens, so the caller reports how it ended with
+        provider.end_stream(); a half-open provider's probe lasts until then.
+        Streams are not hedged: duplicating one would double the tokens paid
+        for the whole answer, not just the time to the first byte.
+        """
+        errors = []
+        limited: List[RateLimited] = []
+        candidates = self._candidates()
+        for provider in candidates:
+            if not provider.acquire():
+                errors.append(f"{provider.name}: circuit half-open, probe in flight")
+                continue
+            opened = False
+            try:
+                stream = await self._create(provider, {**request, "stream": True}, retry=provider is candidates[-1])
+                opened = True
+            except RateLimited as exc:
+                errors.append(f"{provider.name}: {exc}")
+                limited.append(exc)
+                continue
+            except Exception as exc:
+                provider.record_failure()
+                errors.append(f"{provider.name}: {exc}")
+                logger.warning("Grok provider %s failed to stream: %s", provider.name, exc)
+                continue
+            finally:
+                if not opened:
+                    provider.release()
+            return stream, provider
+        raise self._failure(errors, limited)
+
+    async def aclose(self):
+        """Close every provider's HTTP connection pool"""
+        for provider in self.providers:
+            await provider.client.close()
+
+    def stats(self) -> Dict:
+        return {
+            "hedging": self.hedging,
+            "hedges_sent": self.hedges_sent,
+            "providers": [provider.stats() for provider in self.providers],
+        }
@@ -1,103 +1,619 @@
 import os
-import chromadb
-from typing import List, Dict
-from sentence_transformers import SentenceTransformer
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import numpy as np
+from typing import List, Dict, Optional, Tuple
+from backend.services import metrics
+from backend.services.bm25_index import BM25Index
+from backend.services.chunker import LOCATION_KEYS, StructuredChunker
+from backend.services.embeddings import load_embedding_model, min_cosine
+from backend.services.micro_batcher import MicroBatcher
+from backend.services.reranker import Reranker
+from backend.services.retrieval_cache import RetrievalCache
+from backend.services.vector_store import create_vector_store
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def reciprocal_rank_fusion(result_lists: List[List[Dict]], k: int = 60) -> List[Dict]:
+    """Merge ranked source lists by summing 1 / (k + rank) per chunk id"""
+    fused: Dict[str, Dict] = {}
+    for results in result_lists:
+        for rank, item in enumerate(results, start=1):
+            entry = fused.setdefault(item["id"], {**item, "rrf_score": 0.0})
+            # Keep whichever retriever-specific scores each list contributed
+            entry.update({key: value for key, value in item.items() if value is not None})
+            entry["rrf_score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda item: item["rrf_score"], reverse=True)
+
+
 class RAGService:
     """Service for managing RAG (Retrieval-Augmented Generation)"""
 
     def __init__(self):
         self.collection_name = os.getenv("COLLECTION_NAME", "mpp_documents")
         self.embedding_model_name = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
-        self.chunk_size = int(os.getenv("CHUNK_SIZE", "1000"))
-        self.chunk_overlap = int(os.getenv("CHUNK_OVERLAP", "200"))
+        self.chunker = StructuredChunker()
 
-        # Initialize ChromaDB (new API)
-        self.client = chromadb.PersistentClient(path="./chroma_db")
+        # Bulk ingestion: encode and write in fixed-size batches
+        self.embed_batch_size = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+        self.ingest_batch_size = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+        self.embed_processes = int(os.getenv("EMBED_PROCESSES", "1"))
+        self.normalize_embeddings = os.getenv("EMBED_NORMALIZE", "true").lower() == "true"
+        self._encode_pool = None
 
-        # Initialize embedding model (same as Government Expert)
-        logger.info(f"Loading embedding model: {self.embedding_model_name}")
-        self.embedding_model = SentenceTransformer(self.embedding_model_name)
+        # Encoding and vector search are blocking; run them on a bounded pool
+        # so the event loop keeps serving other requests meanwhile.
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("RAG_EXECUTOR_WORKERS", "4")),
+            thread_name_prefix="rag",
+        )
 
-        # Get or create collection
-        try:
-            self.collection = self.client.get_collection(name=self.collection_name)
-            logger.info(f"Loaded existing collection: {self.collection_name}")
-        except:
-            self.collection = self.client.create_collection(name=self.collection_name)
-            logger.info(f"Created new collection: {self.collection_name}")
-
-    def chunk_text(self, text: str) -> List[str]:
-        """Split text into chunks with overlap"""
-        chunks = []
-        start = 0
-        text_length = len(text)
-
-        while start < text_length:
-            end = start + self.chunk_size
-            chunk = text[start:end]
-            chunks.append(chunk)
-            start += self.chunk_size - self.chunk_overlap
-
-        return chunks
-
-    def add_document(self, text: str, filename: str) -> int:
-        """Add a document to the RAG system"""
-        chunks = self.chunk_text(text)
-
-        # Create embeddings
-        embeddings = self.embedding_model.encode(chunks).tolist()
-
-        # Generate unique IDs
-        doc_count = self.collection.count()
-        ids = [f"{filename}_{doc_count}_{i}" for i in range(len(chunks))]
-
-        # Add to collection
-        self.collection.add(
-            embeddings=embeddings,
-            documents=chunks,
-            metadatas=[{"source": filename, "chunk": i} for i in range(len(chunks))],
-            ids=ids
+        # Hot queries skip both the encoder and the vector search
+        self.retrieval_cache = RetrievalCache(int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024")))
+
+        # Concurrent queries share one encode and one vector search per window
+        self.query_batching = os.getenv("QUERY_BATCH_ENABLED", "true").lower() == "true"
+        batch_max = int(os.getenv("QUERY_BATCH_MAX", "32"))
+        batch_window_ms = float(os.getenv("QUERY_BATCH_WINDOW_MS", "5"))
+        self.embed_batcher = MicroBatcher(
+            self._embed_batch, batch_max, batch_window_ms, self.executor, name="query encode"
+        )
+        self.search_batcher = MicroBatcher(
+            self._search_batch, batch_max, batch_window_ms, self.executor, name="vector search"
         )
 
-        logger.info(f"Added {len(chunks)} chunks from {filename}")
-        return len(chunks)
+        # Lexical retrieval catches clause numbers and acronyms the embedder blurs
+        self.hybrid_enabled = os.getenv("HYBRID_RETRIEVAL_ENABLED", "true").lower() == "true"
+        self.hybrid_fetch_k = int(os.getenv("HYBRID_FETCH_K", "20"))
+        self.rrf_k = int(os.getenv("RRF_K", "60"))
+        self.bm25 = BM25Index()
 
-    def query(self, query_text: str, n_results: int = 5) -> List[Dict]:
-        """Query the RAG system for relevant documents"""
-        # Create query embedding
-        query_embedding = self.embedding_model.encode([query_text]).tolist()
+        # Over-fetch, then keep only what a cross-encoder finds relevant (off by default)
+        self.reranker = Reranker()
+
+        # Initialize embedding model (same as Government Expert) on the
+        # EMBEDDING_BACKEND runtime: torch, or its ONNX export
+        self.embedding_backend = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+        self.embedding_model = load_embedding_model(self.embedding_model_name, self.embedding_backend)
+
+        # Chunk vectors, text and metadata: Chroma, or the memory-mapped NumPy store
+        self.store = create_vector_store(self.collection_name)
+        # The last collection version this process has seen. Syncs made by
+        # another process are looked for on the executor, at most every
+        # COLLECTION_VERSION_CHECK_SECONDS, never on the request path.
+        self._seen_version = self.store.version
+        self._version_lock = threading.Lock()
+        self.version_check_seconds = float(os.getenv("COLLECTION_VERSION_CHECK_SECONDS", "1"))
+        self._version_checked = time.monotonic()
+        self._version_check = None
+        # The collection version the BM25 index was last loaded for
+        self._lexical_version = self._seen_version
+        self._lexical_lock = threading.Lock()
+
+        if len(self.bm25) != self.store.count():
+            self.rebuild_lexical_index()
+
+        if self.embedding_backend != "torch":
+            self.check_embedding_parity()
+
+    def check_embedding_parity(self, sample: int = 8) -> Optional[float]:
+        """Re-embed a few stored chunks and compare them with their stored vectors
+
+        A backend whose vectors drift below EMBEDDING_PARITY_MIN_COSINE would
+        silently degrade search over the existing collection.
+        """
+        stored = self.store.get(limit=sample, include_embeddings=True)
+        if not stored["ids"]:
+            return None
+        similarity = min_cosine(stored["embeddings"], self.encode(stored["documents"]))
+        threshold = float(os.getenv("EMBEDDING_PARITY_MIN_COSINE", "0.99"))
+        if similarity < threshold:
+            logger.error(
+                f"{self.embedding_backend} embeddings differ from the stored vectors "
+                f"(min cosine {similarity:.4f} < {threshold}); re-run init_documents.py --rebuild "
+                f"or switch EMBEDDING_BACKEND back to torch"
+            )
+        else:
+            logger.info(f"{self.embedding_backend} embeddings match stored vectors (min cosine {similarity:.4f})")
+        return similarity
+
+    def rebuild_lexical_index(self, save: bool = True):
+        """Re-create the BM25 index from the chunks in the vector store"""
+        stored = self.store.get()
+        self.bm25.clear()
+        self.bm25.add(
+            stored["ids"],
+            stored["documents"],
+            [metadata.get("source", "unknown") for metadata in stored["metadatas"]],
+        )
+        if save:
+            self.bm25.save()
+        logger.info(f"Rebuilt BM25 index from {len(stored['ids'])} stored chunks")
+
+    @property
+    def collection_version(self) -> str:
+        """Opaque stamp that changes whenever the collection contents change
+
+        This includes changes made by another process (init_documents.py).
+        Caches keyed on it (retrieval results, answers, in-flight requests)
+        miss once it changes. Reading it never touches storage: when the
+        last check is COLLECTION_VERSION_CHECK_SECONDS old, refresh_version()
+        is queued on the executor and the version moves on once it finds a
+        change.
+        """
+        with self._version_lock:
+            due = time.monotonic() - self._version_checked >= self.version_check_seconds
+            if due and (self._version_check is None or self._version_check.done()):
+                self._version_checked = time.monotonic()
+                try:
+                    self._version_check = self.executor.submit(self.refresh_version)
+                except RuntimeError:
+                    # The executor has been shut down
+                    pass
+            return self._seen_version
 
-        # Query the collection
-        results = self.collection.query(
-            query_embeddings=query_embedding,
-            n_results=n_results
+    def refresh_version(self) -> str:
+        """Look for a sync made by another process and catch up with it (blocking)"""
+        version = self.store.refresh()
+        if version != self._seen_version:
+            self._adopt_version(version)
+        return version
+
+    def _adopt_version(self, version: str):
+        """Catch up with a collection another process has changed
+
+        The BM25 index follows on the next lexical_query().
+        """
+        logger.info(f"Collection {self.collection_name} changed in another process (version {version[:8]})")
+        # Version-keyed entries are already unreachable; free the memory too
+        self.retrieval_cache.clear_results()
+        with self._version_lock:
+            self._seen_version = version
+
+    def _bump_collection_version(self):
+        """Record a new collection version so caches built on the old one are dropped"""
+        with self._version_lock:
+            self._seen_version = self._lexical_version = self.store.bump_version()
+            # Version-keyed entries are already unreachable; free the memory too
+            self.retrieval_cache.clear_results()
+
+    @property
+    def ingest_settings(self) -> Dict:
+        """Settings that change chunk contents or vectors; stored in the ingest manifest"""
+        return {
+            "embedding_model": self.embedding_model_name,
+            "normalize": self.normalize_embeddings,
+            **self.chunker.settings,
+        }
+
+    @staticmethod
+    def chunk_id(filename: str, file_hash: str, index: int) -> str:
+        """Deterministic chunk ID, so re-adding the same file version is a no-op"""
+        return f"{filename}:{file_hash[:16]}:{index}"
+
+    @contextmanager
+    def bulk_ingest(self, processes: Optional[int] = None):
+        """Encode with a pool of `processes` CPU worker processes for the duration of the block"""
+        processes = self.embed_processes if processes is None else processes
+        if processes > 1 and not hasattr(self.embedding_model, "start_multi_process_pool"):
+            # ONNX Runtime already spreads one encode across cores
+            logger.info(f"{self.embedding_backend} backend encodes in-process; ignoring {processes} embedding processes")
+        elif processes > 1:
+            logger.info(f"Starting {processes} embedding processes")
+            self._encode_pool = self.embedding_model.start_multi_process_pool(["cpu"] * processes)
+        try:
+            yield self
+        finally:
+            if self._encode_pool is not None:
+                self.embedding_model.stop_multi_process_pool(self._encode_pool)
+                self._encode_pool = None
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as a float32 array, normalized when EMBED_NORMALIZE is on"""
+        if self._encode_pool is not None:
+            vectors = self.embedding_model.encode_multi_process(
+                texts, self._encode_pool, batch_size=self.embed_batch_size
+            )
+            if self.normalize_embeddings:
+                vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        else:
+            vectors = self.embedding_model.encode(
+                texts,
+                batch_size=self.embed_batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=self.normalize_embeddings,
+                show_progress_bar=False,
+            )
+        return np.asarray(vectors, dtype=np.float32)
+
+    def add_document(self, text: str, filename: str, file_hash: Optional[str] = None) -> int:
+        """Add a document to the RAG system, replacing any earlier version of it
+
+        Chunks are encoded INGEST_BATCH_SIZE at a time; each batch is written
+        to the vector store on a background thread while the next one is encoded, so
+        at most two batches of vectors are held in memory.
+        """
+        start = time.perf_counter()
+        chunks = self.chunker.chunk(text)
+        file_hash = file_hash or hashlib.sha256(text.encode("utf-8")).hexdigest()
+        ids = [self.chunk_id(filename, file_hash, i) for i in range(len(chunks))]
+        metadatas = [
+            {
+                "source": filename,
+                "chunk": i,
+                "file_hash": file_hash,
+                **{key: chunk[key] for key in LOCATION_KEYS if key in chunk},
+            }
+            for i, chunk in enumerate(chunks)
+        ]
+
+        # Drop chunks left by an earlier version (or the old count-based IDs)
+        self.store.delete(where={"source": filename})
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest") as writer:
+            pending = None
+            for offset in range(0, len(chunks), self.ingest_batch_size):
+                end = offset + self.ingest_batch_size
+                texts = [chunk["text"] for chunk in chunks[offset:end]]
+                vectors = self.encode(texts)
+                # One write in flight at a time keeps memory bounded
+                if pending is not None:
+                    pending.result()
+                pending = writer.submit(
+                    self.store.upsert, ids[offset:end], vectors, texts, metadatas[offset:end]
+                )
+                done = min(end, len(chunks))
+                if done < len(chunks):
+                    elapsed = time.perf_counter() - start
+                    logger.info(f"  {filename}: embedded {done}/{len(chunks)} chunks ({done / elapsed:.1f} chunks/s)")
+            if pending is not None:
+                pending.result()
+
+        self.bm25.remove_source(filename)
+        self.bm25.add(ids, [chunk["text"] for chunk in chunks], [filename] * len(chunks))
+        self.bm25.save()
+
+        self._bump_collection_version()
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Added {len(chunks)} chunks from {filename} in {elapsed:.1f}s "
+            f"({len(chunks) / elapsed if elapsed else 0:.1f} chunks/s)"
         )
+        return len(chunks)
+
+    def delete_document(self, filename: str) -> int:
+        """Remove every chunk of a document; returns how many were deleted"""
+        count = self.count_document_chunks(filename)
+        if count:
+            self.store.delete(where={"source": filename})
+            self.bm25.remove_source(filename)
+            self.bm25.save()
+            self._bump_collection_version()
+            logger.info(f"Deleted {count} chunks from {filename}")
+        return count
+
+    def count_document_chunks(self, filename: str) -> int:
+        """Number of chunks stored for one document"""
+        return self.store.count(where={"source": filename})
+
+    def embed_query(self, query_text: str) -> List[float]:
+        """Encode a query string with the embedding model"""
+        embedding = self.retrieval_cache.get_embedding(query_text)
+        if embedding is None:
+            embedding = self.embedding_model.encode(
+                [query_text], normalize_embeddings=self.normalize_embeddings, show_progress_bar=False
+            )[0].tolist()
+            self.retrieval_cache.put_embedding(query_text, embedding)
+        return embedding
+
+    def query_by_embedding(
+        self,
+        query_embedding: List[float],
+        n_results: int = 5,
+        where: Optional[Dict] = None,
+    ) -> List[Dict]:
+        """Query the collection with a precomputed query embedding"""
+        version = self.collection_version
+        cached = self.retrieval_cache.get_results(query_embedding, n_results, where, version)
+        if cached is not None:
+            return cached
+
+        sources = self.vector_search([query_embedding], n_results, where)[0]
+        self.retrieval_cache.put_results(query_embedding, n_results, where, version, sources)
+        return sources
+
+    def vector_search(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 5,
+        where: Optional[Dict] = None,
+    ) -> List[List[Dict]]:
+        """One vector store query for several embeddings; one source list per embedding"""
+        results = self.store.query(np.asarray(query_embeddings, dtype=np.float32), n_results, where)
 
         # Format results
-        sources = []
-        if results['documents'] and len(results['documents']) > 0:
-            for i, doc in enumerate(results['documents'][0]):
-                sources.append({
-                    "text": doc,
-                    "source": results['metadatas'][0][i].get('source', 'unknown'),
-                    "chunk": results['metadatas'][0][i].get('chunk', 0),
-                    "distance": results['distances'][0][i] if 'distances' in results else None
-                })
+        return [
+            [
+                {**self._format_source(hit["id"], hit["document"], hit["metadata"]), "distance": hit["distance"]}
+                for hit in hits
+            ]
+            for hits in results
+        ]
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.embedding_model.encode(
+            texts, normalize_embeddings=self.normalize_embeddings, show_progress_bar=False
+        )
+        return [vector.tolist() for vector in vectors]
+
+    def _search_batch(self, items: List[Tuple[List[float], int, Optional[Dict]]]) -> List[List[Dict]]:
+        # Every item in a batch shares n_results and where (they are the batch key)
+        _, n_results, where = items[0]
+        return self.vector_search([embedding for embedding, _, _ in items], n_results, where)
+
+    @staticmethod
+    def _format_source(chunk_id: str, text: str, metadata: Dict) -> Dict:
+        return {
+            "id": chunk_id,
+            "text": text,
+            "source": metadata.get('source', 'unknown'),
+            "chunk": metadata.get('chunk', 0),
+            **{key: metadata[key] for key in LOCATION_KEYS if key in metadata},
+        }
+
+    def lexical_query(self, query_text: str, n_results: int = 5, where: Optional[Dict] = None) -> List[Dict]:
+        """BM25 search; results are formatted like query_by_embedding() with a bm25_score"""
+        self._sync_lexical_index()
+        hits = self.bm25.search(query_text, n_results, where)
+        if not hits:
+            return []
+        stored = self.store.get(ids=[chunk_id for chunk_id, _ in hits])
+        by_id = {
+            chunk_id: self._format_source(chunk_id, doc, metadata)
+            for chunk_id, doc, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])
+        }
+        return [{**by_id[chunk_id], "bm25_score": score} for chunk_id, score in hits if chunk_id in by_id]
+
+    def _sync_lexical_index(self):
+        """Reload the BM25 index once after another process re-ingests (runs on the executor)"""
+        version = self._seen_version
+        if version == self._lexical_version:
+            return
+        with self._lexical_lock:
+            if version == self._lexical_version:
+                return
+            # The writer saves its BM25 index before it bumps the version
+            self.bm25.reload()
+            if len(self.bm25) != self.store.count():
+                # Not ours to overwrite: the writer owns the file
+                self.rebuild_lexical_index(save=False)
+            self._lexical_version = version
+
+    def _timed(self, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        return result, (time.perf_counter() - start) * 1000
+
+    @staticmethod
+    async def _atimed(awaitable):
+        start = time.perf_counter()
+        result = await awaitable
+        return result, (time.perf_counter() - start) * 1000
+
+    async def ahybrid_query(
+        self,
+        query_text: str,
+        query_embedding: List[float],
+        n_results: int = 5,
+        where: Optional[Dict] = None,
+    ) -> Tuple[List[Dict], Dict]:
+        """Vector and BM25 retrieval run concurrently, fused with reciprocal rank fusion
+
+        Returns (sources, timings) where timings holds each retriever's
+        latency in milliseconds.
+        """
+        start = time.perf_counter()
+        if not self.hybrid_enabled:
+            sources = await self.aquery_by_embedding(query_embedding, n_results, where)
+            vector_ms = (time.perf_counter() - start) * 1000
+            metrics.observe("vector_search", vector_ms / 1000)
+            return sources, {"vector_ms": round(vector_ms, 2), "total_ms": round(vector_ms, 2)}
+
+        loop = asyncio.get_running_loop()
+        fetch_k = max(n_results, self.hybrid_fetch_k)
+        (vector, vector_ms), (lexical, lexical_ms) = await asyncio.gather(
+            self._atimed(self.aquery_by_embedding(query_embedding, fetch_k, where)),
+            loop.run_in_executor(self.executor, self._timed, self.lexical_query, query_text, fetch_k, where),
+        )
+        sources = reciprocal_rank_fusion([vector, lexical], self.rrf_k)[:n_results]
+        metrics.observe("vector_search", vector_ms / 1000)
+        metrics.observe("lexical_search", lexical_ms / 1000)
+        timings = {
+            "vector_ms": round(vector_ms, 2),
+            "lexical_ms": round(lexical_ms, 2),
+            "total_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+        logger.info(
+            "Hybrid retrieval: vector %.1fms (%s), BM25 %.1fms (%s) -> %s fused",
+            vector_ms, len(vector), lexical_ms, len(lexical), len(sources),
+        )
+        return sources, timings
+
+    async def aretrieve(
+        self,
+        query_text: str,
+        query_embedding: List[float],
+        n_results: int = 5,
+        where: Optional[Dict] = None,
+    ) -> Tuple[List[Dict], Dict]:
+        """Hybrid retrieval, then cross-encoder reranking when enabled
 
+        Returns (sources, timings). With reranking, up to RERANK_CANDIDATES
+        chunks are fetched and at most RERANK_TOP_K above the cutoff are kept.
+        """
+        if not self.reranker.enabled:
+            return await self.ahybrid_query(query_text, query_embedding, n_results, where)
+
+        start = time.perf_counter()
+        candidates, timings = await self.ahybrid_query(
+            query_text, query_embedding, max(n_results, self.reranker.candidates), where
+        )
+        loop = asyncio.get_running_loop()
+        sources, rerank_stats = await loop.run_in_executor(
+            self.executor, self.reranker.rerank, query_text, candidates
+        )
+        timings.update(rerank_stats)
+        metrics.observe("rerank", rerank_stats["rerank_ms"] / 1000)
+        timings["total_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return sources, timings
+
+    def query(self, query_text: str, n_results: int = 5, where: Optional[Dict] = None) -> List[Dict]:
+        """Query the RAG system for relevant documents"""
+        return self.query_by_embedding(self.embed_query(query_text), n_results, where)
+
+    async def aembed_query(self, query_text: str) -> List[float]:
+        """embed_query() for the event loop; concurrent misses are encoded as one batch"""
+        if not self.query_batching:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self.embed_query, query_text)
+
+        embedding = self.retrieval_cache.get_embedding(query_text)
+        if embedding is None:
+            embedding = await self.embed_batcher.submit(query_text)
+            self.retrieval_cache.put_embedding(query_text, embedding)
+        return embedding
+
+    async def aquery_by_embedding(
+        self,
+        query_embedding: List[float],
+        n_results: int = 5,
+        where: Optional[Dict] = None,
+    ) -> List[Dict]:
+        """query_by_embedding() for the event loop; concurrent searches share one store query"""
+        if not self.query_batching:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, self.query_by_embedding, query_embedding, n_results, where
+            )
+
+        version = self.collection_version
+        cached = self.retrieval_cache.get_results(query_embedding, n_results, where, version)
+        if cached is not None:
+            return cached
+        key = (n_results, json.dumps(where, sort_keys=True))
+        sources = await self.search_batcher.submit((query_embedding, n_results, where), key)
+        self.retrieval_cache.put_results(query_embedding, n_results, where, version, sources)
         return sources
 
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        """embed_query() for a known batch: one encode for every text not already cached"""
+        embeddings = {text: self.retrieval_cache.get_embedding(text) for text in texts}
+        missing = [text for text, embedding in embeddings.items() if embedding is None]
+        if missing:
+            loop = asyncio.get_running_loop()
+            vectors = await loop.run_in_executor(self.executor, self._embed_batch, missing)
+            for text, vector in zip(missing, vectors):
+                embeddings[text] = vector
+                self.retrieval_cache.put_embedding(text, vector)
+        return [embeddings[text] for text in texts]
+
+    def _vector_search_many(
+        self, query_embeddings: List[List[float]], n_results: int, where: Optional[Dict]
+    ) -> List[List[Dict]]:
+        """query_by_embedding() for several embeddings; the cache misses share one store query"""
+        version = self.collection_version
+        results = [self.retrieval_cache.get_results(embedding, n_results, where, version) for embedding in query_embeddings]
+        missing = [index for index, sources in enumerate(results) if sources is None]
+        if missing:
+            found = self.vector_search([query_embeddings[index] for index in missing], n_results, where)
+            for index, sources in zip(missing, found):
+                results[index] = sources
+                self.retrieval_cache.put_results(query_embeddings[index], n_results, where, version, sources)
+        return results
+
+    async def aretrieve_many(
+        self,
+        query_texts: List[str],
+        query_embeddings: List[List[float]],
+        n_results: int = 5,
+        where: Optional[Dict] = None,
+    ) -> List[Tuple[List[Dict], Dict]]:
+        """aretrieve() for a batch of questions known up front
+
+        One vector store query covers every question, and BM25 and reranking
+        each run as one executor job for the batch. Returns one (sources,
+        timings) per question; vector, BM25 and total latencies are those of
+        the whole batch, rerank stats are the question's own.
+        """
+        if not query_texts:
+            return []
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        candidates_k = max(n_results, self.reranker.candidates) if self.reranker.enabled else n_results
+
+        if self.hybrid_enabled:
+            fetch_k = max(candidates_k, self.hybrid_fetch_k)
+            (vectors, vector_ms), (lexicals, lexical_ms) = await asyncio.gather(
+                loop.run_in_executor(
+                    self.executor, self._timed, self._vector_search_many, query_embeddings, fetch_k, where
+                ),
+                loop.run_in_executor(
+                    self.executor, self._timed,
+                    lambda: [self.lexical_query(text, fetch_k, where) for text in query_texts],
+                ),
+            )
+            results = [
+                reciprocal_rank_fusion([vector, lexical], self.rrf_k)[:candidates_k]
+                for vector, lexical in zip(vectors, lexicals)
+            ]
+            metrics.observe("lexical_search", lexical_ms / 1000)
+            timings = {"vector_ms": round(vector_ms, 2), "lexical_ms": round(lexical_ms, 2)}
+        else:
+            results, vector_ms = await loop.run_in_executor(
+                self.executor, self._timed, self._vector_search_many, query_embeddings, candidates_k, where
+            )
+            timings = {"vector_ms": round(vector_ms, 2)}
+        metrics.observe("vector_search", vector_ms / 1000)
+
+        rerank_stats = [{}] * len(results)
+        if self.reranker.enabled:
+            reranked, rerank_ms = await loop.run_in_executor(
+                self.executor, self._timed,
+                lambda: [self.reranker.rerank(text, candidates) for text, candidates in zip(query_texts, results)],
+            )
+            metrics.observe("rerank", rerank_ms / 1000)
+            results = [sources for sources, _ in reranked]
+            rerank_stats = [stats for _, stats in reranked]
+
+        timings["total_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        logger.info(
+            "Batch retrieval for %s questions in %.1fms", len(query_texts), timings["total_ms"]
+        )
+        return [(sources, {**timings, **stats}) for sources, stats in zip(results, rerank_stats)]
+
+    def batching_stats(self) -> Dict:
+        return {
+            "enabled": self.query_batching,
+            "encode": self.embed_batcher.stats(),
+            "search": self.search_batcher.stats(),
+        }
+
     def get_document_count(self) -> int:
         """Get the number of document chunks in the collection"""
-        return self.collection.count()
+        return self.store.count()
 
     def clear_collection(self):
         """Clear all documents from the collection"""
-        self.client.delete_collection(name=self.collection_name)
-        self.collection = self.client.create_collection(name=self.collection_name)
+        self.store.clear()
+        self.bm25.clear()
+        self.bm25.save()
+        self._bump_collection_version()
         logger.info(f"Cleared collection: {self.collection_name}")
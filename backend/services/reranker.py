@@ -0,0 +1,60 @@
+import os
+import time
+from typing import Dict, List, Tuple
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Reranker:
+    """Optional cross-encoder reranking of retrieved candidates
+
+    Retrieval over-fetches RERANK_CANDIDATES chunks; the cross-encoder
+    scores every (question, chunk) pair in one batched call and only chunks
+    scoring at least RERANK_MIN_SCORE go forward, at most RERANK_TOP_K of
+    them (and never fewer than RERANK_MIN_KEEP).
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+        self.model_name = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+        self.candidates = int(os.getenv("RERANK_CANDIDATES", "30"))
+        self.top_k = int(os.getenv("RERANK_TOP_K", "5"))
+        self.min_score = float(os.getenv("RERANK_MIN_SCORE", "0.1"))
+        self.min_keep = int(os.getenv("RERANK_MIN_KEEP", "1"))
+        self.model = None
+
+        if self.enabled:
+            from sentence_transformers import CrossEncoder
+
+            logger.info(f"Loading reranker model: {self.model_name}")
+            self.model = CrossEncoder(self.model_name, max_length=512)
+
+    def rerank(self, query: str, candidates: List[Dict]) -> Tuple[List[Dict], Dict]:
+        """Return (kept chunks best-first, stats) for one question"""
+        start = time.perf_counter()
+        if not candidates:
+            return [], {"rerank_ms": 0.0, "candidates": 0, "kept": 0}
+
+        # One batched forward pass for the whole candidate set
+        scores = self.model.predict(
+            [(query, item["text"]) for item in candidates],
+            batch_size=len(candidates),
+            show_progress_bar=False,
+        )
+        ranked = sorted(
+            ({**item, "rerank_score": float(score)} for item, score in zip(candidates, scores)),
+            key=lambda item: item["rerank_score"],
+            reverse=True,
+        )
+        kept = [item for item in ranked if item["rerank_score"] >= self.min_score][:self.top_k]
+        if len(kept) < self.min_keep:
+            kept = ranked[:self.min_keep]
+
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info(
+            "Reranked %s candidates in %.1fms; kept %s (top score %.3f)",
+            len(candidates), elapsed, len(kept), ranked[0]["rerank_score"],
+        )
+        return kept, {"rerank_ms": round(elapsed, 2), "candidates": len(candidates), "kept": len(kept)}
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+import numpy as np
+
+
+class LRUCache:
+    """Thread-safe bounded mapping that evicts the least recently used key"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict:
+        return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class RetrievalCache:
+    """Two-level cache for RAGService: query text -> embedding, embedding -> sources
+
+    Result keys include the collection version, so anything cached before an
+    ingest or clear, in this process or another one, is not returned afterwards.
+    """
+
+    def __init__(self, max_size: int):
+        self.embeddings = LRUCache(max_size)
+        self.results = LRUCache(max_size)
+
+    @staticmethod
+    def normalize_query(query_text: str) -> str:
+        """Collapse Unicode and whitespace variants that encode identically"""
+        return " ".join(unicodedata.normalize("NFKC", query_text).split())
+
+    @staticmethod
+    def embedding_key(embedding: List[float]) -> str:
+        return hashlib.sha1(np.asarray(embedding, dtype=np.float32).tobytes()).hexdigest()
+
+    def get_embedding(self, query_text: str) -> Optional[List[float]]:
+        return self.embeddings.get(self.normalize_query(query_text))
+
+    def put_embedding(self, query_text: str, embedding: List[float]):
+        self.embeddings.put(self.normalize_query(query_text), embedding)
+
+    def _result_key(self, embedding, n_results, where, collection_version) -> tuple:
+        where_key = json.dumps(where, sort_keys=True) if where else ""
+        return (collection_version, self.embedding_key(embedding), n_results, where_key)
+
+    def get_results(
+        self, embedding: List[float], n_results: int, where: Optional[Dict], collection_version: str
+    ) -> Optional[List[Dict]]:
+        sources = self.results.get(self._result_key(embedding, n_results, where, collection_version))
+        # Hand out copies so callers can annotate sources without corrupting the cache
+        return [dict(item) for item in sources] if sources is not None else None
+
+    def put_results(
+        self,
+        embedding: List[float],
+        n_results: int,
+        where: Optional[Dict],
+        collection_version: str,
+        sources: List[Dict],
+    ):
+        key = self._result_key(embedding, n_results, where, collection_version)
+        self.results.put(key, [dict(item) for item in sources])
+
+    def clear_results(self):
+        self.results.clear()
+
+    def stats(self) -> Dict:
+        return {"embeddings": self.embeddings.stats(), "results": self.results.stats()}
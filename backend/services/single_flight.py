@@ -0,0 +1,117 @@
+"""
+Single-flight coalescing: concurrent requests for the same work share one
+in-flight pipeline instead of each running their own.
+"""
+import os
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Flight:
+    """One running pipeline, the events it has emitted and the callers sharing it"""
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.task: Optional[asyncio.Task] = None
+        self.events: List[Tuple[str, Any]] = []
+        self.subscribers: List[asyncio.Queue] = []
+        self.waiters = 0
+        self.closed = False
+
+    async def emit(self, event: str, data):
+        """EventEmitter for the pipeline: broadcast to every subscriber"""
+        self.events.append((event, data))
+        for queue in self.subscribers:
+            queue.put_nowait((event, data))
+
+    def subscribe(self) -> asyncio.Queue:
+        """Queue of the events so far and every later one, then None when the pipeline ends"""
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in self.events:
+            queue.put_nowait(event)
+        if self.closed:
+            queue.put_nowait(None)
+        else:
+            self.subscribers.append(queue)
+        return queue
+
+    def _close(self, _task=None):
+        self.closed = True
+        for queue in self.subscribers:
+            queue.put_nowait(None)
+
+
+class SingleFlight:
+    """At most one pipeline per key; identical concurrent requests attach to it
+
+    Every caller gets the pipeline's result or its exception. Callers are
+    counted the moment they start or join a flight (not when they reach
+    wait()), so a leader leaving early cannot cancel a pipeline a follower
+    has just joined. A caller that goes away only detaches; the pipeline is
+    cancelled when its last caller leaves. Finished flights are forgotten at
+    once, so a later request (or a retry after an error) starts afresh.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.flights: Dict[Hashable, Flight] = {}
+        self.started = 0
+        self.joined = 0
+        self.abandoned = 0
+
+    @classmethod
+    def from_env(cls) -> "SingleFlight":
+        return cls(os.getenv("COALESCE_ENABLED", "true").lower() == "true")
+
+    def get(self, key: Hashable) -> Optional[Flight]:
+        """Join the running flight for key, if any; the caller must then wait() on it"""
+        flight = self.flights.get(key)
+        if flight is None or flight.task.done():
+            return None
+        flight.waiters += 1
+        self.joined += 1
+        return flight
+
+    def start(self, key: Hashable, run: Callable[[Flight], Awaitable]) -> Flight:
+        """Run run(flight) in a new task, led by the caller, who must then wait() on it
+
+        The task copies the caller's context (and request trace).
+        """
+        flight = Flight(key)
+        flight.waiters = 1
+        flight.task = asyncio.create_task(run(flight))
+        flight.task.add_done_callback(flight._close)
+        flight.task.add_done_callback(lambda _task: self._forget(flight))
+        if self.enabled:
+            self.flights[key] = flight
+        self.started += 1
+        return flight
+
+    def _forget(self, flight: Flight):
+        if self.flights.get(flight.key) is flight:
+            del self.flights[flight.key]
+
+    async def wait(self, flight: Flight):
+        """The flight's result; cancelling this only detaches the caller"""
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to read the answer: stop paying for the upstream calls
+                self._forget(flight)
+                self.abandoned += 1
+                flight.task.cancel()
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self.flights),
+            "started": self.started,
+            "joined": self.joined,
+            "abandoned": self.abandoned,
+        }
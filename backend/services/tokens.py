@@ -0,0 +1,39 @@
+import logging
+
+import tiktoken
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class TokenCounter:
+    """tiktoken token counting with a ~4 characters/token fallback
+
+    The encoding is loaded on first use, since tiktoken may need to download
+    it; when that fails counts are estimated instead of raising.
+    """
+
+    def __init__(self, encoding_name: str = "cl100k_base"):
+        self.encoding_name = encoding_name
+        self._encoding = None
+        self._encoding_failed = False
+
+    @property
+    def encoding(self):
+        if self._encoding is None and not self._encoding_failed:
+            try:
+                self._encoding = tiktoken.get_encoding(self.encoding_name)
+            except Exception as e:
+                self._encoding_failed = True
+                logger.warning(f"tiktoken encoding {self.encoding_name} unavailable ({e}); estimating tokens")
+        return self._encoding
+
+    def count(self, text: str) -> int:
+        if self.encoding:
+            return len(self.encoding.encode(text))
+        return (len(text) + 3) // 4
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if self.encoding:
+            return self.encoding.decode(self.encoding.encode(text)[:max_tokens])
+        return text[:max_tokens * 4]
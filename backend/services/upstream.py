@@ -0,0 +1,207 @@
+"""
+Upstream provider plumbing: pooled HTTP clients with explicit timeouts, and
+jittered exponential retry of failures that are safe to repeat.
+"""
+import os
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Optional
+import logging
+
+from backend.services import metrics
+from backend.services.admission import RateLimiter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 408/409 are the upstream asking for a retry; the rest are rate limits and server faults
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+# The request never reached the provider, or the connection died before a response
+CONNECTION_ERRORS = ("ConnectError", "ConnectTimeout", "RemoteProtocolError", "ReadError", "PoolTimeout")
+
+
+def make_http_client():
+    """httpx.AsyncClient with keep-alive, a bounded pool and connect/read timeouts (UPSTREAM_* env)"""
+    import httpx
+
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "50")),
+        max_keepalive_connections=int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv("UPSTREAM_KEEPALIVE_SECONDS", "30")),
+    )
+    timeout = httpx.Timeout(
+        read_timeout(),
+        connect=float(os.getenv("UPSTREAM_CONNECT_TIMEOUT_SECONDS", "10")),
+        pool=float(os.getenv("UPSTREAM_POOL_TIMEOUT_SECONDS", "10")),
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+def read_timeout() -> float:
+    """Longest wait for the next bytes of a response (Gemini: the whole call)"""
+    return float(os.getenv("UPSTREAM_READ_TIMEOUT_SECONDS", "60"))
+
+
+def pool_stats(http_client) -> Dict:
+    """Open and idle connections of an httpx.AsyncClient's pool"""
+    pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    return {
+        "connections": len(connections),
+        "idle": sum(1 for connection in connections if connection.is_idle()),
+        "max_connections": getattr(pool, "_max_connections", None),
+        "max_keepalive": getattr(pool, "_max_keepalive_connections", None),
+    }
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    # openai.APIStatusError.status_code; google.api_core errors carry the HTTP equivalent in .code
+    for attribute in ("status_code", "code"):
+        value = getattr(exc, attribute, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def _is_own_timeout(exc: BaseException) -> bool:
+    # A call that timed out may still have run upstream, so it is not retried
+    if isinstance(exc, asyncio.TimeoutError):
+        return True
+    return type(exc).__name__ in ("APITimeoutError", "DeadlineExceeded", "ReadTimeout")
+
+
+def classify(exc: BaseException) -> Optional[str]:
+    """Retry reason ("429", "503", "connect", ...) or None when the failure must not be retried"""
+    if _is_own_timeout(exc):
+        return None
+    status = _status_code(exc)
+    if status is not None:
+        return str(status) if status in RETRYABLE_STATUS else None
+    cause = exc
+    while cause is not None:
+        if type(cause).__name__ in CONNECTION_ERRORS:
+            return "connect"
+        cause = cause.__cause__ or cause.__context__
+    return None
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds the upstream asked us to wait: Retry-After / retry-after-ms headers or a gRPC RetryInfo"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            parsed = email.utils.parsedate_tz(value)
+            if parsed is not None:
+                return max(email.utils.mktime_tz(parsed) - time.time(), 0.0)
+    for detail in getattr(exc, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+    return None
+
+
+class Retrier:
+    """Retry retryable upstream failures with full-jitter exponential backoff
+
+    A Retry-After from the upstream replaces the backoff when it is not
+    longer than UPSTREAM_MAX_RETRY_AFTER_SECONDS. No retry is started that
+    could not finish before the caller's deadline. With a limiter, every
+    attempt first waits for its rate budget, and a Retry-After holds the
+    limiter for all callers.
+    """
+
+    def __init__(self, max_retries: int = 2, base_delay: float = 0.5, max_delay: float = 8.0, max_retry_after: float = 30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self._stats: Dict[str, Dict[str, Any]] = defaultdict(
+            lambda: {"calls": 0, "retries": 0, "retry_reasons": defaultdict(int), "gave_up": 0, "timeouts": 0, "backoff_seconds": 0.0}
+        )
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Retrier":
+        return cls(
+            max_retries=int(os.getenv("UPSTREAM_MAX_RETRIES", "2")),
+            base_delay=float(os.getenv("UPSTREAM_BACKOFF_BASE_SECONDS", "0.5")),
+            max_delay=float(os.getenv("UPSTREAM_BACKOFF_MAX_SECONDS", "8")),
+            max_retry_after=float(os.getenv("UPSTREAM_MAX_RETRY_AFTER_SECONDS", "30")),
+        )
+
+    def backoff(self, retry: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+    def _count(self, upstream: str, key: str, amount=1):
+        with self._lock:
+            self._stats[upstream][key] += amount
+
+    async def call(
+        self,
+        upstream: str,
+        make_call: Callable[[], Awaitable],
+        deadline: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        limiter: Optional[RateLimiter] = None,
+        cost: int = 0,
+    ):
+        """Await make_call(), retrying it on retryable failures; deadline is a time.monotonic() value
+
+        Raises RateLimited when the limiter has no budget before the deadline.
+        """
+        max_retries = self.max_retries if max_retries is None else max_retries
+        self._count(upstream, "calls")
+        retry = 0
+        while True:
+            if limiter is not None:
+                await limiter.acquire(cost, deadline)
+            try:
+                return await make_call()
+            except Exception as exc:
+                if _is_own_timeout(exc):
+                    self._count(upstream, "timeouts")
+                reason = classify(exc)
+                if reason is None:
+                    raise
+                requested = retry_after(exc)
+                if limiter is not None and requested is not None:
+                    limiter.hold(requested)
+                delay = self.backoff(retry) if requested is None else requested
+                out_of_time = deadline is not None and time.monotonic() + delay >= deadline
+                if retry >= max_retries or out_of_time or delay > self.max_retry_after:
+                    self._count(upstream, "gave_up")
+                    metrics.UPSTREAM_FAILURES.inc(upstream=upstream, reason=reason)
+                    raise
+
+                retry += 1
+                with self._lock:
+                    stats = self._stats[upstream]
+                    stats["retries"] += 1
+                    stats["retry_reasons"][reason] += 1
+                    stats["backoff_seconds"] += delay
+                metrics.UPSTREAM_RETRIES.inc(upstream=upstream, reason=reason)
+                logger.warning(
+                    "%s failed (%s); retry %s/%s in %.2fs%s",
+                    upstream, reason, retry, max_retries, delay, " (Retry-After)" if requested is not None else "",
+                )
+                await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                upstream: {**stats, "retry_reasons": dict(stats["retry_reasons"]), "backoff_seconds": round(stats["backoff_seconds"], 3)}
+                for upstream, stats in self._stats.items()
+            }
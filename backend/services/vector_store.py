@@ -0,0 +1,526 @@
+import os
+import json
+import uuid
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+VECTOR_STORES = ("chroma", "numpy")
+
+
+def create_vector_store(collection_name: str, backend: Optional[str] = None) -> "VectorStore":
+    """The VECTOR_STORE backend: "chroma" (default) or "numpy" """
+    backend = (backend or os.getenv("VECTOR_STORE", "chroma")).lower()
+    if backend == "chroma":
+        return ChromaVectorStore(os.getenv("CHROMA_DB_PATH", "./chroma_db"), collection_name)
+    if backend == "numpy":
+        path = os.getenv("VECTOR_STORE_PATH") or os.path.join("vector_store", collection_name)
+        return NumpyVectorStore(path, dtype=os.getenv("VECTOR_STORE_DTYPE", "float32"))
+    raise ValueError(f"VECTOR_STORE must be one of {', '.join(VECTOR_STORES)}, got {backend!r}")
+
+
+class VectorStore(ABC):
+    """Chunk embeddings with their text and metadata, searchable by embedding
+
+    `query` returns, per query embedding, up to n_results hits best-first as
+    {"id", "document", "metadata", "distance"}; distance is squared L2, as in
+    Chroma's default space. `where` filters take the Chroma form
+    {"source": filename}.
+    """
+
+    name = "base"
+
+    @property
+    @abstractmethod
+    def version(self) -> str:
+        """Opaque stamp that changes whenever the contents change (as of the last refresh)"""
+
+    @abstractmethod
+    def refresh(self) -> str:
+        """Pick up writes another process has saved; returns the version
+
+        Reads storage, so call it off the event loop.
+        """
+
+    @abstractmethod
+    def bump_version(self) -> str:
+        """Record (and persist) a new version once a set of writes is complete"""
+
+    @abstractmethod
+    def count(self, where: Optional[Dict] = None) -> int:
+        pass
+
+    @abstractmethod
+    def upsert(self, ids: List[str], embeddings: np.ndarray, documents: List[str], metadatas: List[Dict]):
+        pass
+
+    @abstractmethod
+    def delete(self, where: Dict):
+        pass
+
+    @abstractmethod
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        include_embeddings: bool = False,
+    ) -> Dict:
+        """{"ids", "documents", "metadatas"} (plus "embeddings" when asked for)"""
+
+    @abstractmethod
+    def query(self, embeddings: np.ndarray, n_results: int = 5, where: Optional[Dict] = None) -> List[List[Dict]]:
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+
+class _ChromaGeneration:
+    """A chromadb client with its collection, and the store operations using it"""
+
+    def __init__(self, client, collection):
+        self.client = client
+        # Clients for a path share one cached System; keep ours to stop it
+        self.system = client._system
+        self.collection = collection
+        self.users = 0
+        self.retired = False
+
+
+class ChromaVectorStore(VectorStore):
+    """A chromadb PersistentClient collection (SQLite + HNSW)
+
+    A Collection object caches its metadata, and the client keeps the HNSW
+    index it loaded in memory. Neither sees writes from another process
+    (init_documents.py). refresh() re-reads the version from SQLite and,
+    when another process has changed it, opens a new client to load the new
+    index. Operations already running finish on the old client, whose
+    System is stopped once the last of them returns.
+    """
+
+    name = "chroma"
+
+    def __init__(self, path: str, collection_name: str):
+        import chromadb
+
+        self.path = path
+        self.collection_name = collection_name
+        self._lock = threading.Lock()
+        client = chromadb.PersistentClient(path=path)
+        try:
+            collection = client.get_collection(name=collection_name)
+            logger.info(f"Loaded existing collection: {collection_name}")
+        except Exception:
+            collection = client.create_collection(name=collection_name)
+            logger.info(f"Created new collection: {collection_name}")
+        self._generation = _ChromaGeneration(client, collection)
+        self._version = self._metadata_version(collection)
+
+    @staticmethod
+    def _metadata_version(collection) -> str:
+        return (collection.metadata or {}).get("ingest_version", "initial")
+
+    @contextmanager
+    def _using(self):
+        """The current generation, kept alive until the block ends"""
+        with self._lock:
+            generation = self._generation
+            generation.users += 1
+        try:
+            yield generation
+        finally:
+            with self._lock:
+                generation.users -= 1
+                stop = generation.retired and generation.users == 0
+            if stop:
+                generation.system.stop()
+
+    @property
+    def version(self) -> str:
+        return self._version
+
+    def refresh(self) -> str:
+        try:
+            with self._using() as generation:
+                # A fresh Collection object reads the metadata from SQLite
+                version = self._metadata_version(generation.client.get_collection(name=self.collection_name))
+        except Exception as e:
+            # Another process may be between delete_collection and create_collection
+            logger.warning(f"Could not read the version of {self.collection_name}: {str(e)}")
+            return self._version
+        if version != self._version:
+            self._reopen()
+            self._version = version
+            logger.info(f"Collection {self.collection_name} changed in another process; reloaded it")
+        return self._version
+
+    def _reopen(self):
+        """Open a new client, whose segments load what is on disk, and retire the old one"""
+        import chromadb
+
+        self._generation.client.clear_system_cache()
+        client = chromadb.PersistentClient(path=self.path)
+        generation = _ChromaGeneration(client, client.get_collection(name=self.collection_name))
+        with self._lock:
+            old, self._generation = self._generation, generation
+            old.retired = True
+            stop = old.users == 0
+        if stop:
+            old.system.stop()
+
+    def bump_version(self) -> str:
+        version = uuid.uuid4().hex
+        with self._using() as generation:
+            generation.collection.modify(metadata={"ingest_version": version})
+        self._version = version
+        return version
+
+    def count(self, where: Optional[Dict] = None) -> int:
+        with self._using() as generation:
+            if where is None:
+                return generation.collection.count()
+            return len(generation.collection.get(where=where, include=[])["ids"])
+
+    def upsert(self, ids: List[str], embeddings: np.ndarray, documents: List[str], metadatas: List[Dict]):
+        with self._using() as generation:
+            # Chroma 0.4 validates embeddings as Python lists
+            generation.collection.upsert(
+                ids=ids, embeddings=np.asarray(embeddings).tolist(), documents=documents, metadatas=metadatas
+            )
+
+    def delete(self, where: Dict):
+        with self._using() as generation:
+            generation.collection.delete(where=where)
+
+    def get(self, ids=None, where=None, limit=None, include_embeddings=False) -> Dict:
+        include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+        with self._using() as generation:
+            stored = generation.collection.get(ids=ids, where=where, limit=limit, include=include)
+        result = {"ids": stored["ids"], "documents": stored["documents"], "metadatas": stored["metadatas"]}
+        if include_embeddings:
+            result["embeddings"] = stored["embeddings"]
+        return result
+
+    def query(self, embeddings: np.ndarray, n_results: int = 5, where: Optional[Dict] = None) -> List[List[Dict]]:
+        with self._using() as generation:
+            results = generation.collection.query(
+                query_embeddings=np.asarray(embeddings).tolist(),
+                n_results=n_results,
+                where=where,
+            )
+        hits = []
+        for row in range(len(embeddings)):
+            documents = results["documents"][row] if results["documents"] else []
+            hits.append([
+                {
+                    "id": results["ids"][row][i],
+                    "document": document,
+                    "metadata": results["metadatas"][row][i],
+                    "distance": results["distances"][row][i] if results.get("distances") else None,
+                }
+                for i, document in enumerate(documents)
+            ])
+        return hits
+
+    def clear(self):
+        with self._using() as generation:
+            generation.client.delete_collection(name=self.collection_name)
+            generation.collection = generation.client.create_collection(name=self.collection_name)
+            self._version = self._metadata_version(generation.collection)
+
+
+class _Snapshot(NamedTuple):
+    """Immutable view of the store; writers swap in a new one"""
+
+    matrix: np.ndarray
+    ids: List[str]
+    documents: List[str]
+    metadatas: List[Dict]
+    sources: np.ndarray
+    rows: Dict[str, int]
+    version: str
+
+
+class NumpyVectorStore(VectorStore):
+    """Exact search over unit-normalized embeddings in a memory-mapped .npy file
+
+    Embeddings live in VECTOR_STORE_PATH/embeddings-<version>.npy (float32
+    or float16) next to a meta.json holding ids, documents and metadata.
+    Every uvicorn worker maps the same file read-only, so the pages are
+    shared; a search is one matrix product over all rows. Upserts are
+    buffered and merged into a new in-memory snapshot in one copy, on the
+    next read or on bump_version(), which saves it as a new file; other
+    processes map it on their next refresh().
+    """
+
+    name = "numpy"
+    META_FILE = "meta.json"
+    # Rows converted to float32 at a time when the matrix is stored as float16
+    BLOCK_ROWS = 16384
+    # Embedding files kept on disk, the current one included
+    KEEP_GENERATIONS = 3
+
+    def __init__(self, path: str, dtype: str = "float32"):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"VECTOR_STORE_DTYPE must be float32 or float16, got {dtype!r}")
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+        self._meta_mtime = None
+        self._dirty = False
+        # Upsert batches not merged into the snapshot yet
+        self._pending: List[tuple] = []
+        self._state = self._empty_snapshot("initial")
+        self._reload()
+        logger.info(f"Loaded numpy vector store with {len(self._state.ids)} chunks from {self.path}")
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.path, self.META_FILE)
+
+    def _empty_snapshot(self, version: str, dimension: int = 0) -> _Snapshot:
+        return _Snapshot(np.zeros((0, dimension), dtype=self.dtype), [], [], [], np.array([], dtype=object), {}, version)
+
+    @staticmethod
+    def _snapshot(matrix, ids, documents, metadatas, version) -> _Snapshot:
+        sources = np.array([metadata.get("source", "unknown") for metadata in metadatas], dtype=object)
+        return _Snapshot(matrix, ids, documents, metadatas, sources, {chunk_id: i for i, chunk_id in enumerate(ids)}, version)
+
+    def _reload(self):
+        """Map the latest saved generation if another process wrote one"""
+        try:
+            mtime = os.stat(self.meta_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._meta_mtime or self._dirty:
+            return
+        with self._lock:
+            try:
+                meta, matrix = self._read_generation()
+            except FileNotFoundError:
+                # A writer pruned the generation meta.json named before it was
+                # mapped; meta.json has moved on by then, so read it again
+                mtime = os.stat(self.meta_path).st_mtime_ns
+                meta, matrix = self._read_generation()
+            self._state = self._snapshot(matrix, meta["ids"], meta["documents"], meta["metadatas"], meta["version"])
+            self._meta_mtime = mtime
+
+    def _read_generation(self):
+        with open(self.meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        return meta, self._load_matrix(meta["matrix"], len(meta["ids"]))
+
+    def _current(self) -> _Snapshot:
+        if self._pending:
+            with self._lock:
+                self._merge_pending()
+        return self._state
+
+    @property
+    def version(self) -> str:
+        return self._state.version
+
+    def refresh(self) -> str:
+        self._reload()
+        return self._state.version
+
+    def bump_version(self) -> str:
+        with self._lock:
+            self._merge_pending()
+            state = self._state._replace(version=uuid.uuid4().hex)
+            self._state = self._save(state)
+            self._dirty = False
+        return state.version
+
+    def _save(self, state: _Snapshot) -> _Snapshot:
+        """Write a new generation atomically, then map it in place of the in-memory copy"""
+        os.makedirs(self.path, exist_ok=True)
+        matrix_file = f"embeddings-{state.version}.npy"
+        tmp_path = os.path.join(self.path, f"{matrix_file}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(state.matrix, dtype=self.dtype))
+        os.replace(tmp_path, os.path.join(self.path, matrix_file))
+
+        meta = {
+            "version": state.version,
+            "matrix": matrix_file,
+            "dtype": self.dtype.name,
+            "ids": state.ids,
+            "documents": state.documents,
+            "metadatas": state.metadatas,
+        }
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, self.meta_path)
+        self._meta_mtime = os.stat(self.meta_path).st_mtime_ns
+
+        self._prune(matrix_file)
+        return state._replace(matrix=self._load_matrix(matrix_file, len(state.ids)))
+
+    def _prune(self, current: str):
+        """Delete all but the newest KEEP_GENERATIONS embedding files
+
+        Another worker may have read a meta.json naming a recent generation
+        and not have mapped it yet, so those stay. A file still mapped
+        elsewhere cannot be deleted on Windows; it goes on a later save.
+        """
+        older = sorted(
+            (
+                entry for entry in os.scandir(self.path)
+                if entry.name.startswith("embeddings-") and entry.name.endswith(".npy") and entry.name != current
+            ),
+            key=lambda entry: entry.stat().st_mtime_ns,
+            reverse=True,
+        )
+        for entry in older[self.KEEP_GENERATIONS - 1:]:
+            try:
+                os.remove(entry.path)
+            except OSError as e:
+                logger.debug(f"Keeping {entry.name} for now: {str(e)}")
+
+    def _load_matrix(self, matrix_file: str, rows: int) -> np.ndarray:
+        # An empty array has no data pages to map
+        return np.load(os.path.join(self.path, matrix_file), mmap_mode="r" if rows else None)
+
+    @staticmethod
+    def _source_filter(where: Optional[Dict]) -> Optional[str]:
+        if not where:
+            return None
+        if set(where) != {"source"}:
+            raise ValueError(f"NumpyVectorStore only supports {{'source': ...}} filters, got {where}")
+        return where["source"]
+
+    def count(self, where: Optional[Dict] = None) -> int:
+        state = self._current()
+        source = self._source_filter(where)
+        return len(state.ids) if source is None else int((state.sources == source).sum())
+
+    def upsert(self, ids: List[str], embeddings: np.ndarray, documents: List[str], metadatas: List[Dict]):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        with self._lock:
+            self._pending.append((list(ids), vectors, list(documents), list(metadatas)))
+            self._dirty = True
+
+    def _merge_pending(self):
+        """Fold the buffered upserts into a new snapshot, copying the matrix once (hold _lock)"""
+        if not self._pending:
+            return
+        state = self._state
+        rows = dict(state.rows)
+        all_ids, all_documents, all_metadatas = list(state.ids), list(state.documents), list(state.metadatas)
+        updated: Dict[int, np.ndarray] = {}
+        for ids, vectors, documents, metadatas in self._pending:
+            for chunk_id, vector, document, metadata in zip(ids, vectors, documents, metadatas):
+                row = rows.setdefault(chunk_id, len(all_ids))
+                if row == len(all_ids):
+                    all_ids.append(chunk_id)
+                    all_documents.append(document)
+                    all_metadatas.append(metadata)
+                else:
+                    all_documents[row] = document
+                    all_metadatas[row] = metadata
+                updated[row] = vector
+
+        dimension = self._pending[0][1].shape[1]
+        matrix = np.empty((len(all_ids), dimension), dtype=self.dtype)
+        if state.ids:
+            matrix[:len(state.ids)] = state.matrix
+        for row, vector in updated.items():
+            matrix[row] = vector
+        self._state = self._snapshot(matrix, all_ids, all_documents, all_metadatas, state.version)
+        self._pending = []
+
+    def delete(self, where: Dict):
+        source = self._source_filter(where)
+        with self._lock:
+            self._merge_pending()
+            state = self._state
+            keep = np.flatnonzero(state.sources != source)
+            if len(keep) == len(state.ids):
+                return
+            self._state = self._snapshot(
+                np.array(state.matrix[keep], dtype=self.dtype),
+                [state.ids[i] for i in keep],
+                [state.documents[i] for i in keep],
+                [state.metadatas[i] for i in keep],
+                state.version,
+            )
+            self._dirty = True
+
+    def get(self, ids=None, where=None, limit=None, include_embeddings=False) -> Dict:
+        state = self._current()
+        source = self._source_filter(where)
+        if ids is not None:
+            rows = [state.rows[chunk_id] for chunk_id in ids if chunk_id in state.rows]
+        else:
+            rows = range(len(state.ids)) if source is None else np.flatnonzero(state.sources == source)
+        rows = list(rows)[:limit] if limit is not None else list(rows)
+        result = {
+            "ids": [state.ids[i] for i in rows],
+            "documents": [state.documents[i] for i in rows],
+            "metadatas": [state.metadatas[i] for i in rows],
+        }
+        if include_embeddings:
+            result["embeddings"] = np.asarray(state.matrix[rows], dtype=np.float32).tolist()
+        return result
+
+    def _scores(self, matrix: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every row with every query: (rows, queries)"""
+        if matrix.dtype == np.float32:
+            return matrix @ queries.T
+        scores = np.empty((matrix.shape[0], queries.shape[0]), dtype=np.float32)
+        for start in range(0, matrix.shape[0], self.BLOCK_ROWS):
+            block = matrix[start:start + self.BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ queries.T
+        return scores
+
+    def query(self, embeddings: np.ndarray, n_results: int = 5, where: Optional[Dict] = None) -> List[List[Dict]]:
+        state = self._current()
+        queries = np.asarray(embeddings, dtype=np.float32)
+        if not len(state.ids):
+            return [[] for _ in range(len(queries))]
+        queries = queries / np.clip(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12, None)
+        scores = self._scores(state.matrix, queries)
+
+        source = self._source_filter(where)
+        candidates = len(state.ids)
+        if source is not None:
+            mask = state.sources == source
+            scores[~mask] = -np.inf
+            candidates = int(mask.sum())
+        k = min(n_results, candidates)
+        if k == 0:
+            return [[] for _ in range(len(queries))]
+
+        hits = []
+        for column in scores.T:
+            top = np.argpartition(-column, k - 1)[:k]
+            top = top[np.argsort(-column[top], kind="stable")]
+            hits.append([
+                {
+                    "id": state.ids[i],
+                    "document": state.documents[i],
+                    "metadata": state.metadatas[i],
+                    # Squared L2 between unit vectors, comparable with Chroma's distances
+                    "distance": float(2 - 2 * column[i]),
+                }
+                for i in top
+            ])
+        return hits
+
+    def clear(self):
+        with self._lock:
+            self._pending = []
+            dimension = self._state.matrix.shape[1] if self._state.matrix.ndim == 2 else 0
+            self._state = self._empty_snapshot(self._state.version, dimension)
+            self._dirty = True
@@ -0,0 +1,280 @@
+"""
+End-to-end load test of POST /api/chat with no network access.
+Stub Grok (OpenAI chat-completions over HTTP) and Gemini (GenerativeService
+over gRPC) servers run in this process with configurable latency and token
+rates; the real app runs in a child process with its providers pointed at
+them and retrieval served from the local index (run init_documents.py
+first, or use --no-rag). Reports p50/p95/p99, throughput and a per-stage
+breakdown (from the app's Server-Timing header), then checks the scenario's
+limits in load_thresholds.json and exits 1 on a regression.
+
+Usage:
+    python benchmarks/bench_chat_load.py [--scenario smoke]
+    python benchmarks/bench_chat_load.py --scenario dual --update   # re-baseline the limits
+    python benchmarks/bench_chat_load.py --concurrency 64 --mode fast  # ad-hoc run, limits not checked
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath('.'))
+
+import httpx
+
+from stubs import StubGeminiServer, StubOpenAIServer
+
+THRESHOLDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "load_thresholds.json")
+PARAMS = ("concurrency", "requests", "mode", "latency", "tokens_per_second", "reply_tokens", "use_rag")
+QUESTIONS = (
+    "¿Cuáles son los requisitos de elegibilidad del Programa Mentor-Protégé?",
+    "What must a mentor-protégé agreement include?",
+    "¿Cuánto dura un acuerdo Mentor-Protégé?",
+    "How are developmental assistance costs reimbursed?",
+    "What reports does the mentor submit each year?",
+)
+REPLY_WORDS = "el mentor proporciona asistencia técnica y de gestión al protégé durante el acuerdo".split()
+
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def parse_server_timing(header: str) -> dict:
+    """{stage: total ms} from a Server-Timing header"""
+    stages = {}
+    for entry in filter(None, (part.strip() for part in header.split(","))):
+        name, *params = entry.split(";")
+        for param in params:
+            if param.startswith("dur="):
+                stages[name] = stages.get(name, 0.0) + float(param[4:])
+    return stages
+
+
+def serve(args):
+    """Child process: the real app, with the Gemini client bound to the gRPC stub"""
+    import uvicorn
+
+    from backend.main import app
+    from backend.routes import api
+    from stubs import gemini_stub_client
+
+    startup = api.startup
+
+    async def startup_with_stub():
+        await startup()
+        # No await between readiness flipping and this, so no request sees the real client
+        if api.chat_service is not None:
+            api.chat_service.gemini_model._async_client = gemini_stub_client(args.gemini_address)
+
+    api.startup = startup_with_stub
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def start_app(grok_url: str, gemini_address: str, log_file):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = dict(
+        os.environ,
+        GROK_API_KEY="bench",
+        GROK_API_BASE=grok_url,
+        GROK_MODEL="stub-grok",
+        GEMINI_API_KEY="bench",
+        GEMINI_MODEL="stub-gemini",
+        # Every request must reach the providers, and nothing may be downloaded
+        ANSWER_CACHE_ENABLED="false",
+        HF_HUB_OFFLINE="1",
+        TRANSFORMERS_OFFLINE="1",
+    )
+    env.pop("OPENROUTER_API_KEY", None)
+    process = subprocess.Popen(
+        [sys.executable, __file__, "--serve", "--port", str(port), "--gemini-address", gemini_address],
+        env=env,
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_ready(client: httpx.AsyncClient, process, timeout: float = 300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("the app exited during startup")
+        try:
+            response = await client.get("/api/ready")
+            if response.status_code == 200:
+                return response.json()
+            if response.json().get("status") == "failed":
+                raise RuntimeError(f"startup failed: {response.json().get('error')}")
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.25)
+    raise RuntimeError("the app was not ready in time")
+
+
+async def drive(client: httpx.AsyncClient, params: dict, count: int, offset: int = 0):
+    """Send `count` chats from `concurrency` workers; one result dict per request"""
+    results = []
+    next_index = iter(range(offset, offset + count))
+
+    async def worker():
+        for i in next_index:
+            # Unique questions so the retrieval cache does not serve repeats
+            body = {
+                "message": f"{QUESTIONS[i % len(QUESTIONS)]} (#{i})",
+                "use_rag": params["use_rag"],
+                "verification_mode": params["mode"],
+            }
+            start = time.perf_counter()
+            try:
+                response = await client.post("/api/chat", json=body)
+                payload = response.json() if response.status_code == 200 else {}
+                ok = response.status_code == 200 and not payload.get("response", "").startswith("Error")
+                stages = parse_server_timing(response.headers.get("Server-Timing", ""))
+            except httpx.HTTPError:
+                ok, stages = False, {}
+            results.append({"ms": (time.perf_counter() - start) * 1000, "ok": ok, "stages": stages})
+
+    await asyncio.gather(*[worker() for _ in range(params["concurrency"])])
+    return results
+
+
+async def run(params: dict, log_file):
+    reply = " ".join(REPLY_WORDS[i % len(REPLY_WORDS)] for i in range(params["reply_tokens"]))
+    stub = dict(latency=params["latency"], reply=reply, tokens_per_second=params["tokens_per_second"])
+    with StubOpenAIServer(**stub) as grok, StubGeminiServer(**stub) as gemini:
+        process, base_url = start_app(grok.base_url, f"127.0.0.1:{gemini.port}", log_file)
+        limits = httpx.Limits(max_connections=params["concurrency"], max_keepalive_connections=params["concurrency"])
+        try:
+            async with httpx.AsyncClient(base_url=base_url, timeout=600, limits=limits) as client:
+                ready = await wait_ready(client, process)
+                await drive(client, params, params["concurrency"], offset=10_000)
+
+                start = time.perf_counter()
+                results = await drive(client, params, params["requests"])
+                wall = time.perf_counter() - start
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+    return ready, results, wall
+
+
+def summarize(results, wall: float) -> dict:
+    latencies = [result["ms"] for result in results]
+    summary = {
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "rps": len(results) / wall,
+        "error_rate": sum(not result["ok"] for result in results) / len(results),
+    }
+    # Mean ms per request for each stage, in the order stages first appear
+    stages = {}
+    for result in results:
+        for name in result["stages"]:
+            stages.setdefault(name, 0.0)
+    for name in stages:
+        stages[name] = sum(result["stages"].get(name, 0.0) for result in results) / len(results)
+    server_ms = stages.pop("total", 0.0)
+    stages["server, untimed"] = server_ms - sum(stages.values())
+    stages["outside handler"] = statistics.mean(latencies) - server_ms
+    summary["stages"] = stages
+    return summary
+
+
+def check(summary: dict, limits: dict) -> list:
+    failures = []
+    for key in ("p50_ms", "p95_ms", "p99_ms", "error_rate"):
+        if key in limits and summary[key] > limits[key]:
+            failures.append(f"{key} {summary[key]:.3f} > {limits[key]}")
+    if "min_rps" in limits and summary["rps"] < limits["min_rps"]:
+        failures.append(f"rps {summary['rps']:.2f} < {limits['min_rps']}")
+    return failures
+
+
+def main(args):
+    with open(THRESHOLDS_FILE) as f:
+        scenarios = json.load(f)
+    if args.scenario not in scenarios:
+        sys.exit(f"Unknown scenario {args.scenario!r}; choose from {', '.join(scenarios)}")
+    scenario = scenarios[args.scenario]
+    overrides = {key: getattr(args, key) for key in PARAMS if getattr(args, key) is not None}
+    params = {**scenario["params"], **overrides}
+
+    with tempfile.NamedTemporaryFile("w+", prefix="bench_chat_load_", suffix=".log", delete=False) as log_file:
+        try:
+            ready, results, wall = asyncio.run(run(params, log_file))
+        except RuntimeError as exc:
+            sys.exit(f"{exc}; app log: {log_file.name}")
+    summary = summarize(results, wall)
+
+    print(
+        f"{params['requests']} chats at concurrency {params['concurrency']}, mode {params['mode']}, "
+        f"rag {'on' if params['use_rag'] else 'off'}; providers {params['latency']:.2f}s to first token, "
+        f"{params['reply_tokens']} tokens at {params['tokens_per_second']:g} tok/s"
+    )
+    print(f"app ready: load {ready['startup_ms']:.0f}ms, warm-up {ready['warmup_ms']:.0f}ms; log {log_file.name}")
+    print(f"{'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'req/s':>7} {'errors':>7}")
+    print(
+        f"{summary['p50_ms']:>9.0f} {summary['p95_ms']:>9.0f} {summary['p99_ms']:>9.0f} "
+        f"{summary['rps']:>7.2f} {summary['error_rate']:>7.1%}"
+    )
+    print(f"{'stage':<16} {'ms/req':>8}")
+    for name, ms in summary["stages"].items():
+        print(f"{name:<16} {ms:>8.1f}")
+
+    if overrides:
+        print("Custom parameters: limits not checked")
+        return 0
+    if args.update:
+        scenario["limits"] = {
+            "p50_ms": round(summary["p50_ms"] * (1 + args.margin)),
+            "p95_ms": round(summary["p95_ms"] * (1 + args.margin)),
+            "p99_ms": round(summary["p99_ms"] * (1 + args.margin)),
+            "min_rps": round(summary["rps"] * (1 - args.margin), 2),
+            "max_error_rate": 0.0,
+        }
+        with open(THRESHOLDS_FILE, "w") as f:
+            json.dump(scenarios, f, indent=2)
+            f.write("\n")
+        print(f"Updated limits for {args.scenario}: {scenario['limits']}")
+        return 0
+
+    limits = dict(scenario["limits"])
+    limits["error_rate"] = limits.pop("max_error_rate", 0.0)
+    failures = check(summary, limits)
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    print("FAIL" if failures else f"PASS ({args.scenario} limits)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", default="smoke", help="named parameters + limits in load_thresholds.json")
+    parser.add_argument("--concurrency", type=int)
+    parser.add_argument("--requests", type=int)
+    parser.add_argument("--mode", choices=("fast", "single", "dual", "adaptive", "parallel"))
+    parser.add_argument("--latency", type=float, help="provider time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, help="provider generation rate after the first token")
+    parser.add_argument("--reply-tokens", type=int, help="tokens per provider reply")
+    parser.add_argument("--no-rag", dest="use_rag", action="store_const", const=False)
+    parser.add_argument("--update", action="store_true", help="store this run (plus --margin) as the scenario limits")
+    parser.add_argument("--margin", type=float, default=0.3, help="headroom applied by --update")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--gemini-address", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args)
+    else:
+        sys.exit(main(args))
@@ -0,0 +1,106 @@
+"""
+Compare embedding backends: startup, query encode latency and memory.
+Each backend runs in a fresh process so import cost and RSS are measured
+in isolation. The ONNX variants need `python export_onnx.py` first.
+
+Usage:
+    python benchmarks/bench_embedding_backends.py [--queries 200] [--batch 64]
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath('.'))
+
+VARIANTS = {
+    "torch": {"EMBEDDING_BACKEND": "torch"},
+    "onnx-fp32": {"EMBEDDING_BACKEND": "onnx", "ONNX_QUANTIZED": "false"},
+    "onnx-int8": {"EMBEDDING_BACKEND": "onnx", "ONNX_QUANTIZED": "true"},
+}
+QUERY = "¿Qué requisitos debe cumplir un protégé para participar en el programa Mentor-Protégé?"
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_child(queries: int, batch: int):
+    """Measure the backend selected by the environment; print one JSON line"""
+    start = time.perf_counter()
+    from backend.services.embeddings import load_embedding_model
+
+    model = load_embedding_model(os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"))
+    model.encode([QUERY], show_progress_bar=False)
+    load_s = time.perf_counter() - start
+    loaded_rss = rss_mb()
+
+    latencies = []
+    for i in range(queries):
+        start = time.perf_counter()
+        model.encode([f"{QUERY} {i}"], show_progress_bar=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+
+    chunks = [f"{QUERY} Párrafo {i}. " * 8 for i in range(batch)]
+    start = time.perf_counter()
+    model.encode(chunks, batch_size=batch, show_progress_bar=False)
+    batch_s = time.perf_counter() - start
+
+    print(json.dumps({
+        "load_s": load_s,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "chunks_per_s": batch / batch_s,
+        "rss_mb": loaded_rss,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "vector": model.encode([QUERY], show_progress_bar=False)[0].tolist(),
+    }))
+
+
+def main(args):
+    print(f"{args.queries} single-query encodes, one batch of {args.batch} chunks")
+    print(f"{'backend':<10} {'load (s)':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'chunks/s':>9} {'RSS (MB)':>9} {'peak (MB)':>9} {'cos':>7}")
+    reference = None
+    for name, env in VARIANTS.items():
+        result = subprocess.run(
+            [sys.executable, __file__, "--child", "--queries", str(args.queries), "--batch", str(args.batch)],
+            env={**os.environ, **env, "TOKENIZERS_PARALLELISM": "false"},
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            print(f"{name:<10} failed: {result.stderr.strip().splitlines()[-1]}")
+            continue
+        stats = json.loads(result.stdout.strip().splitlines()[-1])
+        vector = stats.pop("vector")
+        reference = reference or vector
+        dot = sum(a * b for a, b in zip(reference, vector))
+        norms = (sum(a * a for a in reference) * sum(b * b for b in vector)) ** 0.5
+        print(
+            f"{name:<10} {stats['load_s']:>8.2f} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+            f"{stats['chunks_per_s']:>9.1f} {stats['rss_mb']:>9.0f} {stats['peak_rss_mb']:>9.0f} {dot / norms:>7.4f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        import logging
+
+        logging.disable(logging.WARNING)
+        run_child(args.queries, args.batch)
+    else:
+        main(args)
@@ -0,0 +1,77 @@
+"""
+Compare the sequential dual-pass pipeline with parallel drafting + reconcile.
+Runs against local stub providers with injected latency; no API keys needed.
+
+Usage:
+    python benchmarks/bench_pipeline_topology.py [--latency 0.5] [--requests 20] [--concurrency 5]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from openai import AsyncOpenAI
+
+from backend.services.chat_service import ChatService
+from backend.services.provider_pool import ProviderPool
+from stubs import StubGeminiModel, StubOpenAIServer
+
+MODES = ("dual", "adaptive", "single", "parallel")
+
+
+def build_service(base_url: str, latency: float) -> ChatService:
+    for key in ("GROK_API_KEY", "OPENROUTER_API_KEY", "GEMINI_API_KEY"):
+        os.environ.pop(key, None)
+    service = ChatService()
+    service.grok_pool = ProviderPool.from_env(
+        [("stub", AsyncOpenAI(api_key="bench", base_url=base_url), "stub-grok")]
+    )
+    service.gemini_model = StubGeminiModel(latency=latency)
+    service.gemini_model_name = "stub-gemini"
+    return service
+
+
+async def bench_mode(service: ChatService, mode: str, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await service.generate_response(f"question {i}", verification_mode=mode)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(requests)])
+    wall = time.perf_counter() - start
+    return statistics.mean(latencies), max(latencies), requests / wall
+
+
+async def main(args):
+    # Per-pass INFO logs would drown the results table
+    logging.disable(logging.WARNING)
+    with StubOpenAIServer(latency=args.latency) as server:
+        service = build_service(server.base_url, args.latency)
+        await service.generate_response("warm-up", verification_mode="fast")
+
+        print(f"Provider latency {args.latency:.2f}s, {args.requests} requests, concurrency {args.concurrency}")
+        print(f"{'mode':<10} {'calls':>5} {'mean (s)':>9} {'max (s)':>8} {'req/s':>7}")
+        for mode in MODES:
+            grok_before = len(server.requests)
+            gemini_before = len(service.gemini_model.prompts)
+            mean, worst, throughput = await bench_mode(service, mode, args.requests, args.concurrency)
+            calls = (len(server.requests) - grok_before + len(service.gemini_model.prompts) - gemini_before)
+            print(f"{mode:<10} {calls / args.requests:>5.1f} {mean:>9.2f} {worst:>8.2f} {throughput:>7.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.5, help="Injected latency per provider call (s)")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,77 @@
+"""
+Measure retrieval throughput with and without query micro-batching.
+Each simulated chat embeds a distinct question and runs one vector search
+against the existing collection (run init_documents.py first); the
+retrieval cache is disabled so every request does real work.
+
+Usage:
+    python benchmarks/bench_query_batching.py [--requests 256] [--concurrency 1 8 32 64]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from backend.services.rag_service import RAGService
+
+QUESTIONS = [
+    "¿Cuáles son los requisitos de elegibilidad para un protégé?",
+    "What must a mentor include in the semiannual report?",
+    "How long does a mentor-protégé agreement last?",
+    "¿Qué es un acuerdo de asistencia para el desarrollo?",
+    "Which costs are reimbursable under the program?",
+    "What are the eLearning product review steps?",
+]
+
+
+async def bench(rag: RAGService, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            question = f"{QUESTIONS[i % len(QUESTIONS)]} ({i})"
+            embedding = await rag.aembed_query(question)
+            await rag.aquery_by_embedding(embedding, 5)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(requests)])
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return requests / wall, statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+async def main(args):
+    logging.disable(logging.WARNING)
+    os.environ["RETRIEVAL_CACHE_SIZE"] = "0"
+    rag = RAGService()
+    if rag.get_document_count() == 0:
+        sys.exit("The collection is empty; run python init_documents.py first")
+    # Warm the model and Chroma before timing anything
+    await rag.aquery_by_embedding(await rag.aembed_query(QUESTIONS[0]), 5)
+
+    print(f"{args.requests} retrievals per run, window {rag.embed_batcher.window * 1000:.0f}ms, max batch {rag.embed_batcher.max_batch}")
+    print(f"{'concurrency':>11} {'batching':>9} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'mean batch':>10}")
+    for concurrency in args.concurrency:
+        for batching in (False, True):
+            rag.query_batching = batching
+            before = rag.embed_batcher.stats()
+            throughput, p50, p95 = await bench(rag, args.requests, concurrency)
+            after = rag.embed_batcher.stats()
+            batches = after["batches"] - before["batches"]
+            mean_batch = (after["items"] - before["items"]) / batches if batches else 1.0
+            print(f"{concurrency:>11} {'on' if batching else 'off':>9} {throughput:>8.1f} {p50:>9.1f} {p95:>9.1f} {mean_batch:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    asyncio.run(main(parser.parse_args()))
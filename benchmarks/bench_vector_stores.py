@@ -0,0 +1,141 @@
+"""
+Compare vector store backends: open time, query latency, recall and memory.
+The stored chunks of the existing collection (run init_documents.py first)
+are copied, optionally replicated with noise to simulate a larger corpus,
+into a temporary Chroma collection and NumPy stores (float32 and float16).
+Each backend is then measured in a fresh process.
+
+Usage:
+    python benchmarks/bench_vector_stores.py [--replicate 20] [--queries 200]
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from backend.services.vector_store import ChromaVectorStore, NumpyVectorStore, create_vector_store
+
+COLLECTION = "bench_chunks"
+BACKENDS = ("chroma", "numpy-float32", "numpy-float16")
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def open_store(backend: str, workdir: str):
+    if backend == "chroma":
+        return ChromaVectorStore(os.path.join(workdir, "chroma"), COLLECTION)
+    return NumpyVectorStore(os.path.join(workdir, backend), dtype=backend.split("-")[1])
+
+
+def build(workdir: str, replicate: int, queries: int):
+    """Copy the live collection (x replicate) into every backend; save query vectors"""
+    source = create_vector_store(os.getenv("COLLECTION_NAME", "mpp_documents")).get(include_embeddings=True)
+    if not source["ids"]:
+        sys.exit("The collection is empty; run python init_documents.py first")
+    base = np.asarray(source["embeddings"], dtype=np.float32)
+    rng = np.random.default_rng(0)
+
+    for backend in BACKENDS:
+        store = open_store(backend, workdir)
+        for copy in range(replicate):
+            vectors = base if copy == 0 else base + rng.normal(scale=0.05, size=base.shape).astype(np.float32)
+            ids = [f"{chunk_id}#{copy}" for chunk_id in source["ids"]]
+            for start in range(0, len(ids), 1000):
+                end = start + 1000
+                store.upsert(ids[start:end], vectors[start:end], source["documents"][start:end], source["metadatas"][start:end])
+        store.bump_version()
+
+    picks = rng.integers(0, len(base), size=queries)
+    query_vectors = base[picks] + rng.normal(scale=0.1, size=(queries, base.shape[1])).astype(np.float32)
+    np.save(os.path.join(workdir, "queries.npy"), query_vectors)
+    return len(base) * replicate
+
+
+def run_child(backend: str, workdir: str, n_results: int):
+    """Measure one backend; print one JSON line"""
+    baseline = rss_mb()
+    queries = np.load(os.path.join(workdir, "queries.npy"))
+    start = time.perf_counter()
+    store = open_store(backend, workdir)
+    store.query(queries[:1], n_results)
+    open_s = time.perf_counter() - start
+
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = store.query(query[None, :], n_results)[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([hit["id"] for hit in hits])
+    latencies.sort()
+
+    start = time.perf_counter()
+    store.query(queries[:32], n_results)
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    print(json.dumps({
+        "open_s": open_s,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "batch32_ms": batch_ms,
+        "rss_mb": rss_mb() - baseline,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "results": results,
+    }))
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        chunks = build(workdir, args.replicate, args.queries)
+        print(f"{chunks} chunks, {args.queries} single queries + one batch of 32, top {args.n_results}")
+        print(f"{'backend':<14} {'open (s)':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'batch32 (ms)':>12} {'+RSS (MB)':>9} {'peak (MB)':>9} {'recall':>7}")
+        exact = None
+        for backend in ("numpy-float32", "numpy-float16", "chroma"):
+            result = subprocess.run(
+                [sys.executable, __file__, "--child", backend, "--workdir", workdir, "--n-results", str(args.n_results)],
+                capture_output=True,
+                text=True,
+            )
+            if result.returncode != 0:
+                print(f"{backend:<14} failed: {result.stderr.strip().splitlines()[-1]}")
+                continue
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+            ids = stats.pop("results")
+            # numpy-float32 is exact search, so it is the recall reference
+            exact = exact or ids
+            recall = statistics.mean(len(set(a) & set(b)) / len(b) for a, b in zip(ids, exact) if b)
+            print(
+                f"{backend:<14} {stats['open_s']:>8.2f} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+                f"{stats['batch32_ms']:>12.2f} {stats['rss_mb']:>9.1f} {stats['peak_rss_mb']:>9.0f} {recall:>7.3f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replicate", type=int, default=20, help="copies of the collection (with noise)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--n-results", type=int, default=20)
+    parser.add_argument("--child", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        import logging
+
+        logging.disable(logging.WARNING)
+        run_child(args.child, args.workdir, args.n_results)
+    else:
+        main(args)
@@ -0,0 +1,283 @@
+"""
+Local stand-ins for the upstream LLM providers (Grok over HTTP, Gemini over
+gRPC), shared by the load benchmarks and the backend tests.
+No network access or API keys are needed.
+"""
+import asyncio
+import json
+import socket
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _words(reply: str):
+    """Split a reply into streamed deltas; each word counts as one token"""
+    return [word if index == 0 else f" {word}" for index, word in enumerate(reply.split(" "))]
+
+
+def _generation_time(reply: str, tokens_per_second: float) -> float:
+    return len(_words(reply)) / tokens_per_second if tokens_per_second else 0.0
+
+
+class StubOpenAIServer:
+    """OpenAI-compatible chat-completions server with injected latency
+
+    latency is the time to the first token; with tokens_per_second set the
+    reply is then generated at that rate (streamed word by word). A
+    status_code other than 200 fails every request, or only the first
+    `failures` of them, with `headers` (e.g. Retry-After) on the error.
+
+    Usage:
+        with StubOpenAIServer(latency=0.2) as server:
+            client = AsyncOpenAI(api_key="test", base_url=server.base_url)
+    """
+
+    USAGE = {
+        "prompt_tokens": 10,
+        "completion_tokens": 5,
+        "total_tokens": 15,
+        "prompt_tokens_details": {"cached_tokens": 8},
+    }
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        reply: str = "Respuesta del Mentor / Mentor response",
+        status_code: int = 200,
+        tokens_per_second: float = 0.0,
+        failures: Optional[int] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.latency = latency
+        self.reply = reply
+        self.status_code = status_code
+        self.tokens_per_second = tokens_per_second
+        self.failures = failures
+        self.headers = headers or {}
+        self.requests = []
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}/v1"
+        self._server = uvicorn.Server(
+            uvicorn.Config(self._build_app(), host="127.0.0.1", port=self.port, log_level="warning")
+        )
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/v1/chat/completions")
+        async def chat_completions(request: Request):
+            body = await request.json()
+            self.requests.append(body)
+            await asyncio.sleep(self.latency)
+            if self.status_code != 200 and (self.failures is None or len(self.requests) <= self.failures):
+                return JSONResponse(
+                    {"error": {"message": "injected failure", "type": "server_error"}},
+                    status_code=self.status_code,
+                    headers=self.headers,
+                )
+            if body.get("stream"):
+                return StreamingResponse(self._stream(body), media_type="text/event-stream")
+            await asyncio.sleep(_generation_time(self.reply, self.tokens_per_second))
+            return {
+                "id": f"chatcmpl-{len(self.requests)}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": self.reply},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": self.USAGE,
+            }
+
+        return app
+
+    async def _stream(self, body):
+        for index, delta in enumerate(_words(self.reply)):
+            if index and self.tokens_per_second:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            chunk = {
+                "id": f"chatcmpl-{len(self.requests)}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        if body.get("stream_options", {}).get("include_usage"):
+            chunk = {
+                "id": f"chatcmpl-{len(self.requests)}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [],
+                "usage": self.USAGE,
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    def __enter__(self):
+        self._thread.start()
+        deadline = time.time() + 10
+        while not self._server.started:
+            if time.time() > deadline:
+                raise RuntimeError("Stub OpenAI server did not start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+class StubGeminiModel:
+    """Mimics google.generativeai.GenerativeModel.generate_content_async"""
+
+    USAGE = SimpleNamespace(prompt_token_count=20, candidates_token_count=6, cached_content_token_count=0)
+
+    def __init__(self, latency: float = 0.0, reply: str = "Respuesta verificada / Verified response"):
+        self.latency = latency
+        self.reply = reply
+        self.prompts = []
+        self.request_options = []
+
+    async def generate_content_async(self, prompt, stream: bool = False, **kwargs):
+        self.prompts.append(prompt)
+        self.request_options.append(kwargs.get("request_options"))
+        await asyncio.sleep(self.latency)
+        if stream:
+            return self._stream()
+        return SimpleNamespace(text=self.reply, usage_metadata=self.USAGE)
+
+    async def _stream(self):
+        for delta in _words(self.reply):
+            yield SimpleNamespace(text=delta, usage_metadata=self.USAGE)
+
+
+def gemini_stub_client(address: str):
+    """Async GenerativeService client over an insecure channel (create it inside the calling loop)"""
+    import grpc
+    import google.ai.generativelanguage as glm
+    from google.ai.generativelanguage_v1beta.services.generative_service.transports.grpc_asyncio import (
+        GenerativeServiceGrpcAsyncIOTransport,
+    )
+
+    channel = grpc.aio.insecure_channel(address)
+    return glm.GenerativeServiceAsyncClient(transport=GenerativeServiceGrpcAsyncIOTransport(channel=channel))
+
+
+class StubGeminiServer:
+    """Gemini GenerativeService (GenerateContent / StreamGenerateContent) over local gRPC
+
+    The SDK's async calls only use gRPC, so this serves the real wire API
+    and model() returns a genuine GenerativeModel pointed at it. Latency and
+    token pacing work as in StubOpenAIServer.
+
+    Usage:
+        with StubGeminiServer(latency=0.2) as server:
+            model = server.model("stub-gemini")  # inside the event loop that will call it
+    """
+
+    SERVICE = "google.ai.generativelanguage.v1beta.GenerativeService"
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        reply: str = "Respuesta verificada / Verified response",
+        tokens_per_second: float = 0.0,
+    ):
+        self.latency = latency
+        self.reply = reply
+        self.tokens_per_second = tokens_per_second
+        self.prompts = []
+        self.port = None
+        self._loop = None
+        self._stop = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _response(self, text: str):
+        import google.ai.generativelanguage as glm
+
+        return glm.GenerateContentResponse(
+            candidates=[glm.Candidate(index=0, finish_reason="STOP", content=glm.Content(role="model", parts=[glm.Part(text=text)]))],
+            usage_metadata=glm.GenerateContentResponse.UsageMetadata(
+                prompt_token_count=20,
+                candidates_token_count=len(_words(self.reply)),
+                total_token_count=20 + len(_words(self.reply)),
+            ),
+        )
+
+    def _record(self, request):
+        self.prompts.append("".join(part.text for content in request.contents for part in content.parts))
+
+    async def _generate_content(self, request, context):
+        self._record(request)
+        await asyncio.sleep(self.latency + _generation_time(self.reply, self.tokens_per_second))
+        return self._response(self.reply)
+
+    async def _stream_generate_content(self, request, context):
+        self._record(request)
+        await asyncio.sleep(self.latency)
+        for index, delta in enumerate(_words(self.reply)):
+            if index and self.tokens_per_second:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            yield self._response(delta)
+
+    def _run(self):
+        import grpc
+        import google.ai.generativelanguage as glm
+
+        async def serve():
+            self._loop = asyncio.get_running_loop()
+            self._stop = asyncio.Event()
+            server = grpc.aio.server()
+            codec = dict(
+                request_deserializer=glm.GenerateContentRequest.deserialize,
+                response_serializer=glm.GenerateContentResponse.serialize,
+            )
+            server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler(self.SERVICE, {
+                "GenerateContent": grpc.unary_unary_rpc_method_handler(self._generate_content, **codec),
+                "StreamGenerateContent": grpc.unary_stream_rpc_method_handler(self._stream_generate_content, **codec),
+            }),))
+            self.port = server.add_insecure_port("127.0.0.1:0")
+            await server.start()
+            self._ready.set()
+            await self._stop.wait()
+            await server.stop(grace=None)
+
+        asyncio.run(serve())
+
+    def model(self, model_name: str = "stub-gemini"):
+        """A GenerativeModel bound to this server"""
+        import google.generativeai as genai
+
+        model = genai.GenerativeModel(model_name)
+        model._async_client = gemini_stub_client(f"127.0.0.1:{self.port}")
+        return model
+
+    def __enter__(self):
+        self._thread.start()
+        if not self._ready.wait(timeout=10):
+            raise RuntimeError("Stub Gemini server did not start")
+        return self
+
+    def __exit__(self, *exc):
+        self._loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join(timeout=5)
@@ -0,0 +1,77 @@
+"""
+Export the embedding model to ONNX for EMBEDDING_BACKEND=onnx
+    python export_onnx.py                  # fp32 + int8 into ./models/<model>-onnx
+    python export_onnx.py --no-quantize    # fp32 only
+
+After exporting, both variants are checked against the PyTorch model on
+chunks from the existing collection (or built-in sample sentences), so the
+vectors already in ./chroma_db stay valid. Exits non-zero if a variant
+falls below --min-cosine.
+"""
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath('.'))
+
+from backend.services.embeddings import SAMPLE_TEXTS, OnnxEmbeddingModel, default_onnx_dir, export_onnx, min_cosine
+from backend.services.vector_store import create_vector_store
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def parity_texts(limit: int = 64):
+    """Stored chunk texts when a collection exists, otherwise the sample sentences"""
+    try:
+        store = create_vector_store(os.getenv("COLLECTION_NAME", "mpp_documents"))
+        documents = store.get(limit=limit)["documents"]
+        if documents:
+            return documents
+    except Exception as e:
+        logger.info(f"No stored chunks to compare against ({str(e)}); using sample sentences")
+    return SAMPLE_TEXTS
+
+
+def main(argv=None):
+    model_name = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument("--model", default=model_name)
+    parser.add_argument("--output-dir", default=None, help="default: ONNX_MODEL_DIR or ./models/<model>-onnx")
+    parser.add_argument("--no-quantize", action="store_true", help="skip the int8 variant")
+    parser.add_argument("--min-cosine", type=float, default=float(os.getenv("EMBEDDING_PARITY_MIN_COSINE", "0.99")))
+    args = parser.parse_args(argv)
+
+    output_dir = args.output_dir or os.getenv("ONNX_MODEL_DIR") or default_onnx_dir(args.model)
+    export_onnx(args.model, output_dir, quantize=not args.no_quantize)
+
+    from sentence_transformers import SentenceTransformer
+
+    texts = parity_texts()
+    reference = SentenceTransformer(args.model, device="cpu").encode(texts, convert_to_numpy=True, show_progress_bar=False)
+    failed = False
+    for quantized in ([False] if args.no_quantize else [False, True]):
+        candidate = OnnxEmbeddingModel(output_dir, quantized=quantized).encode(texts)
+        similarity = min_cosine(reference, candidate)
+        label = "int8" if quantized else "fp32"
+        logger.info(f"{label}: min cosine vs torch over {len(texts)} texts = {similarity:.5f}")
+        if similarity < args.min_cosine:
+            logger.error(f"{label} export is below --min-cosine {args.min_cosine}; do not serve it")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+    logger.info(f"Set EMBEDDING_BACKEND=onnx (and ONNX_MODEL_DIR={output_dir} if not the default) to use it")
+
+
+if __name__ == "__main__":
+    main()
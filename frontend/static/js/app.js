@@ -12,7 +12,6 @@ const statusElement = document.getElementById('status');
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
     checkHealth();
-    updateDocumentCount();
 
     if (sendBtn) {
         sendBtn.addEventListener('click', sendMessage);
@@ -29,11 +28,17 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 });
 
-// Check API health
+// Check API health (retries while the server is still loading models)
 async function checkHealth() {
     try {
         const response = await fetch(`${API_BASE}/health`);
+        if (response.status === 503) {
+            if (statusElement) statusElement.textContent = 'Starting...';
+            setTimeout(checkHealth, 2000);
+            return;
+        }
         const data = await response.json();
+        updateDocumentCount();
 
         if (!statusElement) return;
 
@@ -69,7 +74,14 @@ async function updateDocumentCount() {
     }
 }
 
-// Send chat message
+// Human-readable labels for pipeline status events
+const STAGE_LABELS = {
+    grok: 'Grok 4 drafting answer',
+    gemini: 'Gemini verifying citations',
+    reconcile: 'Reconciling Grok and Gemini drafts',
+};
+
+// Send chat message (streams the answer from /api/chat/stream)
 async function sendMessage() {
     if (!userInput) return;
 
@@ -93,8 +105,29 @@ async function sendMessage() {
     // Show loading indicator
     const loadingId = addLoadingMessage();
 
+    let sources = null;
+    let replyText = '';
+    let replyElement = null;
+    let renderPending = false;
+
+    // Create the bot bubble on first output, then re-render at most once per frame
+    const renderReply = () => {
+        if (!replyElement) {
+            removeLoadingMessage(loadingId);
+            replyElement = addMessage(replyText, 'bot', sources);
+            return;
+        }
+        if (renderPending) return;
+        renderPending = true;
+        requestAnimationFrame(() => {
+            renderPending = false;
+            replyElement.innerHTML = parseMarkdown(replyText);
+            chatMessages.scrollTop = chatMessages.scrollHeight;
+        });
+    };
+
     try {
-        const response = await fetch(`${API_BASE}/chat`, {
+        const response = await fetch(`${API_BASE}/chat/stream`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -105,17 +138,34 @@ async function sendMessage() {
             })
         });
 
-        if (!response.ok) {
+        if (!response.ok || !response.body) {
             throw new Error(`Request failed: ${response.status}`);
         }
 
-        const data = await response.json();
-
-        // Remove loading indicator
-        removeLoadingMessage(loadingId);
+        await readEventStream(response, (event, data) => {
+            if (event === 'sources') {
+                sources = data;
+                if (sources.length > 0) {
+                    updateLoadingStatus(loadingId, `Found ${sources.length} relevant sources`);
+                }
+            } else if (event === 'status') {
+                const label = STAGE_LABELS[data.stage] || 'Verifying accuracy';
+                updateLoadingStatus(loadingId, `${label} (pass ${data.pass})`);
+            } else if (event === 'token') {
+                replyText += data.text;
+                renderReply();
+            } else if (event === 'done') {
+                // The final text is post-processed server side; it replaces the streamed draft
+                replyText = data.response || 'No response returned.';
+                renderReply();
+            } else if (event === 'error') {
+                throw new Error(data.detail || 'Stream error');
+            }
+        });
 
-        const reply = data?.response || 'No response returned.';
-        addMessage(reply, 'bot', data?.sources);
+        if (!replyElement) {
+            throw new Error('Stream ended without a response');
+        }
 
     } catch (error) {
         console.error('Error sending message:', error);
@@ -131,6 +181,40 @@ async function sendMessage() {
     }
 }
 
+// Read a text/event-stream response body and call onEvent(event, data) per frame
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            const dataLines = [];
+            frame.split('\n').forEach((line) => {
+                if (line.startsWith('event:')) {
+                    event = line.slice(6).trim();
+                } else if (line.startsWith('data:')) {
+                    dataLines.push(line.slice(5).trimStart());
+                }
+            });
+
+            if (dataLines.length > 0) {
+                onEvent(event, JSON.parse(dataLines.join('\n')));
+            }
+        }
+    }
+}
+
 // Simple markdown parser
 function parseMarkdown(text) {
     // Convert markdown to HTML
@@ -200,7 +284,13 @@ function addMessage(text, sender, sources = null) {
             const sourceItem = document.createElement('div');
             sourceItem.className = 'source-item';
             const sourceLabel = source?.source || 'Document';
-            const chunkLabel = source?.chunk !== undefined ? ` (chunk ${source.chunk})` : '';
+            const location = [
+                source?.page ? `p. ${source.page}` : null,
+                source?.section ? `§ ${source.section}` : null,
+            ].filter(Boolean).join(', ');
+            const chunkLabel = location
+                ? ` (${location})`
+                : (source?.chunk !== undefined ? ` (chunk ${source.chunk})` : '');
             sourceItem.textContent = `${index + 1}. ${sourceLabel}${chunkLabel}`;
 
             if (source?.text) {
@@ -222,6 +312,8 @@ function addMessage(text, sender, sources = null) {
 
     // Scroll to bottom
     chatMessages.scrollTop = chatMessages.scrollHeight;
+
+    return messageText;
 }
 
 // Add loading message
@@ -238,6 +330,7 @@ function addLoadingMessage() {
     senderLabel.textContent = 'MPP Expert:';
 
     const statusText = document.createElement('p');
+    statusText.className = 'loading-status';
     statusText.style.cssText = 'margin: 10px 0; color: var(--accent);';
     statusText.textContent = 'Verifying accuracy';
 
@@ -260,6 +353,15 @@ function addLoadingMessage() {
     return loadingId;
 }
 
+// Update the status line of a loading message
+function updateLoadingStatus(loadingId, text) {
+    const loadingElement = document.getElementById(loadingId);
+    const statusText = loadingElement?.querySelector('.loading-status');
+    if (statusText) {
+        statusText.textContent = text;
+    }
+}
+
 // Remove loading message
 function removeLoadingMessage(loadingId) {
     const loadingElement = document.getElementById(loadingId);
@@ -1,10 +1,16 @@
 """
-One-time initialization script to load MPP documents into ChromaDB
-Run this before starting the server for the first time:
-    python init_documents.py
+Load MPP documents into ChromaDB and keep them in sync
+Run this before starting the server, and again whenever documents/ changes:
+    python init_documents.py            # embed new/changed files, drop removed ones
+    python init_documents.py --rebuild  # clear the collection and re-embed everything
+
+Never prompts, so it is safe to run from deploy scripts. Unchanged files are
+detected with a content-hash manifest and skipped.
 """
+import argparse
 import os
 import sys
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -15,6 +21,7 @@ sys.path.insert(0, os.path.abspath('.'))
 
 from backend.services.rag_service import RAGService
 from backend.services.document_processor import DocumentProcessor
+from backend.services.ingest_manifest import IngestManifest
 import logging
 
 logging.basicConfig(
@@ -24,13 +31,30 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def main():
+def scan_documents(documents_dir: str) -> dict:
+    """{filename: sha256} for every supported file in the documents folder"""
+    return {
+        filename: IngestManifest.file_hash(os.path.join(documents_dir, filename))
+        for filename in sorted(os.listdir(documents_dir))
+        if os.path.isfile(os.path.join(documents_dir, filename))
+        and DocumentProcessor.is_supported(filename)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync the documents folder into ChromaDB")
+    parser.add_argument("--rebuild", action="store_true", help="clear the collection and re-embed every document")
+    parser.add_argument("--documents-dir", default="documents")
+    parser.add_argument("--workers", type=int, default=None, help="extraction processes (default: EXTRACT_WORKERS or CPU count)")
+    parser.add_argument("--embed-processes", type=int, default=None, help="embedding processes (default: EMBED_PROCESSES)")
+    args = parser.parse_args(argv)
+
     logger.info("=" * 80)
-    logger.info("MPP Knowledge Base Initialization")
+    logger.info("MPP Knowledge Base Sync")
     logger.info("=" * 80)
 
     # Check if documents directory exists
-    documents_dir = "documents"
+    documents_dir = args.documents_dir
     if not os.path.exists(documents_dir):
         logger.error(f"Documents directory not found: {documents_dir}")
         logger.error("Please create the 'documents/' folder and add your MPP documents")
@@ -38,11 +62,7 @@ def main():
 
     # Check for required documents
     required_docs = ["MPP SOP.pdf", "Appendix I.pdf", "SOP for eLearning Products.docx"]
-    missing_docs = []
-
-    for doc in required_docs:
-        if not os.path.exists(os.path.join(documents_dir, doc)):
-            missing_docs.append(doc)
+    missing_docs = [doc for doc in required_docs if not os.path.exists(os.path.join(documents_dir, doc))]
 
     if missing_docs:
         logger.warning(f"Missing documents: {', '.join(missing_docs)}")
@@ -51,45 +71,71 @@ def main():
     # Initialize RAG service
     logger.info("Initializing RAG service...")
     rag = RAGService()
+    manifest = IngestManifest()
+
+    if args.rebuild:
+        logger.info(f"Rebuilding: clearing {rag.get_document_count()} existing chunks...")
+        rag.clear_collection()
+        manifest.files.clear()
 
-    # Check if already initialized
-    current_count = rag.get_document_count()
-    if current_count > 0:
-        logger.warning(f"Database already contains {current_count} chunks")
-        response = input("Do you want to clear and reinitialize? (yes/no): ")
-        if response.lower() == 'yes':
-            logger.info("Clearing existing database...")
-            rag.clear_collection()
-        else:
-            logger.info("Keeping existing database. Exiting.")
-            sys.exit(0)
-
-    # Process all documents
-    logger.info(f"Processing documents from: {documents_dir}")
-    documents = DocumentProcessor.process_all_documents(documents_dir)
-
-    if not documents:
-        logger.error("No documents were processed!")
+    current = scan_documents(documents_dir)
+    if not current:
+        logger.error("No PDF or DOCX documents found!")
         sys.exit(1)
 
-    # Add to RAG system
-    logger.info("Adding documents to ChromaDB...")
+    plan = manifest.diff(current, rag.ingest_settings)
+    # A manifest entry whose chunks are gone (e.g. chroma_db was deleted) needs re-embedding
+    for filename in list(plan["unchanged"]):
+        if rag.count_document_chunks(filename) != manifest.files[filename]["chunks"]:
+            logger.warning(f"{filename} is missing from the collection; re-embedding")
+            plan["unchanged"].remove(filename)
+            plan["changed"].append(filename)
+
+    logger.info(
+        f"New: {len(plan['new'])}, changed: {len(plan['changed'])}, "
+        f"unchanged: {len(plan['unchanged'])}, removed: {len(plan['removed'])}"
+    )
+
+    for filename in plan["removed"]:
+        deleted = rag.delete_document(filename)
+        manifest.forget(filename)
+        logger.info(f"Removed: {filename} ({deleted} chunks)")
+
+    failed = []
     total_chunks = 0
-    for doc in documents:
-        logger.info(f"Processing: {doc['filename']} ({len(doc['text'])} characters)")
-        chunks = rag.add_document(doc['text'], doc['filename'])
-        total_chunks += chunks
-        logger.info(f"  → Added {chunks} chunks")
+    start = time.perf_counter()
+    # Extraction runs in worker processes while this process embeds, one file at a time
+    file_paths = [os.path.join(documents_dir, filename) for filename in plan["new"] + plan["changed"]]
+    with rag.bulk_ingest(args.embed_processes):
+        for doc in DocumentProcessor.iter_documents(file_paths, args.workers):
+            filename, text = doc["filename"], doc["text"]
+            if not text:
+                failed.append(filename)
+                continue
+            logger.info(f"Processing: {filename} ({len(text)} characters)")
+            chunks = rag.add_document(text, filename, current[filename])
+            manifest.record(filename, current[filename], chunks, rag.ingest_settings)
+            total_chunks += chunks
+            # Save after every file so an interrupted sync resumes where it stopped
+            manifest.save()
+    elapsed = time.perf_counter() - start
+
+    manifest.save()
 
     logger.info("=" * 80)
-    logger.info("✅ Initialization Complete!")
+    logger.info("✅ Sync Complete!")
     logger.info("=" * 80)
-    logger.info(f"Documents loaded: {len(documents)}")
-    logger.info(f"Total chunks: {total_chunks}")
+    logger.info(f"Documents embedded: {len(plan['new']) + len(plan['changed']) - len(failed)}")
+    logger.info(f"Chunks added: {total_chunks} in {elapsed:.1f}s ({total_chunks / elapsed if elapsed else 0:.1f} chunks/s)")
+    logger.info(f"Total chunks in collection: {rag.get_document_count()}")
     logger.info("\nDocuments in knowledge base:")
-    for doc in documents:
-        logger.info(f"  • {doc['filename']}")
+    for filename in sorted(manifest.files):
+        logger.info(f"  • {filename}")
     logger.info("=" * 80)
+
+    if failed:
+        logger.error(f"Could not extract text from: {', '.join(failed)}")
+        sys.exit(1)
     logger.info("\nNext step: Run the server with 'python run.py'")
 
 
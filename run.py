@@ -14,34 +14,12 @@ load_dotenv()
 sys.path.insert(0, os.path.abspath('.'))
 
 from backend.main import app
-from backend.services.rag_service import RAGService
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def check_initialization():
-    """Check if documents are loaded"""
-    try:
-        rag = RAGService()
-        count = rag.get_document_count()
-        if count == 0:
-            logger.warning("=" * 80)
-            logger.warning("WARNING: No documents loaded in the knowledge base!")
-            logger.warning("=" * 80)
-            logger.warning("Please run: python init_documents.py")
-            logger.warning("This will load the MPP documents into ChromaDB")
-            logger.warning("=" * 80)
-            response = input("\nContinue anyway? (yes/no): ")
-            if response.lower() != 'yes':
-                sys.exit(0)
-        else:
-            logger.info(f"Knowledge base loaded: {count} document chunks")
-    except Exception as e:
-        logger.error(f"Error checking initialization: {str(e)}")
-
-
 if __name__ == "__main__":
     # Check environment
     if not (os.getenv("GROK_API_KEY") or os.getenv("OPENROUTER_API_KEY")):
@@ -57,9 +35,6 @@ if __name__ == "__main__":
         logger.error("=" * 80)
         sys.exit(1)
 
-    # Check if documents are loaded
-    check_initialization()
-
     # Start server
     port = int(os.getenv("PORT", 8000))
     host = os.getenv("HOST", "0.0.0.0")
@@ -72,6 +47,7 @@ if __name__ == "__main__":
     print("LLM: Grok 4 (via OpenRouter)")
     print("Embeddings: sentence-transformers/all-MiniLM-L6-v2")
     print("=" * 80)
+    print("Probes: /api/live (process up), /api/ready (models loaded and warm)")
     print("\nPress Ctrl+C to stop the server\n")
 
     try:
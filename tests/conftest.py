@@ -0,0 +1,41 @@
+"""
+Shared fixtures for the API tests.
+"""
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.routes import api
+from stub_providers import StubRAGService, disabled_answer_cache
+
+
+@pytest.fixture
+def ready_client(monkeypatch):
+    """Start the app on the given services and wait until /api/ready; returns its TestClient
+
+    Usage: client = ready_client(chat_service[, rag_service][, answer_cache]).
+    The retriever defaults to a StubRAGService and the answer cache to one
+    that never hits. The app shuts down when the test ends.
+    """
+    clients = []
+
+    def start(chat_service, rag_service=None, answer_cache=None) -> TestClient:
+        rag_service = rag_service or StubRAGService()
+        answer_cache = answer_cache or disabled_answer_cache()
+        monkeypatch.setattr(api, "readiness", {"status": "starting", "startup_ms": None, "warmup_ms": None, "error": None})
+        monkeypatch.setattr(api, "_create_services", lambda: (chat_service, rag_service, answer_cache))
+        client = TestClient(main.app)
+        client.__enter__()
+        clients.append(client)
+        deadline = time.monotonic() + 5
+        while client.get("/api/ready").status_code != 200:
+            if time.monotonic() > deadline:
+                raise AssertionError(f"App never became ready: {api.readiness}")
+            time.sleep(0.02)
+        return client
+
+    yield start
+    for client in clients:
+        client.__exit__(None, None, None)
@@ -0,0 +1,138 @@
+"""
+Local stand-ins for the embedding model and the backend services used by
+the tests. The provider stubs live in benchmarks/stubs.py and are
+re-exported here. No network access or API keys are needed.
+"""
+from types import SimpleNamespace
+
+import numpy as np
+
+from benchmarks.stubs import (  # noqa: F401  (re-exported for the test modules)
+    StubGeminiModel,
+    StubGeminiServer,
+    StubOpenAIServer,
+    _free_port,
+    gemini_stub_client,
+)
+
+
+class StubEmbeddingModel:
+    """Deterministic 8-dimensional vectors; records the size of each encode call"""
+
+    def __init__(self, *args, **kwargs):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=False, show_progress_bar=None):
+        self.calls.append(len(texts))
+        vectors = np.array([[len(text) % 7 + 1, text.count("o") + 1, 1, 2, 3, 4, 5, 6] for text in texts], dtype=np.float64)
+        if normalize_embeddings:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+
+# Service factories shared by the test modules.
+
+DOCUMENT = "\n\n".join(
+    f"Paragraph {i} about mentor and protégé agreements, with enough words to stand alone as a chunk of text."
+    for i in range(40)
+)
+
+
+def make_rag_service(tmp_path, monkeypatch, **env):
+    """RAGService on the stub embedding model, with its stores under tmp_path"""
+    from backend.services import rag_service
+
+    monkeypatch.setattr(rag_service, "load_embedding_model", StubEmbeddingModel)
+    monkeypatch.setenv("CHROMA_DB_PATH", str(tmp_path / "chroma_db"))
+    monkeypatch.setenv("BM25_INDEX_PATH", str(tmp_path / "bm25_index.json"))
+    monkeypatch.setenv("CHUNK_TOKENS", "40")
+    monkeypatch.setenv("CHUNK_MIN_TOKENS", "10")
+    for key, value in env.items():
+        monkeypatch.setenv(key, str(value))
+    return rag_service.RAGService()
+
+
+def delete_in_another_process(tmp_path, filename: str):
+    """RAGService.delete_document() in a separate process, as an init_documents.py sync would"""
+    import os
+    import subprocess
+    import sys
+
+    script = (
+        "import sys\n"
+        "from backend.services import rag_service\n"
+        "from stub_providers import StubEmbeddingModel\n"
+        "rag_service.load_embedding_model = StubEmbeddingModel\n"
+        "assert rag_service.RAGService().delete_document(sys.argv[1])\n"
+    )
+    tests_dir = os.path.dirname(os.path.abspath(__file__))
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([os.path.dirname(tests_dir), tests_dir]),
+        "CHROMA_DB_PATH": str(tmp_path / "chroma_db"),
+        "BM25_INDEX_PATH": str(tmp_path / "bm25_index.json"),
+    }
+    subprocess.run([sys.executable, "-c", script, filename], env=env, check=True)
+
+
+def make_openai_client(base_url: str):
+    """AsyncOpenAI client on the backend's pooled HTTP client, without SDK retries"""
+    from openai import AsyncOpenAI
+
+    from backend.services.upstream import make_http_client
+
+    return AsyncOpenAI(api_key="test", base_url=base_url, max_retries=0, http_client=make_http_client())
+
+
+def make_chat_service(monkeypatch, server: StubOpenAIServer, gemini_latency: float = 0.2):
+    """ChatService calling `server` for Grok and a StubGeminiModel for Gemini"""
+    from openai import AsyncOpenAI
+
+    from backend.services.chat_service import ChatService
+    from backend.services.provider_pool import ProviderPool
+
+    for key in ("GROK_API_KEY", "OPENROUTER_API_KEY", "GEMINI_API_KEY"):
+        monkeypatch.delenv(key, raising=False)
+    service = ChatService()
+    service.grok_pool = ProviderPool.from_env(
+        [("stub", AsyncOpenAI(api_key="test", base_url=server.base_url), "stub-grok")]
+    )
+    service.gemini_model = StubGeminiModel(latency=gemini_latency)
+    service.gemini_model_name = "stub-gemini"
+    return service
+
+
+class StubRAGService:
+    """Retriever that finds nothing, quickly; batch calls are recorded in `batches`"""
+
+    collection_version = 1
+
+    def __init__(self):
+        self.executor = SimpleNamespace(shutdown=lambda **kwargs: None)
+        self.batches = []
+
+    async def aembed_query(self, text):
+        return [0.0]
+
+    async def aembed_queries(self, texts):
+        self.batches.append(len(texts))
+        return [[0.0] for _ in texts]
+
+    async def aretrieve(self, text, embedding, n_results=5):
+        from backend.services import metrics
+
+        metrics.observe("vector_search", 0.002)
+        return [], {"vector_ms": 2.0, "total_ms": 2.0}
+
+    async def aretrieve_many(self, texts, embeddings, n_results=5):
+        return [await self.aretrieve(text, embedding, n_results) for text, embedding in zip(texts, embeddings)]
+
+    def get_document_count(self):
+        return 1
+
+
+def disabled_answer_cache():
+    """Answer cache stand-in that never hits"""
+    return SimpleNamespace(
+        enabled=False, lookup=lambda *args, **kwargs: None, put=lambda *args: None, flush=lambda: None
+    )
@@ -0,0 +1,140 @@
+"""
+Tests for the admission queue, the per-provider rate limiter and the
+429/503 + Retry-After responses of /api/chat.
+"""
+import asyncio
+import time
+
+import openai
+import pytest
+
+from backend.routes import api
+from backend.services.admission import AdmissionQueue, Overloaded, RateLimited, RateLimiter
+from backend.services.tokens import TokenCounter
+from backend.services.upstream import Retrier
+from stub_providers import StubOpenAIServer, make_chat_service, make_openai_client
+
+
+def test_rate_limiter_spaces_requests_then_refuses_past_max_wait():
+    # 10 requests/s with room for one at a time
+    limiter = RateLimiter("grok", rpm=600, burst_seconds=0.1, max_wait=0.15)
+
+    async def run():
+        start = time.perf_counter()
+        await limiter.acquire()
+        await limiter.acquire()
+        await limiter.acquire()
+        elapsed = time.perf_counter() - start
+        with pytest.raises(RateLimited) as refused:
+            await asyncio.gather(limiter.acquire(), limiter.acquire(), limiter.acquire())
+        return elapsed, refused.value
+
+    elapsed, refused = asyncio.run(run())
+
+    assert 0.18 <= elapsed < 0.5
+    assert refused.status == 429 and refused.retry_after > 0.15
+    # Of the three, only the first fits within max_wait
+    assert limiter.stats()["waited"] == 3 and limiter.stats()["refused"] == 2
+
+
+def test_token_budget_is_charged_by_estimated_prompt_size():
+    limiter = RateLimiter("gemini", tpm=60_000, burst_seconds=1, completion_tokens=100, max_wait=0)
+    prompt = "Mentor " * 400
+    cost = limiter.cost([prompt])
+
+    assert cost == TokenCounter().count(prompt) + 100
+    asyncio.run(limiter.acquire(cost))
+    with pytest.raises(RateLimited):
+        asyncio.run(limiter.acquire(cost))
+    assert RateLimiter("grok").cost(["unlimited"]) == 0
+
+
+def test_provider_retry_after_holds_the_limiter():
+    limiter = RateLimiter("grok")
+    with StubOpenAIServer(status_code=429, headers={"Retry-After": "0.2"}) as server:
+        client = make_openai_client(server.base_url)
+
+        async def run():
+            create = lambda: client.chat.completions.create(model="grok", messages=[{"role": "user", "content": "hi"}])
+            with pytest.raises(openai.RateLimitError):
+                await Retrier(max_retries=0).call("grok", create, limiter=limiter)
+            # Every other caller now waits out the provider's Retry-After too
+            start = time.perf_counter()
+            await limiter.acquire()
+            return time.perf_counter() - start
+
+        waited = asyncio.run(run())
+
+    assert 0.15 <= waited < 0.4
+    assert limiter.stats()["waited"] == 1
+
+
+def test_admission_queue_is_fifo_bounded_and_survives_cancellation():
+    queue = AdmissionQueue(max_active=1, max_queue=2, max_wait=1)
+    order = []
+
+    async def hold(name, seconds):
+        async with queue.admit():
+            order.append(name)
+            await asyncio.sleep(seconds)
+
+    async def run():
+        first = asyncio.create_task(hold("first", 0.1))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(hold("second", 0))
+        cancelled = asyncio.create_task(hold("cancelled", 0))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as full:
+            await queue.acquire()
+        assert queue.depth == 2
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        assert queue.depth == 1
+        third = asyncio.create_task(hold("third", 0))
+        await asyncio.gather(first, second, third, return_exceptions=True)
+        return full.value
+
+    full = asyncio.run(run())
+
+    assert order == ["first", "second", "third"]
+    assert full.status == 503 and int(full.headers["Retry-After"]) >= 1
+    assert queue.active == 0 and queue.depth == 0
+    assert queue.stats()["rejected"] == {"queue_full": 1, "timeout": 0}
+
+
+def test_queued_too_long_is_rejected():
+    queue = AdmissionQueue(max_active=1, max_queue=5, max_wait=0.05)
+
+    async def run():
+        await queue.acquire()
+        with pytest.raises(Overloaded):
+            await queue.acquire()
+        queue.release()
+
+    asyncio.run(run())
+    assert queue.active == 0 and queue.stats()["rejected"]["timeout"] == 1
+
+
+def test_chat_answers_429_and_503_with_retry_after(monkeypatch, ready_client):
+    monkeypatch.setenv("ADMISSION_MAX_ACTIVE", "1")
+    monkeypatch.setenv("ADMISSION_MAX_QUEUE", "0")
+    with StubOpenAIServer(latency=0) as server:
+        chat_service = make_chat_service(monkeypatch, server, gemini_latency=0)
+        # One request's worth of budget, and no waiting for more
+        chat_service.grok_pool.providers[0].limiter = RateLimiter("stub", rpm=1, max_wait=0)
+        client = ready_client(chat_service)
+        body = {"message": "hola", "verification_mode": "fast"}
+        allowed = client.post("/api/chat", json=body)
+        limited = client.post("/api/chat", json=body)
+
+        api.admission.active = 1
+        busy = client.post("/api/chat", json=body)
+        busy_stream = client.post("/api/chat/stream", json=body)
+        api.admission.active = 0
+        stats = client.get("/api/admission").json()
+
+    assert allowed.status_code == 200
+    assert limited.status_code == 429 and int(limited.headers["Retry-After"]) >= 30
+    assert busy.status_code == 503 and "Retry-After" in busy.headers
+    assert busy_stream.status_code == 503
+    assert stats["rejected"]["queue_full"] == 2 and stats["active"] == 0
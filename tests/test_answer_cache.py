@@ -0,0 +1,117 @@
+"""
+Tests for the semantic answer cache.
+"""
+import threading
+import time
+
+import numpy as np
+
+from backend.services.answer_cache import SemanticAnswerCache
+from stub_providers import DOCUMENT, delete_in_another_process, make_rag_service
+
+SOURCES = [{"id": "MPP SOP.pdf_0_3", "source": "MPP SOP.pdf", "chunk": 3}]
+OTHER_SOURCES = [{"id": "Appendix I.pdf_0_1", "source": "Appendix I.pdf", "chunk": 1}]
+
+
+def make_cache(monkeypatch, tmp_path, **env) -> SemanticAnswerCache:
+    monkeypatch.setenv("ANSWER_CACHE_PATH", str(tmp_path / "answer_cache.json"))
+    for key, value in env.items():
+        monkeypatch.setenv(key, str(value))
+    return SemanticAnswerCache()
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def test_similar_question_with_same_chunks_hits(monkeypatch, tmp_path):
+    cache = make_cache(monkeypatch, tmp_path)
+    cache.put(unit(1, 0, 0), SOURCES, "answer", "v1")
+
+    assert cache.lookup(unit(1, 0.1, 0), SOURCES, "v1") == "answer"
+    assert cache.lookup(unit(0, 1, 0), SOURCES, "v1") is None
+    assert cache.lookup(unit(1, 0, 0), OTHER_SOURCES, "v1") is None
+    assert cache.lookup(unit(1, 0, 0), SOURCES, "v1", scope="other-mode") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 3
+
+
+def test_lru_eviction(monkeypatch, tmp_path):
+    cache = make_cache(monkeypatch, tmp_path, ANSWER_CACHE_MAX_ENTRIES=2)
+    cache.put(unit(1, 0, 0), SOURCES, "a", "v1")
+    cache.put(unit(0, 1, 0), SOURCES, "b", "v1")
+    cache.lookup(unit(1, 0, 0), SOURCES, "v1")  # "a" becomes most recently used
+    cache.put(unit(0, 0, 1), SOURCES, "c", "v1")
+
+    assert cache.lookup(unit(0, 1, 0), SOURCES, "v1") is None
+    assert cache.lookup(unit(1, 0, 0), SOURCES, "v1") == "a"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry(monkeypatch, tmp_path):
+    cache = make_cache(monkeypatch, tmp_path, ANSWER_CACHE_TTL_SECONDS=60)
+    cache.put(unit(1, 0, 0), SOURCES, "answer", "v1")
+    next(iter(cache.entries.values()))["created"] -= 120
+
+    assert cache.lookup(unit(1, 0, 0), SOURCES, "v1") is None
+
+
+def test_persists_and_invalidates_on_reingest(monkeypatch, tmp_path):
+    cache = make_cache(monkeypatch, tmp_path)
+    cache.put(unit(1, 0, 0), SOURCES, "answer", "v1")
+    cache.flush()
+
+    reloaded = make_cache(monkeypatch, tmp_path)
+    assert reloaded.lookup(unit(1, 0, 0), SOURCES, "v1") == "answer"
+    assert reloaded.lookup(unit(1, 0, 0), SOURCES, "v2") is None
+    assert reloaded.stats()["entries"] == 0
+
+
+def test_saves_are_batched_and_do_not_block_lookups(monkeypatch, tmp_path):
+    cache = make_cache(monkeypatch, tmp_path, ANSWER_CACHE_SAVE_SECONDS=60)
+    writes = []
+    writing, release = threading.Event(), threading.Event()
+    save = cache._save
+
+    def slow_save(version, entries):
+        writes.append(len(entries))
+        writing.set()
+        release.wait(5)
+        save(version, entries)
+
+    cache._save = slow_save
+    for i in range(3):
+        cache.put(unit(1, i, 0), SOURCES, f"answer {i}", "v1")
+    assert writes == [] and not (tmp_path / "answer_cache.json").exists()
+
+    flusher = threading.Thread(target=cache.flush)
+    flusher.start()
+    assert writing.wait(5)
+    # The file is being written; lookups still get the lock straight away
+    start = time.monotonic()
+    assert cache.lookup(unit(1, 0, 0), SOURCES, "v1") == "answer 0"
+    assert time.monotonic() - start < 1
+    release.set()
+    flusher.join()
+
+    assert writes == [3]
+    assert make_cache(monkeypatch, tmp_path).stats()["entries"] == 3
+
+
+def test_answers_are_dropped_after_a_sync_in_another_process(monkeypatch, tmp_path):
+    rag = make_rag_service(tmp_path, monkeypatch, COLLECTION_VERSION_CHECK_SECONDS=0)
+    rag.add_document(DOCUMENT, "doc.docx")
+    rag.add_document("A Protégé is a small business in the Mentor-Protégé Program.", "faq.docx")
+    cache = make_cache(monkeypatch, tmp_path)
+    embedding = rag.embed_query("What is a protégé?")
+    sources = rag.query_by_embedding(embedding, 3)
+    cache.put(embedding, sources, "answer", rag.collection_version)
+    assert cache.lookup(embedding, sources, rag.collection_version) == "answer"
+
+    delete_in_another_process(tmp_path, "doc.docx")
+
+    # The server's next version check sees the sync, so the old answer is not replayed
+    rag.refresh_version()
+    assert cache.lookup(embedding, sources, rag.collection_version) is None
+    assert rag.retrieval_cache.stats()["results"]["entries"] == 0
@@ -0,0 +1,239 @@
+"""
+Concurrency tests for the async chat pipeline.
+Runs against local stub providers, so no API keys or network are needed.
+"""
+import asyncio
+import time
+
+import pytest
+
+from stub_providers import StubGeminiServer, StubOpenAIServer, make_chat_service
+
+PASS_LATENCY = 0.2
+CONCURRENT_CHATS = 10
+
+
+def test_dual_pass_runs_all_four_calls(monkeypatch):
+    with StubOpenAIServer(latency=0) as server:
+        service = make_chat_service(monkeypatch, server)
+        service.gemini_model.latency = 0
+
+        response = asyncio.run(service.generate_response("What is a protege?"))
+
+    assert response == "Respuesta verificada / Verified response"
+    assert len(server.requests) == 2
+    assert len(service.gemini_model.prompts) == 2
+
+
+def test_concurrent_chats_do_not_serialize(monkeypatch):
+    with StubOpenAIServer(latency=PASS_LATENCY) as server:
+        service = make_chat_service(monkeypatch, server)
+
+        async def run():
+            # Warm the HTTP connection pool so the timings compare like with like
+            await service.generate_response("warm-up")
+
+            start = time.perf_counter()
+            await service.generate_response("single")
+            single = time.perf_counter() - start
+
+            start = time.perf_counter()
+            responses = await asyncio.gather(*[
+                service.generate_response(f"question {i}") for i in range(CONCURRENT_CHATS)
+            ])
+            concurrent = time.perf_counter() - start
+            return single, concurrent, responses
+
+        single, concurrent, responses = asyncio.run(run())
+
+    assert all(not r.startswith("Error") for r in responses)
+    # Four passes of PASS_LATENCY each; serialized this would take ~10x as long.
+    assert single >= 4 * PASS_LATENCY
+    assert concurrent < single * 2
+
+
+def test_emit_reports_passes_and_streams_final_pass(monkeypatch):
+    with StubOpenAIServer(latency=0) as server:
+        service = make_chat_service(monkeypatch, server)
+        service.gemini_model.latency = 0
+        events = []
+
+        async def emit(event, data):
+            events.append((event, data))
+
+        response = asyncio.run(service.generate_response("What is a protege?", emit=emit))
+
+    statuses = [(d["stage"], d["pass"]) for e, d in events if e == "status"]
+    assert statuses == [("grok", 1), ("gemini", 1), ("grok", 2), ("gemini", 2)]
+    tokens = [d["text"] for e, d in events if e == "token"]
+    assert len(tokens) > 1
+    assert "".join(tokens) == response
+    # Only the final pass is streamed, so every status event precedes the tokens
+    first_token = next(i for i, (e, _) in enumerate(events) if e == "token")
+    assert all(e == "status" for e, _ in events[:first_token])
+
+
+def test_grok_only_streams_first_pass(monkeypatch):
+    with StubOpenAIServer(latency=0, reply="Mentor answer in parts") as server:
+        service = make_chat_service(monkeypatch, server)
+        service.gemini_model = None
+        events = []
+
+        async def emit(event, data):
+            events.append((event, data))
+
+        response = asyncio.run(service.generate_response("question", emit=emit))
+
+    assert response == "Mentor answer in parts"
+    assert server.requests[0]["stream"] is True
+    assert "".join(d["text"] for e, d in events if e == "token") == response
+
+
+def run_mode(monkeypatch, mode, gemini_reply="Respuesta verificada / Verified response"):
+    with StubOpenAIServer(latency=0) as server:
+        service = make_chat_service(monkeypatch, server)
+        service.gemini_model.latency = 0
+        service.gemini_model.reply = gemini_reply
+        response = asyncio.run(service.generate_response("question", verification_mode=mode))
+    return response, len(server.requests), service.gemini_model.prompts
+
+
+def test_fast_mode_calls_grok_only(monkeypatch):
+    response, grok_calls, gemini_prompts = run_mode(monkeypatch, "fast")
+
+    assert response == "Respuesta del Mentor / Mentor response"
+    assert (grok_calls, len(gemini_prompts)) == (1, 0)
+
+
+def test_single_mode_verifies_once(monkeypatch):
+    response, grok_calls, gemini_prompts = run_mode(monkeypatch, "single")
+
+    assert response == "Respuesta verificada / Verified response"
+    assert (grok_calls, len(gemini_prompts)) == (1, 1)
+
+
+def test_adaptive_mode_stops_on_confirmed_verdict(monkeypatch):
+    response, grok_calls, gemini_prompts = run_mode(
+        monkeypatch, "adaptive", "VEREDICTO: CONFIRMADO\nRespuesta verificada"
+    )
+
+    assert response == "Respuesta verificada"
+    assert (grok_calls, len(gemini_prompts)) == (1, 1)
+    assert "VEREDICTO" in gemini_prompts[0]
+
+
+def test_adaptive_mode_continues_after_corrections(monkeypatch):
+    response, grok_calls, gemini_prompts = run_mode(
+        monkeypatch, "adaptive", "VEREDICTO: CORREGIDO\nRespuesta corregida"
+    )
+
+    assert (grok_calls, len(gemini_prompts)) == (2, 2)
+    assert "VEREDICTO" not in gemini_prompts[1]
+
+
+def test_adaptive_mode_falls_back_to_similarity(monkeypatch):
+    # Gemini echoes Grok's draft without a verdict line: nothing was corrected
+    _, grok_calls, gemini_prompts = run_mode(
+        monkeypatch, "adaptive", "Respuesta del Mentor / Mentor response"
+    )
+    assert (grok_calls, len(gemini_prompts)) == (1, 1)
+
+    _, grok_calls, gemini_prompts = run_mode(monkeypatch, "adaptive", "Something else entirely")
+    assert (grok_calls, len(gemini_prompts)) == (2, 2)
+
+
+def test_parallel_mode_drafts_concurrently_then_reconciles(monkeypatch):
+    with StubOpenAIServer(latency=PASS_LATENCY) as server:
+        service = make_chat_service(monkeypatch, server)
+
+        async def run():
+            await service.generate_response("warm-up", verification_mode="fast")
+            start = time.perf_counter()
+            response = await service.generate_response("question", verification_mode="parallel")
+            return response, time.perf_counter() - start
+
+        response, elapsed = asyncio.run(run())
+
+    assert response == "Respuesta verificada / Verified response"
+    prompts = service.gemini_model.prompts
+    assert len(prompts) == 2
+    assert "Borrador A (Grok 4)" in prompts[1]
+    # Drafts overlap, so only two provider latencies sit on the critical path
+    assert 2 * PASS_LATENCY <= elapsed < 3 * PASS_LATENCY
+
+
+def test_gemini_sdk_over_stub_grpc_server_streams_at_the_token_rate(monkeypatch):
+    with StubOpenAIServer(latency=0) as server, StubGeminiServer(tokens_per_second=50) as gemini:
+        service = make_chat_service(monkeypatch, server)
+        events = []
+
+        async def emit(event, data):
+            events.append((event, data))
+
+        async def run():
+            service.gemini_model = gemini.model()
+            start = time.perf_counter()
+            response = await service.generate_response("question", emit=emit, verification_mode="single")
+            return response, time.perf_counter() - start
+
+        response, elapsed = asyncio.run(run())
+
+    assert response == "Respuesta verificada / Verified response"
+    assert "".join(data["text"] for event, data in events if event == "token") == response
+    assert "question" in gemini.prompts[0]
+    # Five words: four gaps of 1/50s between tokens
+    assert elapsed >= 4 / 50
+    assert service.usage_totals["gemini"]["completion_tokens"] == 5
+
+
+def test_provider_timeout_bounds_the_whole_streamed_pass(monkeypatch):
+    monkeypatch.setenv("PROVIDER_TIMEOUT_SECONDS", "0.5")
+    reply = " ".join(f"word{i}" for i in range(20))
+    # The stream opens at once but takes two seconds to finish
+    with StubOpenAIServer(latency=0, reply=reply, tokens_per_second=10) as server:
+        service = make_chat_service(monkeypatch, server)
+        tokens = []
+
+        async def on_token(delta):
+            tokens.append(delta)
+
+        async def run():
+            start = time.perf_counter()
+            with pytest.raises(RuntimeError, match="timed out"):
+                await service.call_grok("question", on_token=on_token)
+            return time.perf_counter() - start
+
+        elapsed = asyncio.run(run())
+
+    assert 0 < len(tokens) < 20
+    assert elapsed < 1.5
+    # The stall counts against the provider, although the stream had opened
+    provider = service.grok_pool.providers[0]
+    assert provider.failures == 1 and provider.successes == 0
+    assert not provider.probing
+
+
+def test_streamed_pass_succeeds_only_once_the_stream_ends(monkeypatch):
+    with StubOpenAIServer(latency=0, reply="Mentor answer in parts", tokens_per_second=50) as server:
+        service = make_chat_service(monkeypatch, server)
+        provider = service.grok_pool.providers[0]
+        seen = []
+
+        async def on_token(delta):
+            seen.append(provider.successes)
+
+        asyncio.run(service.call_grok("question", on_token=on_token))
+
+    assert seen and set(seen) == {0}
+    assert provider.successes == 1 and provider.failures == 0
+
+
+def test_gemini_deadline_is_the_provider_timeout(monkeypatch):
+    monkeypatch.setenv("PROVIDER_TIMEOUT_SECONDS", "42")
+    with StubOpenAIServer(latency=0) as server:
+        service = make_chat_service(monkeypatch, server)
+        service.gemini_model.latency = 0
+
+        asyncio.run(service.call_gemini_draft("question"))
+
+    assert service.gemini_model.request_options[0]["timeout"] == 42
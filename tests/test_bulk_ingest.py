@@ -0,0 +1,36 @@
+"""
+Tests for batched document ingestion, using a stub embedding model and a
+throwaway Chroma collection.
+"""
+import numpy as np
+
+from stub_providers import DOCUMENT, make_rag_service
+
+
+def test_chunks_are_encoded_and_written_in_fixed_size_batches(tmp_path, monkeypatch):
+    rag = make_rag_service(tmp_path, monkeypatch, INGEST_BATCH_SIZE=8)
+
+    added = rag.add_document(DOCUMENT, "doc.docx")
+
+    assert added > 8
+    assert rag.embedding_model.calls == [8] * (added // 8) + ([added % 8] if added % 8 else [])
+    assert rag.count_document_chunks("doc.docx") == added
+
+    stored = rag.store.get(include_embeddings=True)["embeddings"]
+    assert np.allclose(np.linalg.norm(np.array(stored), axis=1), 1.0, atol=1e-5)
+
+
+def test_re_adding_a_document_replaces_its_chunks(tmp_path, monkeypatch):
+    rag = make_rag_service(tmp_path, monkeypatch, INGEST_BATCH_SIZE=8)
+
+    first = rag.add_document(DOCUMENT, "doc.docx")
+    second = rag.add_document(DOCUMENT + "\n\nOne more closing paragraph.", "doc.docx")
+
+    assert rag.get_document_count() == second >= first
+
+
+def test_normalization_is_part_of_the_ingest_settings(tmp_path, monkeypatch):
+    rag = make_rag_service(tmp_path, monkeypatch, EMBED_NORMALIZE="false")
+
+    assert rag.ingest_settings["normalize"] is False
+    assert rag.encode(["a", "bb"]).dtype == np.float32
@@ -0,0 +1,88 @@
+"""
+Bulk question tests: batched retrieval in RAGService, and /api/chat/batch
+streaming NDJSON results in completion order under its concurrency cap
+(stub providers and a stub retriever).
+"""
+import asyncio
+import json
+
+from stub_providers import DOCUMENT, StubOpenAIServer, StubRAGService, make_chat_service, make_rag_service
+
+QUESTIONS = ["Paragraph 3 about mentor agreements", "protégé eligibility", "Paragraph 3 about mentor agreements"]
+
+
+def test_batch_retrieval_encodes_and_searches_once(tmp_path, monkeypatch):
+    rag = make_rag_service(tmp_path, monkeypatch, RETRIEVAL_CACHE_SIZE=0)
+    rag.add_document(DOCUMENT, "doc.docx")
+    rag.embedding_model.calls.clear()
+    searches = []
+    query = rag.store.query
+    monkeypatch.setattr(rag.store, "query", lambda embeddings, *args: searches.append(len(embeddings)) or query(embeddings, *args))
+
+    async def run():
+        embeddings = await rag.aembed_queries(QUESTIONS)
+        batch = await rag.aretrieve_many(QUESTIONS, embeddings, n_results=3)
+        single = [await rag.aretrieve(text, embedding, n_results=3) for text, embedding in zip(QUESTIONS, embeddings)]
+        return embeddings, batch, single
+
+    embeddings, batch, single = asyncio.run(run())
+
+    # The repeated question is encoded once, and all three share one store query
+    assert rag.embedding_model.calls == [2]
+    assert searches[0] == 3
+    assert embeddings[0] == embeddings[2]
+    assert [[source["id"] for source in sources] for sources, _ in batch] == [
+        [source["id"] for source in sources] for sources, _ in single
+    ]
+    assert set(batch[0][1]) == {"vector_ms", "lexical_ms", "total_ms"}
+
+
+class StubBatchRAGService(StubRAGService):
+    """Finds one chunk per question, quoting it"""
+
+    async def aretrieve_many(self, texts, embeddings, n_results=5):
+        return [([{"id": f"chunk-{i}", "text": text, "source": "doc.docx", "chunk": i}], {"vector_ms": 2.0, "total_ms": 2.0}) for i, text in enumerate(texts)]
+
+
+def test_batch_streams_results_as_they_complete_under_the_cap(monkeypatch, ready_client):
+    monkeypatch.setenv("CHAT_BATCH_CONCURRENCY", "2")
+    monkeypatch.setenv("CHAT_BATCH_MAX_MESSAGES", "6")
+    with StubOpenAIServer(latency=0.05) as server:
+        chat_service = make_chat_service(monkeypatch, server)
+        rag = StubBatchRAGService()
+
+        running = {"now": 0, "max": 0}
+        generate = chat_service.generate_response
+
+        async def counted(question, **kwargs):
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+            try:
+                # The first question is the slowest; it must not hold back the others
+                if question == "question 0":
+                    await asyncio.sleep(0.3)
+                return await generate(question, **kwargs)
+            finally:
+                running["now"] -= 1
+
+        chat_service.generate_response = counted
+
+        client = ready_client(chat_service, rag)
+        body = [{"message": f"question {i}", "verification_mode": "fast"} for i in range(5)]
+        response = client.post("/api/chat/batch", json=body)
+        too_many = client.post("/api/chat/batch", json=body * 2)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == list(range(5))
+    assert lines[-1]["index"] == 0
+    assert all(line["response"] == "Respuesta del Mentor / Mentor response" for line in lines)
+    assert all("error" not in line for line in lines)
+    by_index = {line["index"]: line for line in lines}
+    assert by_index[3]["sources"][0]["text"] == "question 3"
+
+    # One retrieval batch for the five questions, at most two pipelines at a time
+    assert rag.batches == [5]
+    assert running["max"] == 2
+    assert too_many.status_code == 413
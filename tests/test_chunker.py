@@ -0,0 +1,67 @@
+"""
+Tests for the page/section-aware chunker.
+"""
+from backend.services.chunker import StructuredChunker
+from backend.services.context_packer import format_context_item
+
+PDF_TEXT = (
+    "\n[Page 1]\n"
+    "Mentor-Protégé Program – Standard Operating Procedures 4 CHAPTER 2 – POLICY \n"
+    "1. 2.1. DoD Mentor-Protégé Program \n"
+    "a. The DoD Mentor-Protégé Program became a permanent program under Public Law\n"
+    "117-263, as outlined in Section 856 of this authorization.\n"
+    "b. 2.1.1. Additional information on policy and procedures can be found in the Defense\n"
+    "Federal Acquisition Regulation Supplement (DFARS) Subpart 219.71.\n"
+    "\n[Page 2]\n"
+    "Mentor-Protégé Program – Standard Operating Procedures 5 CHAPTER 2 – POLICY \n"
+    "c. 2.1.2. Department of Defense Mentor-Protégé Program Implementation Guidance for\n"
+    "Pub. L. 117–263.\n"
+)
+
+
+def make_chunker(monkeypatch, max_tokens: int = 250, min_tokens: int = 50) -> StructuredChunker:
+    monkeypatch.setenv("CHUNK_TOKENS", str(max_tokens))
+    monkeypatch.setenv("CHUNK_MIN_TOKENS", str(min_tokens))
+    return StructuredChunker()
+
+
+def test_chunks_stop_at_page_boundaries_and_carry_location(monkeypatch):
+    chunks = make_chunker(monkeypatch).chunk(PDF_TEXT)
+
+    assert [chunk["page"] for chunk in chunks] == [1, 2]
+    assert (chunks[0]["section"], chunks[0]["section_title"]) == ("2", "POLICY")
+    # Section 2.1.2 continues under the 2.1 heading from the previous page
+    assert (chunks[1]["section"], chunks[1]["section_title"]) == ("2.1.2", "DoD Mentor-Protégé Program")
+    for chunk in chunks:
+        assert PDF_TEXT[chunk["start_char"]:chunk["end_char"]] == chunk["text"]
+        assert "[Page" not in chunk["text"]
+
+
+def test_paragraphs_rejoin_wrapped_pdf_lines(monkeypatch):
+    paragraphs = make_chunker(monkeypatch).paragraphs(PDF_TEXT)
+    first_page = [p for p in paragraphs if p["page"] == 1]
+
+    assert [p["heading"] for p in first_page] == [True, True, False, False]
+    assert PDF_TEXT[first_page[2]["start"]:first_page[2]["end"]].endswith("of this authorization.")
+    assert first_page[3]["section"] == "2.1.1"
+
+
+def test_headings_start_new_chunks_and_long_paragraphs_are_split(monkeypatch):
+    sentence = "Mentors provide developmental assistance to protégé firms. "
+    text = "Purpose of This Guide\n" + sentence * 40 + "\nDivision of Responsibilities\n" + sentence * 3
+    chunker = make_chunker(monkeypatch, max_tokens=120, min_tokens=20)
+
+    chunks = chunker.chunk(text)
+
+    assert all(chunker.tokens.count(chunk["text"]) <= 120 for chunk in chunks)
+    assert all(chunk["text"].rstrip().endswith(".") for chunk in chunks[:-1])
+    assert chunks[-1]["text"].startswith("Division of Responsibilities")
+    assert chunks[-1]["section_title"] == "Division of Responsibilities"
+    assert "page" not in chunks[0]
+
+
+def test_context_header_shows_location():
+    item = {"source": "MPP SOP.pdf", "text": "...", "page": 9, "section": "2.1", "section_title": "Policy", "paragraph": 2}
+
+    assert format_context_item(item) == "[MPP SOP.pdf | p. 9 | § 2.1 Policy | ¶ 2]\n..."
+    assert format_context_item({"source": "MPP SOP.pdf", "text": "..."}) == "[MPP SOP.pdf]\n..."
@@ -0,0 +1,76 @@
+"""
+Tests for token-budgeted context packing.
+"""
+from backend.services.context_packer import ContextPacker
+
+DOCUMENT = " ".join(f"Sentence {i} about Mentor and Protégé developmental assistance." for i in range(200))
+CHUNK_SIZE, OVERLAP = 1000, 200
+
+
+def chunk(index: int, source: str = "MPP SOP.pdf", text: str = DOCUMENT) -> dict:
+    # Sliding-window chunks, as in collections built before the structured chunker
+    start = index * (CHUNK_SIZE - OVERLAP)
+    return {"id": f"{source}_0_{index}", "text": text[start:start + CHUNK_SIZE], "source": source, "chunk": index}
+
+
+def make_packer(monkeypatch, budget: int = 3000) -> ContextPacker:
+    monkeypatch.setenv("CONTEXT_TOKEN_BUDGET", str(budget))
+    return ContextPacker()
+
+
+def test_adjacent_chunks_are_stitched_without_repeating_the_overlap(monkeypatch):
+    packer = make_packer(monkeypatch)
+    sources = [chunk(3), chunk(2), chunk(4)]
+
+    result = packer.pack(sources)
+
+    [span] = result["context"]
+    assert span["text"] == DOCUMENT[2 * 800:4 * 800 + CHUNK_SIZE]
+    assert span["chunks"] == [2, 3, 4]
+    assert result["deduped_tokens"] > 0 and result["dropped_tokens"] == 0
+    assert result["tokens_after"] == result["tokens_before"] - result["deduped_tokens"]
+
+
+def test_non_adjacent_chunks_and_other_sources_stay_separate(monkeypatch):
+    packer = make_packer(monkeypatch)
+    other = chunk(0, source="Appendix I.pdf", text="Appendix I text " * 100)
+
+    result = packer.pack([chunk(1), other, chunk(5)])
+
+    assert [(span["source"], span["chunk"]) for span in result["context"]] == [
+        ("MPP SOP.pdf", 1), ("Appendix I.pdf", 0), ("MPP SOP.pdf", 5)
+    ]
+
+
+def test_contained_duplicates_are_dropped(monkeypatch):
+    packer = make_packer(monkeypatch)
+    duplicate = {**chunk(1), "source": "copy.pdf", "text": chunk(1)["text"][100:600]}
+
+    result = packer.pack([chunk(1), duplicate])
+
+    assert len(result["context"]) == 1
+
+
+def test_budget_is_filled_in_relevance_order(monkeypatch):
+    packer = make_packer(monkeypatch, budget=400)
+    sources = [chunk(8), chunk(1), chunk(5)]
+
+    result = packer.pack(sources)
+
+    assert result["tokens_after"] <= 400
+    assert result["context"][0]["chunk"] == 8
+    assert len(result["context"]) < len(sources)
+    assert result["deduped_tokens"] == 0
+    assert result["dropped_tokens"] == result["tokens_before"] - result["tokens_after"]
+
+
+def test_a_cut_span_never_exceeds_the_budget(monkeypatch):
+    packer = make_packer(monkeypatch, budget=300)
+    # Decoding a cut token list can come back as more tokens than were kept
+    monkeypatch.setattr(packer, "truncate", lambda text, max_tokens: text[:max_tokens * 4 + 40])
+
+    for budget_left in (120, 200, 300):
+        fitted = packer.fit(chunk(2), budget_left)
+        assert fitted is not None
+        assert packer.count_tokens(packer._format(fitted)) <= budget_left
+    assert packer.pack([chunk(1), chunk(5)])["tokens_after"] <= 300
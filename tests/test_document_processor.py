@@ -0,0 +1,38 @@
+"""
+Tests for page-level and process-pool document extraction.
+Uses the real documents shipped in documents/.
+"""
+import os
+
+from backend.services.document_processor import DocumentProcessor
+
+APPENDIX = os.path.join("documents", "Appendix I.pdf")
+
+
+def test_page_generator_matches_whole_document_extraction():
+    pages = list(DocumentProcessor.iter_pdf_pages(APPENDIX))
+
+    assert [page_num for page_num, _ in pages] == list(range(1, len(pages) + 1))
+    assert DocumentProcessor.extract_pdf(APPENDIX) == "".join(
+        DocumentProcessor.format_page(page_num, text) for page_num, text in pages
+    )
+
+
+def test_process_pool_output_matches_serial_and_keeps_order(monkeypatch):
+    monkeypatch.setenv("EXTRACT_PAGES_PER_TASK", "3")
+    paths = [APPENDIX, os.path.join("documents", "SOP for eLearning Products.docx")]
+
+    serial = list(DocumentProcessor.iter_documents(paths, workers=1))
+    parallel = list(DocumentProcessor.iter_documents(paths, workers=2))
+
+    assert [doc["filename"] for doc in parallel] == ["Appendix I.pdf", "SOP for eLearning Products.docx"]
+    assert parallel == serial
+
+
+def test_unreadable_file_is_yielded_empty(tmp_path):
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"not a pdf")
+
+    [doc] = DocumentProcessor.iter_documents([str(broken)], workers=2)
+
+    assert doc == {"filename": "broken.pdf", "text": ""}
@@ -0,0 +1,78 @@
+"""
+Tests for the BM25 index and reciprocal rank fusion behind hybrid retrieval.
+"""
+from backend.services.bm25_index import BM25Index, tokenize
+from backend.services.rag_service import reciprocal_rank_fusion
+from stub_providers import DOCUMENT, delete_in_another_process, make_rag_service
+
+CHUNKS = {
+    "sop:1": ("MPP SOP.pdf", "3.2.1. Provides management and oversight of the DoD MPP."),
+    "sop:2": ("MPP SOP.pdf", "The Protégé must be a small business eligible under the program."),
+    "app:1": ("Appendix I.pdf", "DFARS 232.7003 governs contract financing for mentor firms."),
+    "app:2": ("Appendix I.pdf", "I-112.2 Program specific reporting requirements for the protege."),
+}
+
+
+def make_index(tmp_path) -> BM25Index:
+    index = BM25Index(str(tmp_path / "bm25.json"))
+    ids = list(CHUNKS)
+    index.add(ids, [CHUNKS[i][1] for i in ids], [CHUNKS[i][0] for i in ids])
+    return index
+
+
+def test_tokenizer_keeps_clause_numbers_and_folds_accents():
+    assert tokenize("See DFARS 232.7003, Section 3.2.1. and I-112.2 (Protégé)") == [
+        "see", "dfars", "232.7003", "section", "3.2.1", "and", "i-112.2", "protege"
+    ]
+
+
+def test_exact_clause_numbers_rank_first(tmp_path):
+    index = make_index(tmp_path)
+
+    assert index.search("What does DFARS 232.7003 say?", 2)[0][0] == "app:1"
+    assert index.search("Section 3.2.1", 2)[0][0] == "sop:1"
+    # Accented and unaccented spellings match each other
+    assert {chunk_id for chunk_id, _ in index.search("protégé", 5)} == {"sop:2", "app:2"}
+
+
+def test_source_filter_removal_and_persistence(tmp_path):
+    index = make_index(tmp_path)
+
+    assert [chunk_id for chunk_id, _ in index.search("protege", 5, where={"source": "MPP SOP.pdf"})] == ["sop:2"]
+
+    assert index.remove_source("Appendix I.pdf") == 2
+    index.save()
+    reloaded = BM25Index(str(tmp_path / "bm25.json"))
+
+    assert len(reloaded) == 2
+    assert reloaded.search("232.7003") == []
+    assert reloaded.search("Section 3.2.1")[0][0] == "sop:1"
+
+
+def test_rrf_rewards_chunks_found_by_both_retrievers():
+    vector = [{"id": "a", "distance": 0.1}, {"id": "b", "distance": 0.2}, {"id": "c", "distance": 0.3}]
+    lexical = [{"id": "c", "bm25_score": 9.0}, {"id": "d", "bm25_score": 4.0}]
+
+    fused = reciprocal_rank_fusion([vector, lexical], k=60)
+
+    assert [item["id"] for item in fused] == ["c", "a", "b", "d"]
+    assert fused[0]["distance"] == 0.3 and fused[0]["bm25_score"] == 9.0
+
+
+def test_bm25_index_follows_a_sync_in_another_process(tmp_path, monkeypatch):
+    rag = make_rag_service(
+        tmp_path, monkeypatch, VECTOR_STORE="numpy", VECTOR_STORE_PATH=str(tmp_path / "store")
+    )
+    rag.add_document(DOCUMENT, "doc.docx")
+    rag.add_document("Clause 232.7003 sets the Mentor-Protégé Program eligibility rules.", "faq.docx")
+    assert [source["source"] for source in rag.lexical_query("232.7003")] == ["faq.docx"]
+
+    chunks = len(rag.bm25)
+    delete_in_another_process(tmp_path, "faq.docx")
+    rag.refresh_version()
+    # The version check leaves the index alone; the next lexical search reloads it
+    assert len(rag.bm25) == chunks
+
+    # No stale lexical hits for chunks the vector store no longer has
+    assert rag.lexical_query("232.7003") == []
+    assert len(rag.bm25) == rag.get_document_count()
@@ -0,0 +1,77 @@
+"""
+Tests for the content-hash manifest behind incremental ingestion.
+"""
+import json
+
+from backend.services.ingest_manifest import IngestManifest
+from backend.services.rag_service import RAGService
+
+SETTINGS = {"embedding_model": "all-MiniLM-L6-v2", "chunker": "structured-v1", "chunk_tokens": 250}
+
+
+def make_manifest(tmp_path) -> IngestManifest:
+    manifest = IngestManifest(str(tmp_path / "manifest.json"))
+    manifest.record("MPP SOP.pdf", "aaa", 120, SETTINGS)
+    manifest.record("Appendix I.pdf", "bbb", 49, SETTINGS)
+    manifest.save()
+    return IngestManifest(str(tmp_path / "manifest.json"))
+
+
+def test_diff_classifies_new_changed_unchanged_and_removed(tmp_path):
+    manifest = make_manifest(tmp_path)
+
+    plan = manifest.diff({"MPP SOP.pdf": "aaa", "Appendix I.pdf": "ccc", "eLearning.docx": "ddd"}, SETTINGS)
+
+    assert plan == {
+        "new": ["eLearning.docx"],
+        "changed": ["Appendix I.pdf"],
+        "unchanged": ["MPP SOP.pdf"],
+        "removed": [],
+    }
+    assert manifest.diff({"MPP SOP.pdf": "aaa"}, SETTINGS)["removed"] == ["Appendix I.pdf"]
+
+
+def test_changed_settings_mark_every_file_changed(tmp_path):
+    manifest = make_manifest(tmp_path)
+
+    plan = manifest.diff({"MPP SOP.pdf": "aaa", "Appendix I.pdf": "bbb"}, {**SETTINGS, "chunk_tokens": 500})
+
+    assert plan["changed"] == ["Appendix I.pdf", "MPP SOP.pdf"]
+    assert plan["unchanged"] == []
+
+
+def test_interrupted_settings_change_still_re_embeds_the_rest(tmp_path):
+    manifest = make_manifest(tmp_path)
+    new_settings = {**SETTINGS, "embedding_model": "all-mpnet-base-v2"}
+
+    # The sync re-embeds one file under the new model, then stops
+    manifest.record("MPP SOP.pdf", "aaa", 118, new_settings)
+    manifest.save()
+    plan = IngestManifest(manifest.path).diff({"MPP SOP.pdf": "aaa", "Appendix I.pdf": "bbb"}, new_settings)
+
+    assert plan["changed"] == ["Appendix I.pdf"]
+    assert plan["unchanged"] == ["MPP SOP.pdf"]
+
+
+def test_unrecognised_manifest_is_treated_as_empty(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({"settings": SETTINGS, "files": {"MPP SOP.pdf": {"sha256": "aaa", "chunks": 120}}}))
+
+    plan = IngestManifest(str(path)).diff({"MPP SOP.pdf": "aaa"}, SETTINGS)
+
+    assert plan["new"] == ["MPP SOP.pdf"]
+
+
+def test_file_hash_tracks_content(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"version 1")
+    first = IngestManifest.file_hash(str(path))
+
+    assert IngestManifest.file_hash(str(path)) == first
+    path.write_bytes(b"version 2")
+    assert IngestManifest.file_hash(str(path)) != first
+
+
+def test_chunk_ids_are_deterministic():
+    assert RAGService.chunk_id("MPP SOP.pdf", "ab" * 32, 3) == RAGService.chunk_id("MPP SOP.pdf", "ab" * 32, 3)
+    assert RAGService.chunk_id("MPP SOP.pdf", "ab" * 32, 3) != RAGService.chunk_id("MPP SOP.pdf", "cd" * 32, 3)
@@ -0,0 +1,98 @@
+"""
+Tests for lifespan-managed service startup and the liveness/readiness probes,
+with stub services in place of the real models.
+"""
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.routes import api
+from stub_providers import disabled_answer_cache
+
+
+class StubRAGService:
+    """Warm-up blocks on `gate` so tests can observe the warming state"""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.warmed = []
+
+    async def aembed_query(self, text):
+        await asyncio.to_thread(self.gate.wait, 5)
+        return [0.0]
+
+    async def aretrieve(self, text, embedding, n_results=5):
+        self.warmed.append(text)
+        return [], {}
+
+    def get_document_count(self):
+        return 3
+
+
+class StubChatService:
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def rag(monkeypatch):
+    stub = StubRAGService()
+    monkeypatch.setattr(api, "readiness", {"status": "starting", "startup_ms": None, "warmup_ms": None, "error": None})
+    monkeypatch.setattr(api, "_create_services", lambda: (StubChatService(), stub, disabled_answer_cache()))
+    return stub
+
+
+def wait_for(client, path, status_code, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get(path)
+        if response.status_code == status_code:
+            return response
+        time.sleep(0.02)
+    raise AssertionError(f"{path} never returned {status_code}")
+
+
+def test_ready_only_after_warm_up(rag):
+    with TestClient(main.app) as client:
+        assert client.get("/api/live").status_code == 200
+        not_ready = client.get("/api/ready")
+        assert not_ready.status_code == 503
+        assert not_ready.json()["status"] in ("loading", "warming")
+
+        refused = client.post("/api/chat", json={"message": "hola"})
+        assert refused.status_code == 503
+        assert refused.headers["Retry-After"] == "5"
+
+        rag.gate.set()
+        ready = wait_for(client, "/api/ready", 200).json()
+        assert ready["status"] == "ready" and ready["warmup_ms"] is not None
+        assert rag.warmed == [api.WARMUP_QUERY]
+        assert client.get("/api/documents/count").json() == {"count": 3}
+
+
+def test_failed_startup_fails_liveness(monkeypatch, rag):
+    def broken():
+        raise RuntimeError("chroma_db is corrupt")
+
+    monkeypatch.setattr(api, "_create_services", broken)
+    with TestClient(main.app) as client:
+        failed = wait_for(client, "/api/live", 503).json()
+        assert failed == {"status": "failed", "error": "chroma_db is corrupt"}
+        assert client.get("/api/ready").status_code == 503
+
+
+def test_importing_the_app_defers_heavy_dependencies():
+    heavy = ("torch", "sentence_transformers", "chromadb", "openai", "google.generativeai")
+    code = f"import sys, backend.main; print([m for m in {heavy!r} if m in sys.modules])"
+
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "[]"
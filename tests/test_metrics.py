@@ -0,0 +1,78 @@
+"""
+Tests for per-stage spans, the Prometheus exposition and the Server-Timing
+header, with stub providers and a stub retriever.
+"""
+import asyncio
+
+import pytest
+
+from backend.services import metrics
+from stub_providers import StubOpenAIServer, make_chat_service
+
+
+def test_histogram_and_counter_exposition():
+    histogram = metrics.Histogram("demo_seconds", "Demo latency.", ("stage",), buckets=(0.1, 1.0))
+    counter = metrics.Counter("demo_total", "Demo count.", ("kind",))
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+    counter.inc(3, kind='say "hi"')
+
+    assert histogram.render() == [
+        "# HELP demo_seconds Demo latency.",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{stage="a",le="0.1"} 1',
+        'demo_seconds_bucket{stage="a",le="1.0"} 2',
+        'demo_seconds_bucket{stage="a",le="+Inf"} 2',
+        'demo_seconds_sum{stage="a"} 0.55',
+        'demo_seconds_count{stage="a"} 2',
+    ]
+    assert counter.render()[-1] == 'demo_total{kind="say \\"hi\\""} 3.0'
+
+
+def test_spans_stay_with_their_request_and_carry_tokens():
+    async def request(name, delay):
+        trace = metrics.start_request("test")
+        with metrics.span(f"{name}_pass_1"):
+            await asyncio.sleep(delay)
+            metrics.record_tokens("grok", {"prompt_tokens": 10, "cached_tokens": 8, "completion_tokens": 5})
+        with pytest.raises(RuntimeError), metrics.span("postprocess"):
+            raise RuntimeError("boom")
+        return trace
+
+    async def run():
+        return await asyncio.gather(request("slow", 0.05), request("fast", 0))
+
+    errors_before = metrics.STAGE_ERRORS.value(stage="postprocess")
+    slow, fast = asyncio.run(run())
+
+    assert [span["stage"] for span in slow.timings()] == ["slow_pass_1", "postprocess"]
+    assert [span["stage"] for span in fast.timings()] == ["fast_pass_1", "postprocess"]
+    # The event loop may wake a sleep up to its clock resolution early
+    assert slow.timings()[0]["ms"] >= 45
+    header = slow.server_timing()
+    assert header.startswith('slow_pass_1;dur=')
+    assert ';desc="prompt=10 cached=8 completion=5", postprocess;dur=' in header
+    assert header.split(", ")[-1].startswith("total;dur=")
+    assert metrics.STAGE_ERRORS.value(stage="postprocess") == errors_before + 2
+
+
+def test_chat_reports_server_timing_and_metrics(monkeypatch, ready_client):
+    with StubOpenAIServer(latency=0) as server:
+        client = ready_client(make_chat_service(monkeypatch, server, gemini_latency=0))
+        grok_calls_before = metrics.STAGE_SECONDS.count(stage="grok_pass_2")
+        response = client.post("/api/chat", json={"message": "hola", "verification_mode": "dual"})
+        exposition = client.get("/api/metrics")
+
+    assert response.status_code == 200
+    stages = [entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")]
+    assert stages == [
+        "queue", "embed", "vector_search", "grok_pass_1", "gemini_pass_1", "grok_pass_2", "gemini_pass_2", "postprocess", "total"
+    ]
+    assert 'grok_pass_1;dur=' in response.headers["Server-Timing"]
+    assert 'desc="prompt=10 cached=8 completion=5"' in response.headers["Server-Timing"]
+
+    assert exposition.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE mpp_stage_duration_seconds histogram" in exposition.text
+    assert 'mpp_requests_total{route="chat",outcome="ok"}' in exposition.text
+    assert 'mpp_provider_tokens_total{provider="grok",kind="cached"}' in exposition.text
+    assert metrics.STAGE_SECONDS.count(stage="grok_pass_2") == grok_calls_before + 1
@@ -0,0 +1,94 @@
+"""
+Tests for the micro-batcher that coalesces concurrent query encodes and searches.
+"""
+import asyncio
+
+import pytest
+
+from backend.services.micro_batcher import MicroBatcher
+from stub_providers import DOCUMENT, make_rag_service
+
+
+class RecordingBatchFn:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        if self.fail:
+            raise RuntimeError("encoder crashed")
+        return [item * 10 for item in items]
+
+
+def test_concurrent_items_share_one_batch_and_keep_their_results():
+    batch_fn = RecordingBatchFn()
+    batcher = MicroBatcher(batch_fn, max_batch=32, window_ms=20)
+
+    async def run():
+        return await asyncio.gather(*[batcher.submit(i) for i in range(5)])
+
+    assert asyncio.run(run()) == [0, 10, 20, 30, 40]
+    assert batch_fn.batches == [[0, 1, 2, 3, 4]]
+    assert batcher.stats() == {"batches": 1, "items": 5, "mean_batch": 5.0, "largest_batch": 5}
+
+
+def test_full_batches_dispatch_without_waiting_for_the_window():
+    batch_fn = RecordingBatchFn()
+    batcher = MicroBatcher(batch_fn, max_batch=2, window_ms=10_000)
+
+    async def run():
+        first = await asyncio.wait_for(asyncio.gather(batcher.submit(1), batcher.submit(2)), timeout=1)
+        # The cancelled window of the full batch must not flush this one early
+        late = asyncio.ensure_future(batcher.submit(3))
+        await asyncio.sleep(0.05)
+        assert not late.done()
+        second = await asyncio.wait_for(asyncio.gather(late, batcher.submit(4)), timeout=1)
+        return first, second
+
+    assert asyncio.run(run()) == ([10, 20], [30, 40])
+    assert batch_fn.batches == [[1, 2], [3, 4]]
+
+
+def test_items_with_different_keys_are_batched_separately():
+    batch_fn = RecordingBatchFn()
+    batcher = MicroBatcher(batch_fn, max_batch=32, window_ms=5)
+
+    async def run():
+        return await asyncio.gather(batcher.submit(1, key=5), batcher.submit(2, key=3), batcher.submit(3, key=5))
+
+    assert asyncio.run(run()) == [10, 20, 30]
+    assert sorted(batch_fn.batches) == [[1, 3], [2]]
+
+
+def test_batch_failure_reaches_every_caller():
+    batcher = MicroBatcher(RecordingBatchFn(fail=True), max_batch=32, window_ms=5)
+
+    async def run():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.parametrize("window_ms", [0, 5])
+def test_lone_request_is_served_after_the_window(window_ms):
+    batcher = MicroBatcher(RecordingBatchFn(), max_batch=32, window_ms=window_ms)
+
+    assert asyncio.run(batcher.submit(7)) == 70
+
+
+def test_rag_service_batches_concurrent_queries(tmp_path, monkeypatch):
+    rag = make_rag_service(tmp_path, monkeypatch, QUERY_BATCH_WINDOW_MS=20, RETRIEVAL_CACHE_SIZE=0)
+    rag.add_document(DOCUMENT, "doc.docx")
+    questions = [f"question {'o' * i}" for i in range(6)]
+    expected = [rag.query(question, 3) for question in questions]
+    rag.embedding_model.calls.clear()
+
+    async def run():
+        embeddings = await asyncio.gather(*[rag.aembed_query(q) for q in questions])
+        return await asyncio.gather(*[rag.aquery_by_embedding(e, 3) for e in embeddings])
+
+    assert asyncio.run(run()) == expected
+    assert rag.embedding_model.calls == [6]
+    assert rag.batching_stats()["search"]["largest_batch"] == 6
@@ -0,0 +1,62 @@
+"""
+Parity tests for the ONNX embedding backend against sentence-transformers,
+using a tiny randomly initialised BERT built locally (no downloads).
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+from backend.services.embeddings import SAMPLE_TEXTS, OnnxEmbeddingModel, export_onnx, min_cosine
+
+WORDS = "what are the eligibility requirements for a protégé firm mentor must submit report dfars 232 . 7003 ? ¿ el".split()
+
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    root = tmp_path_factory.mktemp("tiny_model")
+    vocab = root / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS), encoding="utf-8")
+    hf_dir = str(root / "hf")
+    BertTokenizerFast(vocab_file=str(vocab)).save_pretrained(hf_dir)
+    BertModel(BertConfig(
+        vocab_size=5 + len(WORDS), hidden_size=32, num_hidden_layers=1,
+        num_attention_heads=2, intermediate_size=64, max_position_embeddings=64,
+    )).save_pretrained(hf_dir)
+
+    st_dir = str(root / "st")
+    transformer = models.Transformer(hf_dir, max_seq_length=32)
+    SentenceTransformer(modules=[transformer, models.Pooling(32, "mean"), models.Normalize()]).save(st_dir)
+
+    onnx_dir = str(root / "onnx")
+    export_onnx(st_dir, onnx_dir, quantize=True)
+    reference = SentenceTransformer(st_dir, device="cpu").encode(SAMPLE_TEXTS, convert_to_numpy=True)
+    return onnx_dir, reference
+
+
+def test_fp32_export_matches_torch(exported):
+    onnx_dir, reference = exported
+    vectors = OnnxEmbeddingModel(onnx_dir).encode(SAMPLE_TEXTS, batch_size=4)
+
+    assert vectors.dtype == np.float32
+    assert np.allclose(vectors, reference, atol=1e-4)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+
+
+def test_int8_export_stays_within_tolerance(exported):
+    onnx_dir, reference = exported
+
+    assert min_cosine(reference, OnnxEmbeddingModel(onnx_dir, quantized=True).encode(SAMPLE_TEXTS)) > 0.98
+
+
+def test_single_strings_and_batches_agree(exported):
+    onnx_dir, _ = exported
+    model = OnnxEmbeddingModel(onnx_dir)
+
+    batch = model.encode(SAMPLE_TEXTS, batch_size=2)
+    assert np.allclose(model.encode(SAMPLE_TEXTS[3]), batch[3], atol=1e-5)
+    assert model.encode([]).shape == (0, model.get_sentence_embedding_dimension())
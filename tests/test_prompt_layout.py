@@ -0,0 +1,54 @@
+"""
+Tests for the prefix-cacheable prompt layout and provider usage accounting.
+"""
+import asyncio
+
+from backend.services import prompts
+from stub_providers import StubOpenAIServer, make_chat_service
+
+CONTEXT = [{"source": "MPP SOP.pdf", "text": "A Protégé is a small business.", "chunk": 0}]
+
+
+def test_second_pass_extends_first_pass_messages(monkeypatch):
+    with StubOpenAIServer() as server:
+        service = make_chat_service(monkeypatch, server)
+
+    first = service.build_grok_messages("What is a Protégé?", CONTEXT)
+    second = service.build_grok_messages("What is a Protégé?", CONTEXT, 2, "draft answer")
+
+    assert second[:len(first)] == first
+    assert second[-1]["content"] == prompts.SECOND_PASS_REQUEST
+
+
+def test_static_instructions_lead_every_prompt(monkeypatch):
+    with StubOpenAIServer() as server:
+        service = make_chat_service(monkeypatch, server)
+
+    for question in ("What is a Protégé?", "¿Qué es un Mentor?"):
+        [system, _] = service.build_grok_messages(question, CONTEXT)
+        assert system["content"].startswith(prompts.BILINGUAL_SYSTEM_PROMPT)
+        assert question not in system["content"]
+
+
+def test_usage_and_cached_tokens_are_accumulated(monkeypatch):
+    with StubOpenAIServer() as server:
+        service = make_chat_service(monkeypatch, server)
+        service.gemini_model.latency = 0
+
+        async def run():
+            await service.generate_response("What is a Protégé?", CONTEXT)
+
+            async def emit(event, data):
+                pass
+
+            await service.generate_response("What is a Mentor?", CONTEXT, emit=emit, verification_mode="fast")
+
+        asyncio.run(run())
+
+    grok, gemini = service.usage_totals["grok"], service.usage_totals["gemini"]
+    # Two dual-mode passes plus one streamed fast-mode pass
+    assert grok["calls"] == 3
+    assert grok["cached_tokens"] == 3 * StubOpenAIServer.USAGE["prompt_tokens_details"]["cached_tokens"]
+    assert gemini["calls"] == 2
+    assert gemini["prompt_tokens"] == 40
+    assert server.requests[-1]["stream_options"] == {"include_usage": True}
@@ -0,0 +1,132 @@
+"""
+Hedging, failover and circuit-breaker tests for the Grok provider pool.
+Uses two local OpenAI-compatible stub servers.
+"""
+import asyncio
+import time
+
+from openai import AsyncOpenAI
+
+from backend.services.provider_pool import ProviderPool
+from stub_providers import StubOpenAIServer
+
+MESSAGES = [{"role": "user", "content": "What is a Protégé?"}]
+
+
+def make_pool(monkeypatch, primary: StubOpenAIServer, secondary: StubOpenAIServer, **env) -> ProviderPool:
+    for key, value in env.items():
+        monkeypatch.setenv(key, str(value))
+    return ProviderPool.from_env([
+        ("primary", AsyncOpenAI(api_key="test", base_url=primary.base_url, max_retries=0), "grok-a"),
+        ("secondary", AsyncOpenAI(api_key="test", base_url=secondary.base_url, max_retries=0), "grok-b"),
+    ])
+
+
+def complete(pool: ProviderPool, times: int = 1):
+    async def run():
+        results = []
+        for _ in range(times):
+            start = time.perf_counter()
+            response = await pool.complete(messages=MESSAGES)
+            results.append((response.choices[0].message.content, time.perf_counter() - start))
+        return results
+
+    return asyncio.run(run())
+
+
+def test_slow_primary_is_hedged_to_secondary(monkeypatch):
+    with StubOpenAIServer(latency=2.0, reply="slow") as primary, \
+            StubOpenAIServer(latency=0.05, reply="fast") as secondary:
+        pool = make_pool(monkeypatch, primary, secondary, HEDGE_DELAY_SECONDS=0.2)
+
+        [(reply, elapsed)] = complete(pool)
+
+    assert reply == "fast"
+    assert elapsed < 1.0
+    assert pool.hedges_sent == 1
+    assert pool.providers[1].hedges_won == 1
+    # The abandoned primary still leaves a (lower bound) latency sample
+    assert pool.providers[0].censored_samples == 1
+    assert pool.providers[0].latencies[0] >= 0.2
+
+
+def test_fast_primary_is_not_hedged(monkeypatch):
+    with StubOpenAIServer(latency=0.0, reply="primary") as primary, \
+            StubOpenAIServer(latency=0.0, reply="secondary") as secondary:
+        pool = make_pool(monkeypatch, primary, secondary, HEDGE_DELAY_SECONDS=1.0)
+
+        [(reply, _)] = complete(pool)
+
+    assert reply == "primary"
+    assert pool.hedges_sent == 0
+    assert len(secondary.requests) == 0
+
+
+def test_failing_primary_fails_over_and_opens_circuit(monkeypatch):
+    with StubOpenAIServer(status_code=500) as primary, \
+            StubOpenAIServer(latency=0.0, reply="secondary") as secondary:
+        pool = make_pool(
+            monkeypatch, primary, secondary, CIRCUIT_FAILURE_THRESHOLD=2, CIRCUIT_RESET_SECONDS=60
+        )
+
+        results = complete(pool, times=4)
+
+    assert [reply for reply, _ in results] == ["secondary"] * 4
+    # After two failures the primary is ejected and receives no more traffic
+    assert len(primary.requests) == 2
+    assert pool.providers[0].state == "open"
+
+
+def test_open_circuit_is_retried_after_reset(monkeypatch):
+    with StubOpenAIServer(status_code=500, reply="primary") as primary, \
+            StubOpenAIServer(latency=0.0, reply="secondary") as secondary:
+        pool = make_pool(
+            monkeypatch, primary, secondary, CIRCUIT_FAILURE_THRESHOLD=1, CIRCUIT_RESET_SECONDS=0.1
+        )
+
+        async def run():
+            await pool.complete(messages=MESSAGES)
+            assert pool.providers[0].state == "open"
+
+            primary.status_code = 200
+            await asyncio.sleep(0.15)
+            response = await pool.complete(messages=MESSAGES)
+            return response.choices[0].message.content
+
+        reply = asyncio.run(run())
+
+    assert reply == "primary"
+    assert pool.providers[0].state == "closed"
+
+
+def test_half_open_circuit_lets_a_single_probe_through(monkeypatch):
+    with StubOpenAIServer(latency=0.2, reply="primary") as primary, \
+            StubOpenAIServer(latency=0.0, reply="secondary") as secondary:
+        pool = make_pool(
+            monkeypatch, primary, secondary, HEDGE_ENABLED="false", CIRCUIT_FAILURE_THRESHOLD=1, CIRCUIT_RESET_SECONDS=0.1
+        )
+        pool.providers[0].opened_at = time.monotonic() - 0.1
+
+        async def run():
+            responses = await asyncio.gather(*(pool.complete(messages=MESSAGES) for _ in range(4)))
+            return [response.choices[0].message.content for response in responses]
+
+        replies = asyncio.run(run())
+
+    # One request probes the recovering primary; the rest go to the secondary meanwhile
+    assert sorted(replies) == ["primary"] + ["secondary"] * 3
+    assert len(primary.requests) == 1
+    assert pool.providers[0].state == "closed"
+    assert not pool.providers[0].probing
+
+
+def test_all_providers_failing_raises(monkeypatch):
+    with StubOpenAIServer(status_code=503) as primary, StubOpenAIServer(status_code=500) as secondary:
+        pool = make_pool(monkeypatch, primary, secondary)
+
+        try:
+            complete(pool)
+        except RuntimeError as exc:
+            assert "primary" in str(exc) and "secondary" in str(exc)
+        else:
+            raise AssertionError("expected RuntimeError")
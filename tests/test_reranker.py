@@ -0,0 +1,47 @@
+"""
+Tests for the cross-encoder reranking stage, using a stub scoring model.
+"""
+from backend.services.reranker import Reranker
+
+CANDIDATES = [{"id": str(i), "text": f"chunk {i}"} for i in range(30)]
+
+
+class StubCrossEncoder:
+    """Scores chunk i as i / 30 and records each batch it is given"""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.batches.append(len(pairs))
+        return [int(text.split()[-1]) / 30 for _, text in pairs]
+
+
+def make_reranker(monkeypatch, **env) -> Reranker:
+    for key, value in env.items():
+        monkeypatch.setenv(key, str(value))
+    reranker = Reranker()
+    reranker.model = StubCrossEncoder()
+    return reranker
+
+
+def test_candidates_are_scored_in_one_batch_and_capped(monkeypatch):
+    reranker = make_reranker(monkeypatch, RERANK_TOP_K=5, RERANK_MIN_SCORE=0.1)
+
+    kept, stats = reranker.rerank("question", CANDIDATES)
+
+    assert reranker.model.batches == [30]
+    assert [item["id"] for item in kept] == ["29", "28", "27", "26", "25"]
+    assert stats["candidates"] == 30 and stats["kept"] == 5
+    assert stats["rerank_ms"] >= 0
+
+
+def test_cutoff_drops_weak_chunks_but_keeps_the_minimum(monkeypatch):
+    reranker = make_reranker(monkeypatch, RERANK_TOP_K=5, RERANK_MIN_SCORE=0.92)
+
+    kept, _ = reranker.rerank("question", CANDIDATES)
+    assert [item["id"] for item in kept] == ["29", "28"]
+
+    reranker.min_score = 2.0
+    kept, _ = reranker.rerank("question", CANDIDATES)
+    assert [item["id"] for item in kept] == ["29"]
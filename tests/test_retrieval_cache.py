@@ -0,0 +1,45 @@
+"""
+Tests for the RAGService query-embedding and retrieval result cache.
+"""
+from backend.services.retrieval_cache import RetrievalCache
+
+SOURCES = [{"id": "MPP SOP.pdf_0_3", "text": "...", "source": "MPP SOP.pdf", "chunk": 3}]
+
+
+def test_embedding_lookup_ignores_whitespace_variants():
+    cache = RetrievalCache(max_size=8)
+    cache.put_embedding("What is a  Protégé?", [0.1, 0.2])
+
+    assert cache.get_embedding("  What is a Protégé? ") == [0.1, 0.2]
+    assert cache.get_embedding("What is a Mentor?") is None
+
+
+def test_results_are_keyed_on_collection_version_and_parameters():
+    cache = RetrievalCache(max_size=8)
+    cache.put_results([0.1, 0.2], 5, None, "v1", SOURCES)
+
+    assert cache.get_results([0.1, 0.2], 5, None, "v1") == SOURCES
+    assert cache.get_results([0.1, 0.2], 5, None, "v2") is None
+    assert cache.get_results([0.1, 0.2], 3, None, "v1") is None
+    assert cache.get_results([0.1, 0.2], 5, {"source": "MPP SOP.pdf"}, "v1") is None
+
+
+def test_cached_results_are_isolated_from_callers():
+    cache = RetrievalCache(max_size=8)
+    cache.put_results([0.1], 5, None, "v1", SOURCES)
+
+    cache.get_results([0.1], 5, None, "v1")[0]["text"] = "mutated"
+
+    assert cache.get_results([0.1], 5, None, "v1")[0]["text"] == "..."
+
+
+def test_bounded_size_evicts_least_recently_used():
+    cache = RetrievalCache(max_size=2)
+    cache.put_embedding("a", [1.0])
+    cache.put_embedding("b", [2.0])
+    cache.get_embedding("a")
+    cache.put_embedding("c", [3.0])
+
+    assert cache.get_embedding("b") is None
+    assert cache.get_embedding("a") == [1.0]
+    assert cache.stats()["embeddings"]["entries"] == 2
@@ -0,0 +1,137 @@
+"""
+Single-flight coalescing tests: shared results and errors, cancellation
+and event replay, and identical concurrent /api/chat requests sharing one
+pipeline (stub providers and a stub retriever).
+"""
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.routes import api
+from backend.services.single_flight import SingleFlight
+from stub_providers import StubOpenAIServer, make_chat_service
+
+
+def test_concurrent_callers_share_one_run_and_its_error():
+    flights = SingleFlight()
+    runs = []
+
+    async def run(flight):
+        runs.append(flight.key)
+        await asyncio.sleep(0.05)
+        if flight.key == "bad":
+            raise RuntimeError("upstream down")
+        return f"answer to {flight.key}"
+
+    async def call(key):
+        flight = flights.get(key) or flights.start(key, run)
+        return await flights.wait(flight)
+
+    async def main_():
+        results = await asyncio.gather(*[call("q") for _ in range(5)], *[call("bad") for _ in range(3)], return_exceptions=True)
+        # Finished flights are forgotten: the next identical call runs again
+        again = await call("q")
+        return results, again
+
+    results, again = asyncio.run(main_())
+
+    assert results[:5] == ["answer to q"] * 5
+    assert all(isinstance(result, RuntimeError) for result in results[5:])
+    assert again == "answer to q"
+    assert runs == ["q", "bad", "q"]
+    assert flights.stats()["joined"] == 6 and flights.stats()["in_flight"] == 0
+
+
+def test_pipeline_outlives_a_leaving_caller_but_not_the_last():
+    flights = SingleFlight()
+    finished = []
+
+    async def run(flight):
+        await flight.emit("status", {"pass": 1})
+        await asyncio.sleep(0.05)
+        await flight.emit("status", {"pass": 2})
+        finished.append(flight.key)
+        return flight.key
+
+    async def main_():
+        shared = flights.start("shared", run)
+        leaving = asyncio.create_task(flights.wait(shared))
+        staying = asyncio.create_task(flights.wait(flights.get("shared")))
+        await asyncio.sleep(0.01)
+        # A late subscriber is replayed what it missed
+        events = shared.subscribe()
+        leaving.cancel()
+        result = await staying
+
+        abandoned = flights.start("abandoned", run)
+        only = asyncio.create_task(flights.wait(abandoned))
+        await asyncio.sleep(0.01)
+        only.cancel()
+        await asyncio.gather(only, return_exceptions=True)
+        await asyncio.sleep(0.06)
+
+        replay = []
+        while (event := events.get_nowait()) is not None:
+            replay.append(event)
+        return result, replay, abandoned
+
+    result, replay, abandoned = asyncio.run(main_())
+
+    assert result == "shared"
+    assert replay == [("status", {"pass": 1}), ("status", {"pass": 2})]
+    assert finished == ["shared"]
+    assert abandoned.task.cancelled() and flights.stats()["abandoned"] == 1
+
+
+def test_follower_joined_before_waiting_keeps_the_pipeline_alive():
+    flights = SingleFlight()
+
+    async def run(flight):
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def main_():
+        flight = flights.start("q", run)
+        leader = asyncio.create_task(flights.wait(flight))
+        # The follower has joined but not reached wait() yet (as in /chat/stream)
+        follower = flights.get("q")
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        await asyncio.gather(leader, return_exceptions=True)
+        return await flights.wait(follower)
+
+    assert asyncio.run(main_()) == "answer"
+    assert flights.stats()["abandoned"] == 0 and flights.stats()["joined"] == 1
+
+
+def test_identical_concurrent_chats_share_one_pipeline(monkeypatch, ready_client):
+    with StubOpenAIServer(latency=0.3) as server:
+        client = ready_client(make_chat_service(monkeypatch, server, gemini_latency=0))
+
+        def ask(index):
+            # Same question up to case and whitespace; the first one also streams
+            body = {"message": "  What is a Protégé?" if index % 2 else "what is a  protégé?", "verification_mode": "single"}
+            if index == 0:
+                return client.post("/api/chat/stream", json=body)
+            time.sleep(0.05)
+            return client.post("/api/chat", json=body)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            stream, *chats = list(pool.map(ask, range(4)))
+        different = client.post("/api/chat", json={"message": "What is a Mentor?", "verification_mode": "single"})
+        stats = api.coalescer.stats()
+
+    assert [response.status_code for response in chats] == [200, 200, 200]
+    assert {response.json()["response"] for response in chats} == {"Respuesta verificada / Verified response"}
+    assert all(response.json()["coalesced"] for response in chats)
+    assert "coalesced;dur=" in chats[0].headers["Server-Timing"]
+
+    done = [frame for frame in stream.text.split("\n\n") if frame.startswith("event: done")]
+    assert json.loads(done[0].split("data: ", 1)[1])["coalesced"] is False
+    assert "event: token" in stream.text
+
+    # One Grok call for the four identical requests, one for the different one
+    assert len(server.requests) == 2
+    assert different.json()["coalesced"] is False
+    assert stats["started"] == 2 and stats["joined"] == 3 and stats["in_flight"] == 0
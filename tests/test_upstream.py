@@ -0,0 +1,113 @@
+"""
+Retry, Retry-After and connection pool tests for the upstream helpers,
+against the local OpenAI-compatible stub server.
+"""
+import asyncio
+import time
+
+import openai
+import pytest
+from openai import AsyncOpenAI
+
+from backend.services.provider_pool import ProviderPool
+from backend.services.upstream import Retrier, classify, pool_stats
+from stub_providers import StubOpenAIServer, _free_port, make_openai_client
+
+MESSAGES = [{"role": "user", "content": "What is a Protégé?"}]
+
+
+def call(retrier: Retrier, client: AsyncOpenAI, deadline_seconds=None):
+    async def run():
+        deadline = time.monotonic() + deadline_seconds if deadline_seconds is not None else None
+        return await retrier.call(
+            "grok",
+            lambda: client.chat.completions.create(model="grok", messages=MESSAGES),
+            deadline,
+        )
+
+    return asyncio.run(run())
+
+
+def test_rate_limit_waits_for_retry_after():
+    with StubOpenAIServer(status_code=429, failures=1, headers={"Retry-After": "0.3"}, reply="ok") as server:
+        retrier = Retrier(max_retries=2, base_delay=0.01)
+        start = time.perf_counter()
+        response = call(retrier, make_openai_client(server.base_url))
+        elapsed = time.perf_counter() - start
+
+    assert response.choices[0].message.content == "ok"
+    assert len(server.requests) == 2
+    assert elapsed >= 0.3
+    stats = retrier.stats()["grok"]
+    assert stats["retries"] == 1 and stats["retry_reasons"] == {"429": 1}
+    assert stats["backoff_seconds"] == 0.3
+
+
+def test_retry_after_beyond_the_limit_or_deadline_gives_up():
+    with StubOpenAIServer(status_code=503, headers={"Retry-After": "5"}) as server:
+        with pytest.raises(openai.InternalServerError):
+            call(Retrier(max_retries=2, max_retry_after=1), make_openai_client(server.base_url))
+        with pytest.raises(openai.InternalServerError):
+            call(Retrier(max_retries=2), make_openai_client(server.base_url), deadline_seconds=2)
+
+    assert len(server.requests) == 2
+
+
+def test_server_errors_back_off_until_retries_run_out():
+    with StubOpenAIServer(status_code=500) as server:
+        retrier = Retrier(max_retries=2, base_delay=0.01)
+        with pytest.raises(openai.InternalServerError):
+            call(retrier, make_openai_client(server.base_url))
+
+    assert len(server.requests) == 3
+    assert retrier.stats()["grok"]["gave_up"] == 1
+
+
+def test_client_errors_and_timeouts_are_not_retried():
+    with StubOpenAIServer(status_code=400) as server:
+        retrier = Retrier(max_retries=2, base_delay=0.01)
+        with pytest.raises(openai.BadRequestError):
+            call(retrier, make_openai_client(server.base_url))
+
+    assert len(server.requests) == 1
+    assert classify(asyncio.TimeoutError()) is None
+
+
+def test_connection_errors_are_retried():
+    retrier = Retrier(max_retries=2, base_delay=0.01)
+    with pytest.raises(openai.APIConnectionError):
+        call(retrier, make_openai_client(f"http://127.0.0.1:{_free_port()}/v1"))
+
+    assert retrier.stats()["grok"]["retry_reasons"] == {"connect": 2}
+
+
+def test_pool_retries_only_its_last_provider_and_reuses_connections(monkeypatch):
+    monkeypatch.setenv("UPSTREAM_BACKOFF_BASE_SECONDS", "0.01")
+    with StubOpenAIServer(status_code=502, failures=1, reply="ok") as server:
+        client = make_openai_client(server.base_url)
+        pool = ProviderPool.from_env([("grok", client, "grok")])
+
+        async def run():
+            replies = [await pool.complete(messages=MESSAGES) for _ in range(3)]
+            return [reply.choices[0].message.content for reply in replies], pool_stats(client._client)
+
+        replies, connections = asyncio.run(run())
+
+    assert replies == ["ok"] * 3
+    assert len(server.requests) == 4
+    assert pool.retrier.stats()["grok"]["retry_reasons"] == {"502": 1}
+    assert connections["connections"] == 1 and connections["idle"] == 1
+
+
+def test_closing_the_pool_closes_each_providers_connections(monkeypatch):
+    with StubOpenAIServer(reply="ok") as server:
+        client = make_openai_client(server.base_url)
+        pool = ProviderPool.from_env([("grok", client, "grok")])
+
+        async def run():
+            await pool.complete(messages=MESSAGES)
+            await pool.aclose()
+
+        asyncio.run(run())
+
+    assert client._client.is_closed
@@ -0,0 +1,185 @@
+"""
+Tests for the vector store backends: the memory-mapped NumPy engine on its
+own, and against Chroma through RAGService.
+"""
+import threading
+
+import numpy as np
+import pytest
+
+from backend.services.vector_store import NumpyVectorStore
+from stub_providers import DOCUMENT, delete_in_another_process, make_rag_service
+
+rng = np.random.default_rng(7)
+VECTORS = rng.normal(size=(40, 16)).astype(np.float32)
+IDS = [f"doc{i % 2}.pdf:{i}" for i in range(40)]
+DOCUMENTS = [f"chunk {i}" for i in range(40)]
+METADATAS = [{"source": f"doc{i % 2}.pdf", "chunk": i} for i in range(40)]
+
+
+def make_store(path, dtype="float32") -> NumpyVectorStore:
+    store = NumpyVectorStore(str(path), dtype=dtype)
+    store.upsert(IDS[:25], VECTORS[:25], DOCUMENTS[:25], METADATAS[:25])
+    store.upsert(IDS[25:], VECTORS[25:], DOCUMENTS[25:], METADATAS[25:])
+    store.bump_version()
+    return store
+
+
+def brute_force(query, rows=range(40), k=5):
+    unit = VECTORS / np.linalg.norm(VECTORS, axis=1, keepdims=True)
+    scores = {i: float(unit[i] @ (query / np.linalg.norm(query))) for i in rows}
+    return [IDS[i] for i in sorted(scores, key=scores.get, reverse=True)[:k]]
+
+
+def test_exact_top_k_with_chroma_style_distances(tmp_path):
+    store = make_store(tmp_path)
+    queries = rng.normal(size=(3, 16)).astype(np.float32)
+
+    results = store.query(queries, n_results=5)
+
+    for query, hits in zip(queries, results):
+        assert [hit["id"] for hit in hits] == brute_force(query)
+        unit = query / np.linalg.norm(query)
+        expected = np.sum((VECTORS[IDS.index(hits[0]["id"])] / np.linalg.norm(VECTORS[IDS.index(hits[0]["id"])]) - unit) ** 2)
+        assert hits[0]["distance"] == pytest.approx(expected, abs=1e-5)
+        assert [hit["distance"] for hit in hits] == sorted(hit["distance"] for hit in hits)
+
+
+def test_source_filter_delete_and_get(tmp_path):
+    store = make_store(tmp_path)
+    query = rng.normal(size=(1, 16)).astype(np.float32)
+
+    hits = store.query(query, n_results=50, where={"source": "doc1.pdf"})[0]
+    assert [hit["id"] for hit in hits] == brute_force(query[0], rows=range(1, 40, 2), k=20)
+    assert store.count(where={"source": "doc1.pdf"}) == 20
+
+    store.delete(where={"source": "doc1.pdf"})
+    assert store.count() == 20
+    assert store.get(ids=["doc1.pdf:1", "doc0.pdf:4", "doc0.pdf:2"])["ids"] == ["doc0.pdf:4", "doc0.pdf:2"]
+    with pytest.raises(ValueError):
+        store.query(query, where={"chunk": 3})
+
+
+def test_saved_store_is_memory_mapped_and_seen_by_other_readers(tmp_path):
+    writer = make_store(tmp_path)
+    reader = NumpyVectorStore(str(tmp_path))
+    assert isinstance(reader._state.matrix, np.memmap)
+    assert reader.version == writer.version and reader.count() == 40
+
+    writer.delete(where={"source": "doc0.pdf"})
+    # Unsaved writes stay private to the writer
+    reader.refresh()
+    assert reader.count() == 40
+    writer.bump_version()
+    # Reads never touch the disk; a refresh maps the new generation
+    assert reader.count() == 40
+    assert reader.refresh() == writer.version and reader.count() == 20
+
+    # Only the newest generations are kept
+    for _ in range(3):
+        writer.bump_version()
+    assert len(list(tmp_path.glob("embeddings-*.npy"))) == NumpyVectorStore.KEEP_GENERATIONS
+
+
+def test_reader_survives_a_generation_pruned_while_it_reloads(tmp_path):
+    writer = make_store(tmp_path)
+    reader = NumpyVectorStore(str(tmp_path))
+    writer.delete(where={"source": "doc0.pdf"})
+    writer.bump_version()
+    load_matrix = reader._load_matrix
+    pruned = []
+
+    def load_after_a_prune(matrix_file, rows):
+        # The reader has read meta.json; the writer saves again and prunes the file it names
+        if not pruned:
+            pruned.append(matrix_file)
+            writer.delete(where={"source": "doc1.pdf"})
+            writer.bump_version()
+            (tmp_path / matrix_file).unlink()
+        return load_matrix(matrix_file, rows)
+
+    reader._load_matrix = load_after_a_prune
+
+    assert reader.refresh() == writer.version and reader.count() == 0
+    assert pruned
+
+
+def test_upsert_batches_are_merged_in_one_copy(tmp_path):
+    store = NumpyVectorStore(str(tmp_path))
+    store.upsert(IDS[:20], VECTORS[:20], DOCUMENTS[:20], METADATAS[:20])
+    store.bump_version()
+    saved = store._state
+
+    for start in range(10, 40, 10):
+        store.upsert(IDS[start:start + 10], VECTORS[start:start + 10], DOCUMENTS[start:start + 10], METADATAS[start:start + 10])
+    # Re-sent within the buffer: the last write wins
+    store.upsert(IDS[35:], VECTORS[:5], ["again"] * 5, METADATAS[35:])
+    assert store._state is saved and len(store._pending) == 4
+
+    store.bump_version()
+
+    assert store._pending == [] and store.count() == 40
+    assert store.get(ids=[IDS[36]])["documents"] == ["again"]
+    query = VECTORS[1:2]
+    assert store.query(query, n_results=2)[0][0]["id"] in (IDS[1], IDS[36])
+    assert store.query(VECTORS[12:13], n_results=1)[0][0]["id"] == IDS[12]
+
+
+def test_float16_storage_keeps_the_ranking(tmp_path):
+    store = make_store(tmp_path, dtype="float16")
+    query = rng.normal(size=(1, 16)).astype(np.float32)
+
+    assert store._state.matrix.dtype == np.float16
+    assert [hit["id"] for hit in store.query(query, n_results=3)[0]] == brute_force(query[0], k=3)
+
+
+def test_rag_service_returns_the_same_sources_on_both_stores(tmp_path, monkeypatch):
+    chroma = make_rag_service(tmp_path / "chroma", monkeypatch, QUERY_BATCH_ENABLED="false")
+    numpy_rag = make_rag_service(
+        tmp_path / "numpy", monkeypatch, VECTOR_STORE="numpy", VECTOR_STORE_PATH=str(tmp_path / "numpy" / "store")
+    )
+    for rag in (chroma, numpy_rag):
+        rag.add_document(DOCUMENT, "doc.docx")
+
+    for question in ("mentor agreements", "protégé", "chunk of text"):
+        expected = chroma.query(question, 4)
+        actual = numpy_rag.query(question, 4)
+        # The stub encoder maps many chunks to the same vector, so compare distances, not tie order
+        assert len(actual) == len(expected) == 4
+        assert [source["distance"] for source in actual] == pytest.approx([source["distance"] for source in expected], abs=1e-4)
+
+
+def test_chroma_store_sees_a_sync_from_another_process(tmp_path, monkeypatch):
+    rag = make_rag_service(tmp_path, monkeypatch, QUERY_BATCH_ENABLED="false", COLLECTION_VERSION_CHECK_SECONDS=0)
+    rag.add_document(DOCUMENT, "doc.docx")
+    version = rag.collection_version
+    embedding = rag.embed_query("mentor agreements")
+    assert len(rag.query_by_embedding(embedding, 3)) == 3
+
+    old_system = rag.store._generation.system
+
+    delete_in_another_process(tmp_path, "doc.docx")
+
+    # Reading the version only queues a check on the executor
+    assert rag.collection_version == version
+    rag._version_check.result()
+    # A new version, so cached results are not served, and a search over the new index
+    assert rag.collection_version != version
+    assert rag.query_by_embedding(embedding, 3) == []
+    assert rag.get_document_count() == 0
+    assert not old_system._running
+
+
+def test_version_checks_run_on_the_executor(tmp_path, monkeypatch):
+    rag = make_rag_service(tmp_path, monkeypatch, COLLECTION_VERSION_CHECK_SECONDS=0)
+    threads = []
+    refresh = rag.store.refresh
+    monkeypatch.setattr(rag.store, "refresh", lambda: threads.append(threading.current_thread().name) or refresh())
+
+    rag.collection_version
+    rag._version_check.result()
+    rag.collection_version
+    rag._version_check.result()
+
+    assert len(threads) == 2
+    assert all(name.startswith("rag") for name in threads)